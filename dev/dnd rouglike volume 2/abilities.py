@@ -1,6 +1,8 @@
 from typing import TYPE_CHECKING
+from events import GameEvent, MessageEvent
 if TYPE_CHECKING:
     from entity import Entity
+    from engine import Engine
 
 class Ability:
     def __init__(self, name: str, description: str, cooldown: int = 0):
@@ -9,30 +11,31 @@ class Ability:
         self.cooldown = cooldown
         self.current_cooldown = 0
 
-    def activate(self, entity: 'Entity') -> str:
+    def activate(self, entity: 'Entity', engine: 'Engine') -> GameEvent:
         if self.current_cooldown > 0:
-            return f"{self.name} is on cooldown ({self.current_cooldown} turns left)."
+            return engine.add_message(MessageEvent(
+                f"{self.name} is on cooldown ({self.current_cooldown} turns left).", success=False))
         
-        msg = self.apply_effect(entity)
-        if "Success" in msg or "active" in msg.lower() or "Rage" in msg:
+        event = engine.add_message(self.apply_effect(entity, engine))
+        if event.success:
             self.current_cooldown = self.cooldown
-        return msg
+        return event
 
-    def apply_effect(self, entity: 'Entity') -> str:
+    def apply_effect(self, entity: 'Entity', engine: 'Engine') -> GameEvent:
         raise NotImplementedError()
 
 class RageAbility(Ability):
     def __init__(self):
         super().__init__("Rage", "Gain +4 Str, but -2 AC for 10 turns.", cooldown=20)
 
-    def apply_effect(self, entity: 'Entity') -> str:
-        entity.fighter.status_effects["Rage"] = 10
-        return "You enter a bloodthirsty Rage!"
+    def apply_effect(self, entity: 'Entity', engine: 'Engine') -> GameEvent:
+        engine.effects.apply(entity.fighter, "Rage", 10)
+        return MessageEvent("You enter a bloodthirsty Rage!")
 
 class SneakAttackAbility(Ability):
     def __init__(self):
         super().__init__("Sneak Attack", "Deal double damage on your next hit.", cooldown=5)
 
-    def apply_effect(self, entity: 'Entity') -> str:
-        entity.fighter.status_effects["SneakAttack"] = 1
-        return "You prepare a deadly Sneak Attack!"
+    def apply_effect(self, entity: 'Entity', engine: 'Engine') -> GameEvent:
+        engine.effects.apply(entity.fighter, "SneakAttack", 1)
+        return MessageEvent("You prepare a deadly Sneak Attack!")
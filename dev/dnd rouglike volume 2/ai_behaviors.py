@@ -1,16 +1,71 @@
 from __future__ import annotations
 import random
+from collections import deque
 from typing import TYPE_CHECKING
 from dnd_rules import roll_dice
+from events import AttackEvent, SpellDamageEvent
 
 if TYPE_CHECKING:
     from entity import Entity
     from engine import Engine
 
+# How far a ranged monster will walk looking for a clear shot
+REPOSITION_STEPS = 6
+
+def is_blocked(engine: Engine, x: int, y: int) -> bool:
+    return any(e.blocks_movement for e in engine.spatial_index.at(x, y))
+
+def has_clear_shot(engine: Engine, x: int, y: int, max_range: int) -> bool:
+    """Whether (x, y) is in the player's line of sight, within range but not adjacent.
+
+    Sight is symmetric here: the player's field of view, recomputed once
+    per player move, answers it for every monster without tracing a line.
+    """
+    distance = max(abs(engine.player.x - x), abs(engine.player.y - y))
+    return 1 < distance <= max_range and (x, y) in engine.visible
+
+def step_to_clear_shot(engine: Engine, entity: Entity, max_range: int) -> bool:
+    """Takes one step along the shortest walk to a tile with a clear shot.
+
+    Returns False without moving if there's no such tile within
+    REPOSITION_STEPS.
+    """
+    start = (entity.x, entity.y)
+    came_from = {start: start}
+    frontier = deque([(start, 0)])
+    while frontier:
+        cell, steps = frontier.popleft()
+        if cell != start and has_clear_shot(engine, *cell, max_range):
+            while came_from[cell] != start:
+                cell = came_from[cell]
+            entity.move(cell[0] - entity.x, cell[1] - entity.y)
+            return True
+        if steps == REPOSITION_STEPS:
+            continue
+        x, y = cell
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)):
+            n = (x + dx, y + dy)
+            if n not in came_from and engine.game_map.is_walkable(*n) and not is_blocked(engine, *n):
+                came_from[n] = cell
+                frontier.append((n, steps + 1))
+    return False
+
 class BaseAI:
     def perform(self, engine: Engine, entity: Entity):
         raise NotImplementedError()
 
+    def move_towards(self, target: Entity, entity: Entity, engine: Engine):
+        dx = target.x - entity.x
+        dy = target.y - entity.y
+        
+        move_dx = (dx // abs(dx)) if dx != 0 else 0
+        move_dy = (dy // abs(dy)) if dy != 0 else 0
+        
+        new_x, new_y = entity.x + move_dx, entity.y + move_dy
+        if engine.game_map.is_walkable(new_x, new_y):
+            if not is_blocked(engine, new_x, new_y):
+                entity.move(move_dx, move_dy)
+
 class HostileMelee(BaseAI):
     def perform(self, engine: Engine, entity: Entity):
         target = engine.player
@@ -20,17 +75,10 @@ class HostileMelee(BaseAI):
 
         if distance <= 1:
             # Attack!
-            msg = entity.fighter.attack(target, engine)
-            engine.add_message(msg)
+            entity.fighter.attack(target, engine)
         else:
             # Move towards player
-            move_dx = (dx // abs(dx)) if dx != 0 else 0
-            move_dy = (dy // abs(dy)) if dy != 0 else 0
-            
-            new_x, new_y = entity.x + move_dx, entity.y + move_dy
-            if engine.game_map.is_walkable(new_x, new_y):
-                if not any(e.blocks_movement and e.x == new_x and e.y == new_y for e in engine.entities):
-                    entity.move(move_dx, move_dy)
+            self.move_towards(target, entity, engine)
 
 class HostileRanged(BaseAI):
     def __init__(self, range: int = 5):
@@ -42,39 +90,33 @@ class HostileRanged(BaseAI):
         dy = target.y - entity.y
         distance = max(abs(dx), abs(dy))
 
-        if 1 < distance <= self.range:
+        if has_clear_shot(engine, entity.x, entity.y, self.range):
             # Ranged attack! (Simple abstraction: damage player if in range)
             roll = roll_dice(1, 20)
             total_hit = roll + entity.fighter.stats.dex_mod
             if roll == 20 or total_hit >= target.fighter.ac:
-                num, sides = map(int, entity.fighter.damage_dice.split('d'))
+                num, sides = entity.fighter.derived.damage_roll
                 damage = roll_dice(num, sides) + entity.fighter.stats.dex_mod
                 if roll == 20: damage *= 2
+                engine.add_message(AttackEvent(entity, target, hit=True, damage=damage,
+                                               critical=roll == 20, ranged=True))
                 target.fighter.take_damage(damage, engine)
-                engine.add_message(f"{entity.name} shoots you for {damage} damage!")
             else:
-                engine.add_message(f"{entity.name} shoots and misses.")
+                engine.add_message(AttackEvent(entity, target, hit=False, ranged=True))
         elif distance <= 1:
             # Too close! Try to back away or melee if blocked
             move_dx = -(dx // abs(dx)) if dx != 0 else 0
             move_dy = -(dy // abs(dy)) if dy != 0 else 0
             
             new_x, new_y = entity.x + move_dx, entity.y + move_dy
-            if engine.game_map.is_walkable(new_x, new_y) and not any(e.blocks_movement and e.x == new_x and e.y == new_y for e in engine.entities):
+            if engine.game_map.is_walkable(new_x, new_y) and not is_blocked(engine, new_x, new_y):
                 entity.move(move_dx, move_dy)
             else:
                 # Forced to melee
-                msg = entity.fighter.attack(target, engine)
-                engine.add_message(msg)
-        else:
-            # Move towards player until in range
-            move_dx = (dx // abs(dx)) if dx != 0 else 0
-            move_dy = (dy // abs(dy)) if dy != 0 else 0
-            
-            new_x, new_y = entity.x + move_dx, entity.y + move_dy
-            if engine.game_map.is_walkable(new_x, new_y):
-                if not any(e.blocks_movement and e.x == new_x and e.y == new_y for e in engine.entities):
-                    entity.move(move_dx, move_dy)
+                entity.fighter.attack(target, engine)
+        elif distance > self.range or not step_to_clear_shot(engine, entity, self.range):
+            # Move towards player until in range (or no clear shot is nearby)
+            self.move_towards(target, entity, engine)
 
 class HostileCaster(BaseAI):
     def __init__(self, spell_range: int = 6):
@@ -86,21 +128,14 @@ class HostileCaster(BaseAI):
         dy = target.y - entity.y
         distance = max(abs(dx), abs(dy))
 
-        if distance <= self.spell_range:
+        if distance <= self.spell_range and (entity.x, entity.y) in engine.visible:
             # "Magic Missile" style caster logic
-            engine.add_message(f"{entity.name} chants and a bolt of energy hits you!")
             damage = roll_dice(1, 4) + 1 # Basic magic missile
+            engine.add_message(SpellDamageEvent(entity, "Magic Missile", [target], damage))
             target.fighter.take_damage(damage, engine)
-            engine.add_message(f"You take {damage} force damage!")
-        else:
+        elif distance > self.spell_range or not step_to_clear_shot(engine, entity, self.spell_range):
             # Move towards player
-            move_dx = (dx // abs(dx)) if dx != 0 else 0
-            move_dy = (dy // abs(dy)) if dy != 0 else 0
-            
-            new_x, new_y = entity.x + move_dx, entity.y + move_dy
-            if engine.game_map.is_walkable(new_x, new_y):
-                if not any(e.blocks_movement and e.x == new_x and e.y == new_y for e in engine.entities):
-                    entity.move(move_dx, move_dy)
+            self.move_towards(target, entity, engine)
 
 class BossExpertAI(BaseAI):
     def __init__(self, spell_range: int = 6):
@@ -114,29 +149,15 @@ class BossExpertAI(BaseAI):
 
         if distance <= 1:
             # Melee attack
-            msg = entity.fighter.attack(target, engine)
-            engine.add_message(msg)
-        elif 1 < distance <= self.spell_range:
+            entity.fighter.attack(target, engine)
+        elif has_clear_shot(engine, entity.x, entity.y, self.spell_range):
             # Chance to cast a spell or move
             if random.random() < 0.7:
-                engine.add_message(f"{entity.name} unleashes a devastating boss ability!")
                 damage = roll_dice(2, 6) + 2
+                engine.add_message(SpellDamageEvent(entity, "Devastating Power", [target], damage))
                 target.fighter.take_damage(damage, engine)
-                engine.add_message(f"You take {damage} damage from the boss's power!")
             else:
                 self.move_towards(target, entity, engine)
-        else:
+        elif distance > self.spell_range or not step_to_clear_shot(engine, entity, self.spell_range):
             # Move towards player
             self.move_towards(target, entity, engine)
-
-    def move_towards(self, target: Entity, entity: Entity, engine: Engine):
-        dx = target.x - entity.x
-        dy = target.y - entity.y
-        
-        move_dx = (dx // abs(dx)) if dx != 0 else 0
-        move_dy = (dy // abs(dy)) if dy != 0 else 0
-        
-        new_x, new_y = entity.x + move_dx, entity.y + move_dy
-        if engine.game_map.is_walkable(new_x, new_y):
-            if not any(e.blocks_movement and e.x == new_x and e.y == new_y for e in engine.entities):
-                entity.move(move_dx, move_dy)
@@ -0,0 +1,73 @@
+"""Shapes for area spells and the tiles they cover.
+
+Every shape is a function of the caster's tile, the target's tile and a
+size; it returns the affected tiles and `entities_in_area` looks them up in
+the engine's SpatialIndex, so resolving an area costs as much as the area,
+however crowded the floor is.
+"""
+from typing import Callable, Dict, List, Tuple, TYPE_CHECKING
+from map_tiles import GameMap
+
+if TYPE_CHECKING:
+    from entity import Entity
+    from engine import Engine
+
+Point = Tuple[int, int]
+
+def radius_cells(game_map: GameMap, origin: Point, target: Point, size: int) -> List[Point]:
+    """A diamond of tiles within `size` steps (Manhattan) of the target."""
+    tx, ty = target
+    cells = []
+    for dx in range(-size, size + 1):
+        reach = size - abs(dx)
+        for dy in range(-reach, reach + 1):
+            if game_map.in_bounds(tx + dx, ty + dy):
+                cells.append((tx + dx, ty + dy))
+    return cells
+
+def cone_cells(game_map: GameMap, origin: Point, target: Point, size: int) -> List[Point]:
+    """A quarter circle of radius `size` opening from the caster towards the target."""
+    ox, oy = origin
+    ax, ay = target[0] - ox, target[1] - oy
+    aim = ax * ax + ay * ay
+    if aim == 0:
+        return []
+    cells = []
+    for dx in range(-size, size + 1):
+        for dy in range(-size, size + 1):
+            length = dx * dx + dy * dy
+            if length == 0 or length > size * size:
+                continue
+            # Within 45 degrees of the aim: cos^2 >= 1/2, without square roots
+            dot = dx * ax + dy * ay
+            if dot > 0 and 2 * dot * dot >= length * aim and game_map.in_bounds(ox + dx, oy + dy):
+                cells.append((ox + dx, oy + dy))
+    return cells
+
+def line_cells(game_map: GameMap, origin: Point, target: Point, size: int) -> List[Point]:
+    """`size` tiles from the caster through the target, stopping at the first wall."""
+    ox, oy = origin
+    ax, ay = target[0] - ox, target[1] - oy
+    steps = max(abs(ax), abs(ay))
+    if steps == 0:
+        return []
+    cells = []
+    for step in range(1, size + 1):
+        x = ox + int(round(ax * step / steps))
+        y = oy + int(round(ay * step / steps))
+        if not game_map.in_bounds(x, y) or not game_map.tiles[x][y].transparent:
+            break
+        cells.append((x, y))
+    return cells
+
+SHAPES: Dict[str, Callable[[GameMap, Point, Point, int], List[Point]]] = {
+    "radius": radius_cells,
+    "cone": cone_cells,
+    "line": line_cells,
+}
+
+def entities_in_area(engine: 'Engine', caster: 'Entity', target: 'Entity', shape: str, size: int) -> List['Entity']:
+    """Fighters other than the caster standing in the shape."""
+    cells = SHAPES[shape](engine.game_map, (caster.x, caster.y), (target.x, target.y), size)
+    return [entity for entity in engine.spatial_index.in_cells(cells)
+            if entity is not caster and entity.fighter]
@@ -0,0 +1,128 @@
+import importlib
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MUSIC_FILE = "assets/sounds/ambient.mp3"
+# Imported behind the menu rather than at launch: floor generation pulls in numpy
+GAMEPLAY_MODULES = ("generators", "ai_behaviors", "hazards", "merchant", "bosses", "spells")
+
+class AssetManager:
+    """Loads fonts, sounds, music and glyph atlases on worker threads.
+
+    Each asset is submitted under a name and gets a Future, so the game can
+    show its menu straight away and use placeholders until the real thing is
+    ready. Callbacks registered with `on_ready` run on the main thread from
+    `poll`, which the engine calls once per frame, so workers only find and
+    decode files and the game's own objects are swapped in there.
+    """
+    def __init__(self, workers: int = 2):
+        self.started = time.perf_counter()
+        # No workers loads everything on the spot (headless engines, which are made by the hundred)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="assets") if workers else None
+        self._futures: Dict[str, Future] = {}
+        self._callbacks: List[Tuple[str, Callable[[Any], None]]] = []
+        self.timings: Dict[str, float] = {} # Name -> ms from startup until ready
+
+    def submit(self, name: str, load: Callable[[], Any], after: Tuple[str, ...] = ()) -> Future:
+        """Starts loading `name`, once the assets named in `after` have loaded."""
+        after = [self._futures[other] for other in after]
+        if self._pool is None:
+            future = Future()
+            try:
+                future.set_result(self._timed(name, load, after))
+            except Exception as e:
+                future.set_exception(e)
+        else:
+            future = self._pool.submit(self._timed, name, load, after)
+        self._futures[name] = future
+        return future
+
+    def _timed(self, name: str, load: Callable[[], Any], after: List[Future]) -> Any:
+        for future in after:
+            future.exception() # Waits; a failed dependency doesn't stop this one
+        result = load()
+        self.timings[name] = (time.perf_counter() - self.started) * 1000
+        return result
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._futures)
+
+    def ready(self, name: str) -> Future:
+        return self._futures[name]
+
+    def is_ready(self, name: str) -> bool:
+        future = self._futures.get(name)
+        return future is not None and future.done()
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """The loaded asset, or `default` while it is still loading or if it failed."""
+        future = self._futures.get(name)
+        if future is None or not future.done() or future.exception() is not None:
+            return default
+        return future.result()
+
+    def wait(self, *names: str):
+        for name in names:
+            self._futures[name].result()
+
+    def on_ready(self, name: str, callback: Callable[[Any], None]):
+        """Calls `callback(asset)` from the next `poll` after `name` has loaded."""
+        self._callbacks.append((name, callback))
+
+    def poll(self) -> List[str]:
+        """Runs the callbacks whose assets have finished; returns their names."""
+        finished = []
+        while self._callbacks:
+            callbacks, self._callbacks = self._callbacks, []
+            waiting = []
+            for name, callback in callbacks:
+                future = self._futures.get(name)
+                if future is None or not future.done():
+                    waiting.append((name, callback))
+                    continue
+                if future.exception() is None:
+                    callback(future.result())
+                finished.append(name)
+            ran = len(waiting) < len(callbacks)
+            self._callbacks = waiting + self._callbacks # Including any a callback registered
+            if not ran:
+                break
+        return finished
+
+    @property
+    def progress(self) -> Tuple[int, int]:
+        """(loaded, total) across everything submitted."""
+        return sum(future.done() for future in self._futures.values()), len(self._futures)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+def find_font(name: str) -> Optional[str]:
+    """Path of a system font, or None for pygame's own. The search is the slow part of SysFont."""
+    import pygame
+    return pygame.font.match_font(name)
+
+def open_font(path: Optional[str], size: int):
+    import pygame
+    return pygame.font.Font(path, size)
+
+def load_sounds() -> int:
+    """Initializes the mixer and decodes every game sound; returns how many loaded."""
+    from sound_manager import SoundManager
+    SoundManager().init_sounds()
+    return sum(future.result() is not None for future in SoundManager.preload())
+
+def load_music(filename: str = MUSIC_FILE) -> Optional[str]:
+    from sound_manager import SoundManager
+    return filename if SoundManager.load_music(filename) else None
+
+def import_modules(names=GAMEPLAY_MODULES) -> int:
+    for name in names:
+        importlib.import_module(name)
+    return len(names)
@@ -0,0 +1,296 @@
+"""Batch dungeon generation for tuning the floor generators.
+
+Usage:
+    python batch_generate.py run [--levels 1-20] [--floors 50] [--workers N] [--seed S]
+                                 [--dump floors.jsonl.gz] [--json stats.json]
+    python batch_generate.py show LEVEL SEED
+    python batch_generate.py show --dump floors.jsonl.gz INDEX
+
+`run` generates `--floors` floors for every dungeon level across a pool of
+worker processes and reports generation time percentiles, room counts,
+walkable area, monster/item/gold totals, generator and room theme
+frequencies and the connectivity analysis. Floors that were slow or still
+failed validation are listed with their seeds. `show` prints one floor as
+text, either regenerated from its level and seed or read back from a dump.
+
+Every floor is generated from its own seed, so any floor in a report can be
+reproduced exactly with `show LEVEL SEED`.
+"""
+import os
+import sys
+
+# Generation never needs a window or an audio device.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import base64
+import gzip
+import json
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import engine as engine_module
+from engine import Engine
+from chr_classes import FighterClass
+from procgen import floor_dimensions
+from generators import choose_generator
+
+MAX_LEVEL = 20
+DEFAULT_FLOORS = 50
+# Floors slower than this many times their level's median are reported
+SLOW_FACTOR = 5.0
+# ...as long as they also took at least this long (sub-millisecond floors are noisy)
+SLOW_MIN_MS = 5.0
+PERCENTILES = (50, 90, 99)
+
+_engine: Optional[Engine] = None
+
+def init_worker():
+    """Builds the headless engine each worker process reuses for every floor."""
+    global _engine
+    engine_module.LOGGING_ENABLED = False
+    _engine = Engine(headless=True)
+    _engine.create_player(FighterClass())
+
+def encode_floor(engine: Engine) -> dict:
+    """The floor's tiles and entities in a compact, JSON-friendly form.
+
+    Tiles are stored as indices into a palette of the distinct tile kinds,
+    one byte per tile in column-major order, base64-encoded.
+    """
+    game_map = engine.game_map
+    palette: Dict[int, int] = {}
+    kinds = []
+    cells = bytearray()
+    for column in game_map.tiles:
+        for tile in column:
+            index = palette.get(id(tile))
+            if index is None:
+                index = palette[id(tile)] = len(kinds)
+                kinds.append([tile.char, list(tile.color), tile.walkable, tile.transparent])
+            cells.append(index)
+    return {
+        "width": game_map.width,
+        "height": game_map.height,
+        "palette": kinds,
+        "tiles": base64.b64encode(cells).decode("ascii"),
+        "entities": [[e.x, e.y, e.char, e.name] for e in engine.entities],
+    }
+
+def generate_one(task: Tuple[int, int, bool]) -> dict:
+    """Generates one floor and returns its statistics (and the floor, if asked)."""
+    level, seed, keep_floor = task
+    if _engine is None:
+        init_worker()
+    engine = _engine
+    random.seed(seed)
+    engine.dungeon_level = level
+    engine.entities = [engine.player]
+    width, height, max_rooms = floor_dimensions(level)
+    generator = choose_generator(level, max_rooms)
+
+    start = time.perf_counter()
+    generator.generate(engine, width, height)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    analysis = generator.analysis
+    entities = engine.entities
+    record = {
+        "level": level,
+        "seed": seed,
+        "generator": generator.name,
+        "ms": elapsed,
+        "rooms": len(generator.themes) or 1,
+        "walkable": analysis.floor_cells,
+        "monsters": sum(1 for e in entities if e.ai),
+        "items": sum(1 for e in entities if e.item),
+        "gold": sum(getattr(e, "gold_value", 0) for e in entities),
+        "themes": Counter(generator.themes),
+        "ok": analysis.ok,
+        "analysis": analysis.summary(),
+    }
+    if keep_floor:
+        record["floor"] = encode_floor(engine)
+    return record
+
+def make_tasks(levels: List[int], floors: int, seed: int, keep_floors: bool) -> List[Tuple[int, int, bool]]:
+    rng = random.Random(seed)
+    return [(level, rng.getrandbits(32), keep_floors) for level in levels for _ in range(floors)]
+
+def run_batch(tasks: List[Tuple[int, int, bool]], workers: int) -> Iterator[dict]:
+    """Yields one record per task, in task order. `workers` <= 1 runs in this process."""
+    if workers <= 1:
+        yield from map(generate_one, tasks)
+        return
+    chunksize = max(1, len(tasks) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as pool:
+        yield from pool.map(generate_one, tasks, chunksize=chunksize)
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+def mean(values: List[float]) -> float:
+    return sum(values) / len(values) if values else 0.0
+
+def summarize_level(records: List[dict]) -> dict:
+    times = sorted(r["ms"] for r in records)
+    summary = {
+        "floors": len(records),
+        "ms": {f"p{p}": percentile(times, p) for p in PERCENTILES},
+        "generators": dict(Counter(r["generator"] for r in records)),
+        "failed": sum(1 for r in records if not r["ok"]),
+    }
+    summary["ms"]["max"] = times[-1]
+    for key in ("rooms", "walkable", "monsters", "items", "gold"):
+        values = [r[key] for r in records]
+        summary[key] = {"mean": mean(values), "min": min(values), "max": max(values), "total": sum(values)}
+    for key in ("regions", "dead_ends", "stairs_distance"):
+        values = [r["analysis"][key] for r in records if r["analysis"][key] is not None]
+        summary[key] = mean(values)
+    return summary
+
+def summarize(records: List[dict]) -> dict:
+    by_level: Dict[int, List[dict]] = {}
+    for record in records:
+        by_level.setdefault(record["level"], []).append(record)
+    levels = {level: summarize_level(rows) for level, rows in sorted(by_level.items())}
+
+    themes = Counter()
+    for record in records:
+        themes.update(record["themes"])
+
+    # Seeds worth a closer look: failed validation or far slower than their level's median
+    flagged = []
+    for record in records:
+        median = levels[record["level"]]["ms"]["p50"]
+        reasons = []
+        if not record["ok"]:
+            reasons.append("unreachable")
+        if record["ms"] > max(median * SLOW_FACTOR, SLOW_MIN_MS):
+            reasons.append(f"slow ({record['ms']:.1f} ms)")
+        if record["monsters"] == 0 and record["generator"] != "shop":
+            reasons.append("no monsters")
+        if reasons:
+            flagged.append({"level": record["level"], "seed": record["seed"],
+                            "generator": record["generator"], "reasons": reasons})
+    return {
+        "floors": len(records),
+        "levels": levels,
+        "generators": dict(Counter(r["generator"] for r in records)),
+        "themes": dict(themes),
+        "flagged": flagged,
+    }
+
+def print_report(summary: dict, wall_time: float):
+    print(f"{'lvl':>3} {'floors':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'rooms':>6} {'walkable':>8} {'mons':>6} {'items':>6} {'gold':>7} {'dead':>6} {'fail':>4}")
+    for level, row in summary["levels"].items():
+        ms = row["ms"]
+        print(f"{level:>3} {row['floors']:>6} {ms['p50']:>8.2f} {ms['p90']:>8.2f} {ms['p99']:>8.2f} "
+              f"{ms['max']:>8.2f} {row['rooms']['mean']:>6.1f} {row['walkable']['mean']:>8.0f} "
+              f"{row['monsters']['mean']:>6.1f} {row['items']['mean']:>6.1f} {row['gold']['mean']:>7.1f} "
+              f"{row['dead_ends']:>6.1f} {row['failed']:>4}")
+
+    def frequencies(title: str, counts: Dict[str, int]):
+        total = sum(counts.values()) or 1
+        parts = ", ".join(f"{name} {count / total:.1%}"
+                          for name, count in sorted(counts.items(), key=lambda kv: -kv[1]))
+        print(f"{title}: {parts}")
+
+    frequencies("Generators", summary["generators"])
+    frequencies("Room themes", summary["themes"])
+    print(f"{summary['floors']} floors in {wall_time:.1f} s")
+    if summary["flagged"]:
+        print(f"Flagged floors ({len(summary['flagged'])}):")
+        for floor in summary["flagged"]:
+            print(f"  level {floor['level']:>2} seed {floor['seed']:>10} "
+                  f"{floor['generator']:<6} {', '.join(floor['reasons'])}")
+
+def write_dump(path: str, records: List[dict]):
+    """One JSON object per line, gzip-compressed."""
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+def load_dump(path: str) -> List[dict]:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def render_floor(floor: dict) -> str:
+    """The floor as text, entities drawn over the tiles."""
+    width, height = floor["width"], floor["height"]
+    cells = base64.b64decode(floor["tiles"])
+    chars = [kind[0] for kind in floor["palette"]]
+    rows = [[chars[cells[x * height + y]] for x in range(width)] for y in range(height)]
+    for x, y, char, _name in floor["entities"]:
+        rows[y][x] = char
+    return "\n".join("".join(row) for row in rows)
+
+def parse_levels(text: str) -> List[int]:
+    """Level lists such as 1-20, 3 or 1,4,7-9."""
+    levels = []
+    for part in text.split(","):
+        first, _, last = part.partition("-")
+        levels.extend(range(int(first), int(last or first) + 1))
+    return levels
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate dungeon floors in bulk and report statistics.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="generate floors and report statistics")
+    run_parser.add_argument("--levels", type=parse_levels, default=list(range(1, MAX_LEVEL + 1)),
+                            help="dungeon levels, e.g. 1-20 or 1,4,7-9 (default 1-20)")
+    run_parser.add_argument("--floors", type=int, default=DEFAULT_FLOORS, help="floors per level")
+    run_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                            help="worker processes; 1 generates in this process")
+    run_parser.add_argument("--seed", type=int, help="base seed (default: random)")
+    run_parser.add_argument("--dump", help="write every floor to this .jsonl.gz file")
+    run_parser.add_argument("--json", help="also write the statistics as JSON")
+
+    show_parser = sub.add_parser("show", help="print one floor as text")
+    show_parser.add_argument("level_or_index", type=int, help="dungeon level, or index into --dump")
+    show_parser.add_argument("seed", type=int, nargs="?")
+    show_parser.add_argument("--dump", help="read the floor from this dump instead of regenerating it")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        if args.dump:
+            record = load_dump(args.dump)[args.level_or_index]
+        elif args.seed is None:
+            parser.error("show needs LEVEL SEED, or --dump FILE INDEX")
+        else:
+            record = generate_one((args.level_or_index, args.seed, True))
+        print(render_floor(record["floor"]))
+        print(f"level {record['level']} seed {record['seed']} {record['generator']}: "
+              f"{record['rooms']} rooms, {record['monsters']} monsters, {record['items']} items, "
+              f"{record['gold']} gold, {record['ms']:.2f} ms, {record['analysis']}")
+        return 0
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    tasks = make_tasks(args.levels, args.floors, seed, keep_floors=bool(args.dump))
+    print(f"Generating {len(tasks)} floors with {args.workers} worker(s), seed {seed}...")
+    start = time.perf_counter()
+    records = list(run_batch(tasks, args.workers))
+    wall_time = time.perf_counter() - start
+
+    summary = summarize(records)
+    summary["seed"] = seed
+    print_report(summary, wall_time)
+    if args.dump:
+        write_dump(args.dump, records)
+        print(f"Floors written to {args.dump}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+    return 1 if any(row["failed"] for row in summary["levels"].values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
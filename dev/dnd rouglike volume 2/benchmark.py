@@ -0,0 +1,463 @@
+"""Performance benchmarks for the game.
+
+Usage:
+    python benchmark.py run [--output results.json] [--repeat N] [--quick]
+    python benchmark.py compare baseline.json results.json [--threshold 0.15]
+    python benchmark.py scaling [--sizes 50 100 200 400] [--layout rooms] [--output scaling.json]
+    python benchmark.py imports [--module engine] [--top 15]
+
+`run` measures launch-to-menu time (in fresh processes), dungeon generation,
+monster turns, melee combat, frame rendering (to an offscreen surface),
+save/load and the original package's FOV, and writes the results as JSON,
+with the stat caches' hit counts. `compare` flags every metric that got
+slower (or bigger) than the stored baseline by more than the threshold and
+exits non-zero if any did.
+`scaling` builds stress floors of growing size (see scenarios.py) and reports
+how each subsystem's cost grows with map area, flagging anything superlinear.
+`imports` is `python -X importtime` boiled down: the slowest modules to
+import, with the game's own modules marked.
+"""
+import os
+import sys
+
+# Never open a window or an audio device while benchmarking.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import argparse
+import importlib
+import json
+import math
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+
+import engine as engine_module
+from engine import Engine
+from chr_classes import FighterClass
+from constants import GameState
+from map_tiles import GameMap
+from message_log import MessageLog
+from generators import generate_floor
+from connectivity import analyze_engine_floor
+from save_manager import SaveManager
+from scenarios import StressScenario, SCENARIO_LAYOUTS
+from spells import FireballSpell
+from dnd_rules import MODIFIER_CACHE
+from entity import DERIVED_STAT_CACHE
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ORIGINAL_DIR = os.path.join(os.path.dirname(SCRIPT_DIR), "dnd_roguelike")
+
+MAX_LEVEL = 20
+MONSTER_COUNTS = [10, 100, 1000]
+COMBAT_EXCHANGES = 2000
+DEFAULT_THRESHOLD = 0.15
+SEED = 1234
+SCALING_SIZES = [50, 100, 200, 400]
+STARTUP_RUNS = 3
+# Growth exponent vs. map area above which a subsystem is reported as superlinear
+SUPERLINEAR_EXPONENT = 1.5
+# Old metric name prefix -> new one, so baselines from before a rename still compare
+RENAMED_METRICS = {"procgen.generate_dungeon.": "procgen.generate_floor."}
+
+def summarize(samples: List[float], unit: str = "ms") -> dict:
+    return {
+        "unit": unit,
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "samples": len(samples),
+    }
+
+def time_call(func: Callable, repeat: int, setup: Optional[Callable] = None) -> dict:
+    """Times `func` `repeat` times in milliseconds; `setup` runs untimed before each call."""
+    if setup:
+        setup()
+    func() # Warm-up: font caches, first allocations
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+def make_engine() -> Engine:
+    engine = Engine(headless=True)
+    engine.create_player(FighterClass())
+    engine.state = GameState.PLAYING
+    engine.dungeon_level = 1
+    return engine
+
+def build_floor(engine: Engine, level: int) -> GameMap:
+    engine.dungeon_level = level
+    engine.entities = [engine.player]
+    engine.game_map = generate_floor(engine)
+    # As new_floor does, so monster line of sight and effect timers start fresh
+    engine.effects.reset(engine.turn)
+    engine.effects.track(engine.entities)
+    engine.recompute_fov()
+    return engine.game_map
+
+def build_arena(engine: Engine, monster_count: int) -> None:
+    """Open square floor with the player in the middle and `monster_count` monsters."""
+    side = max(20, int((monster_count * 4) ** 0.5) + 2)
+    # Level 3+ spawn tables mix melee, ranged and caster AI
+    StressScenario(side, side, layout="open", monster_count=monster_count, item_count=0,
+                   trap_density=0, barrel_density=0, gold_density=0, dungeon_level=3).build(engine)
+
+def keep_player_alive(engine: Engine) -> None:
+    engine.player.fighter.max_hp = engine.player.fighter.hp = 10 ** 9
+    engine.state = GameState.PLAYING
+    engine.vfx.clear()
+
+def bench_procgen(engine: Engine, repeat: int, results: Dict[str, dict]):
+    samples = {level: [] for level in range(1, MAX_LEVEL + 1)}
+    analysis_samples = []
+    # Floors are generated in level order, the way a run visits them.
+    # The first round is a warm-up and is not recorded.
+    for level in range(1, MAX_LEVEL + 1):
+        build_floor(engine, level)
+    for _ in range(repeat):
+        for level in range(1, MAX_LEVEL + 1):
+            start = time.perf_counter()
+            build_floor(engine, level)
+            samples[level].append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            analyze_engine_floor(engine)
+            analysis_samples.append((time.perf_counter() - start) * 1000)
+    for level, level_samples in samples.items():
+        results[f"procgen.generate_floor.level_{level:02d}"] = summarize(level_samples)
+    # Validation runs on every generated floor, so it has to stay cheap
+    results["procgen.analyze_floor"] = summarize(analysis_samples)
+
+def bench_monster_turn(engine: Engine, repeat: int, results: Dict[str, dict]):
+    for count in MONSTER_COUNTS:
+        build_arena(engine, count)
+        keep_player_alive(engine)
+        results[f"ai.monster_turn.monsters_{count}"] = time_call(
+            engine.monster_turn, repeat, setup=lambda: keep_player_alive(engine))
+
+def bench_combat(engine: Engine, repeat: int, results: Dict[str, dict], counters: Dict[str, dict]):
+    """Attack resolution on its own: the player and one monster trading blows."""
+    build_arena(engine, 1)
+    monster = next(e for e in engine.entities if e.ai)
+
+    def setup():
+        keep_player_alive(engine)
+        monster.fighter.hp = monster.fighter.max_hp
+
+    def exchange():
+        for _ in range(COMBAT_EXCHANGES):
+            engine.player.fighter.attack(monster)
+            monster.fighter.attack(engine.player)
+
+    MODIFIER_CACHE.reset()
+    DERIVED_STAT_CACHE.reset()
+    results[f"combat.melee_exchanges_{COMBAT_EXCHANGES}"] = time_call(exchange, repeat, setup=setup)
+    for cache in (MODIFIER_CACHE, DERIVED_STAT_CACHE):
+        counters[cache.name] = cache.summary()
+
+def bench_render(engine: Engine, repeat: int, results: Dict[str, dict]):
+    for level in (1, MAX_LEVEL):
+        build_floor(engine, level)
+        engine.message_log = MessageLog.from_lines(f"Benchmark message {i}" for i in range(5))
+        results[f"render.render_game.level_{level:02d}"] = time_call(engine.render_game, repeat)
+
+def bench_save_load(engine: Engine, repeat: int, results: Dict[str, dict]):
+    old_save_file = SaveManager.SAVE_FILE
+    with tempfile.TemporaryDirectory() as tmp:
+        SaveManager.SAVE_FILE = os.path.join(tmp, "benchmark.sav")
+        try:
+            for level in (1, MAX_LEVEL):
+                build_floor(engine, level)
+                results[f"save.save_game.level_{level:02d}"] = time_call(lambda: SaveManager.save_game(engine), repeat)
+                results[f"save.load_game.level_{level:02d}"] = time_call(SaveManager.load_game, repeat)
+                size = os.path.getsize(SaveManager.SAVE_FILE)
+                results[f"save.size.level_{level:02d}"] = {"unit": "bytes", "value": size}
+        finally:
+            SaveManager.SAVE_FILE = old_save_file
+
+def load_original_modules(*names):
+    """Imports modules from the original dnd_roguelike package.
+
+    Both packages ship a `constants` module, so ours is set aside while the
+    original ones import and put back afterwards.
+    """
+    shadowed = set(names) | {"constants"}
+    saved = {name: sys.modules.pop(name) for name in shadowed if name in sys.modules}
+    sys.path.insert(0, ORIGINAL_DIR)
+    try:
+        return [importlib.import_module(name) for name in names]
+    finally:
+        sys.path.remove(ORIGINAL_DIR)
+        for name in shadowed:
+            sys.modules.pop(name, None)
+        sys.modules.update(saved)
+
+def bench_original_fov(repeat: int, results: Dict[str, dict]):
+    original_constants, map_gen, fov = load_original_modules("constants", "map_gen", "fov")
+    game_map = map_gen.Map(original_constants.MAP_WIDTH, original_constants.MAP_HEIGHT)
+    px, py = game_map.make_map(30, 6, 10, original_constants.MAP_WIDTH, original_constants.MAP_HEIGHT)
+    results["original.compute_fov"] = time_call(
+        lambda: fov.compute_fov(game_map, px, py, original_constants.FOV_RADIUS), repeat)
+
+# Starts the game with a (dummy) window, draws the menu once and reports timings
+LAUNCH_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+sys.path.insert(0, sys.argv[1])
+import engine
+imported = time.perf_counter()
+engine.LOGGING_ENABLED = False
+game = engine.Engine()
+game.update()
+game.render()
+menu = time.perf_counter()
+print(json.dumps({"import": (imported - started) * 1000, "menu": (menu - started) * 1000}))
+game.assets.shutdown()
+"""
+
+def launch_game() -> dict:
+    """One cold start in a fresh interpreter, run in a scratch directory."""
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy")
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", LAUNCH_SCRIPT, SCRIPT_DIR], cwd=tmp, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        total = (time.perf_counter() - start) * 1000
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["process"] = total
+    return timings
+
+def bench_startup(repeat: int, results: Dict[str, dict]):
+    launches = [launch_game() for _ in range(repeat)]
+    results["startup.import_engine"] = summarize([launch["import"] for launch in launches])
+    results["startup.launch_to_menu"] = summarize([launch["menu"] for launch in launches])
+
+def import_times(module: str) -> List[dict]:
+    """Per-module import cost (self and cumulative, in ms) from `python -X importtime`."""
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=SCRIPT_DIR,
+                            capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        rows.append({"module": name.strip(), "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+                     "self": int(own) / 1000, "cumulative": int(cumulative) / 1000})
+    return rows
+
+def print_import_report(module: str, top: int):
+    rows = import_times(module)
+    ours = {name[:-3] for name in os.listdir(SCRIPT_DIR) if name.endswith(".py")}
+    total = next(row["cumulative"] for row in rows if row["module"] == module)
+    print(f"import {module}: {total:.1f} ms, {len(rows)} modules")
+    print(f"\n{'slowest (self)':<40} {'self':>8} {'total':>8}")
+    for row in sorted(rows, key=lambda row: -row["self"])[:top]:
+        mark = "  *" if row["module"] in ours else ""
+        print(f"{row['module']:<40} {row['self']:>8.1f} {row['cumulative']:>8.1f}{mark}")
+    print(f"\n{'game modules (total)':<40} {'self':>8} {'total':>8}")
+    for row in sorted((row for row in rows if row["module"] in ours), key=lambda row: -row["cumulative"])[:top]:
+        print(f"{row['module']:<40} {row['self']:>8.1f} {row['cumulative']:>8.1f}")
+    print("\n* the game's own modules")
+
+def run_benchmarks(repeat: int, quick: bool = False) -> dict:
+    engine_module.LOGGING_ENABLED = False
+    random.seed(SEED)
+    engine = make_engine()
+    results: Dict[str, dict] = {}
+    counters: Dict[str, dict] = {}
+
+    steps = [
+        ("startup", lambda: bench_startup(STARTUP_RUNS if quick else repeat, results)),
+        ("procgen", lambda: bench_procgen(engine, max(1, repeat // 2) if quick else repeat, results)),
+        ("monster_turn", lambda: bench_monster_turn(engine, repeat, results)),
+        ("combat", lambda: bench_combat(engine, repeat, results, counters)),
+        ("render", lambda: bench_render(engine, repeat, results)),
+        ("save/load", lambda: bench_save_load(engine, repeat, results)),
+        ("original fov", lambda: bench_original_fov(repeat, results)),
+    ]
+    for name, step in steps:
+        start = time.perf_counter()
+        step()
+        print(f"  {name:<14} {time.perf_counter() - start:6.2f}s")
+    for name, counts in counters.items():
+        print(f"  {name}: {counts['hits']} hits, {counts['recomputes']} recomputes "
+              f"({counts['hit_rate']:.1%} hit rate)")
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "seed": SEED,
+        },
+        "results": results,
+        "counters": counters,
+    }
+
+def run_scaling(sizes: List[int], repeat: int, layout: str = "rooms") -> dict:
+    """Times render, AI, AoE and saves on square stress floors of each size."""
+    engine_module.LOGGING_ENABLED = False
+    engine = make_engine()
+    fireball = FireballSpell()
+    rows = []
+    old_save_file = SaveManager.SAVE_FILE
+    with tempfile.TemporaryDirectory() as tmp:
+        SaveManager.SAVE_FILE = os.path.join(tmp, "scaling.sav")
+        try:
+            for size in sizes:
+                start = time.perf_counter()
+                StressScenario(size, size, layout=layout, seed=SEED).build(engine)
+                build_ms = (time.perf_counter() - start) * 1000
+
+                def cast_fireball():
+                    targets = [e for e in engine.entities if e.ai]
+                    if targets:
+                        fireball.cast(engine, engine.player, random.choice(targets))
+
+                row = {
+                    "size": size,
+                    "area": size * size,
+                    "entities": len(engine.entities),
+                    "build_ms": build_ms,
+                    "render_ms": time_call(engine.render_game, repeat)["median"],
+                    "monster_turn_ms": time_call(engine.monster_turn, repeat,
+                                                 setup=lambda: keep_player_alive(engine))["median"],
+                    "aoe_ms": time_call(cast_fireball, repeat)["median"],
+                    "save_ms": time_call(lambda: SaveManager.save_game(engine), repeat)["median"],
+                }
+                row["save_bytes"] = os.path.getsize(SaveManager.SAVE_FILE)
+                rows.append(row)
+                print(f"  {size:>4}x{size:<4} entities={row['entities']:<6} build={build_ms:8.1f}ms "
+                      f"render={row['render_ms']:8.1f}ms ai={row['monster_turn_ms']:8.1f}ms "
+                      f"aoe={row['aoe_ms']:6.2f}ms save={row['save_ms']:7.1f}ms")
+        finally:
+            SaveManager.SAVE_FILE = old_save_file
+
+    # Growth exponent: cost ~ area^k between the smallest and largest floor.
+    exponents = {}
+    if len(rows) >= 2:
+        first, last = rows[0], rows[-1]
+        for key in ("build_ms", "render_ms", "monster_turn_ms", "aoe_ms", "save_ms", "save_bytes"):
+            if first[key] > 0 and last[key] > 0:
+                exponents[key] = math.log(last[key] / first[key]) / math.log(last["area"] / first["area"])
+    return {"rows": rows, "exponents": exponents}
+
+def metric_value(metric: dict) -> float:
+    return metric["value"] if "value" in metric else metric["median"]
+
+def current_name(name: str) -> str:
+    for old, new in RENAMED_METRICS.items():
+        if name.startswith(old):
+            return new + name[len(old):]
+    return name
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> List[str]:
+    """Prints a comparison table and returns the names of regressed metrics."""
+    regressions = []
+    base_results, cur_results = baseline["results"], current["results"]
+    base_results = {current_name(name): metric for name, metric in base_results.items()}
+    cur_results = {current_name(name): metric for name, metric in cur_results.items()}
+    print(f"{'metric':<44} {'baseline':>12} {'current':>12} {'unit':<5} {'change':>8}")
+    for name in sorted(set(base_results) | set(cur_results)):
+        if name not in base_results or name not in cur_results:
+            status = "new" if name not in base_results else "missing"
+            print(f"{name:<44} {status:>12}")
+            continue
+        old, new = metric_value(base_results[name]), metric_value(cur_results[name])
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        elif change < -threshold:
+            flag = "  improved"
+        unit = cur_results[name]["unit"]
+        print(f"{name:<44} {old:>12.3f} {new:>12.3f} {unit:<5} {change:>+8.1%}{flag}")
+    return regressions
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the D&D roguelike engine.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="run the benchmark suite")
+    run_parser.add_argument("--output", default="benchmark_results.json")
+    run_parser.add_argument("--repeat", type=int, default=10)
+    run_parser.add_argument("--quick", action="store_true", help="fewer dungeon generation rounds")
+    run_parser.add_argument("--baseline", help="compare against this baseline after running")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    cmp_parser = sub.add_parser("compare", help="compare results against a baseline")
+    cmp_parser.add_argument("baseline")
+    cmp_parser.add_argument("current")
+    cmp_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                            help="relative slowdown that counts as a regression (default 0.15)")
+
+    scale_parser = sub.add_parser("scaling", help="measure growth with map area and entity count")
+    scale_parser.add_argument("--sizes", type=int, nargs="+", default=SCALING_SIZES)
+    scale_parser.add_argument("--repeat", type=int, default=3)
+    scale_parser.add_argument("--layout", choices=SCENARIO_LAYOUTS, default="rooms",
+                              help="stress floor layout; bsp and caves use the real floor generators")
+    scale_parser.add_argument("--output", help="also write the measurements as JSON")
+
+    imports_parser = sub.add_parser("imports", help="report what importing a module costs")
+    imports_parser.add_argument("--module", default="engine")
+    imports_parser.add_argument("--top", type=int, default=15)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "imports":
+        print_import_report(args.module, args.top)
+        return 0
+
+    if args.command == "scaling":
+        print(f"Scaling benchmark over sizes {args.sizes}...")
+        data = run_scaling(args.sizes, args.repeat, args.layout)
+        superlinear = []
+        for key, exponent in data["exponents"].items():
+            flag = ""
+            if exponent > SUPERLINEAR_EXPONENT:
+                flag = "  SUPERLINEAR"
+                superlinear.append(key)
+            print(f"  {key:<16} ~ area^{exponent:.2f}{flag}")
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(data, f, indent=2)
+        return 1 if superlinear else 0
+
+    if args.command == "run":
+        print(f"Running benchmarks (repeat={args.repeat})...")
+        data = run_benchmarks(args.repeat, quick=args.quick)
+        with open(args.output, "w") as f:
+            json.dump(data, f, indent=2)
+        print(f"Results written to {args.output}")
+        if not args.baseline:
+            return 0
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        current = data
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+
+    regressions = compare_results(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    print("\nNo regressions.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
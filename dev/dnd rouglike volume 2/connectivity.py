@@ -0,0 +1,174 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
+from map_tiles import GameMap
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+Point = Tuple[int, int]
+
+def walkable_grid(game_map: GameMap) -> bytearray:
+    """Walkability as a flat bytearray with a one-tile wall border.
+
+    Cell (x, y) lives at (x + 1) * (height + 2) + (y + 1), so the four
+    neighbours of index i are i - 1, i + 1, i - stride and i + stride, and
+    the border means they never need a bounds check.
+    """
+    stride = game_map.height + 2
+    grid = bytearray(stride)
+    for column in game_map.tiles:
+        grid.append(0)
+        grid.extend([tile.walkable for tile in column])
+        grid.append(0)
+    grid.extend(bytes(stride))
+    return grid
+
+class FloorAnalysis:
+    """Connectivity facts about a generated floor, from `analyze_floor`."""
+    def __init__(self):
+        self.floor_cells = 0
+        self.region_count = 0
+        self.reachable_cells = 0
+        self.dead_ends = 0
+        self.stairs_distance: Optional[int] = None
+        # Required points (merchant, boss, ...) -> steps from the start, None if cut off
+        self.target_distances: Dict[Point, Optional[int]] = {}
+        self.has_stairs = False
+        # Laid out like `walkable_grid`; reached tiles are set in `grid` but not in `unreached`
+        self.grid = bytearray()
+        self.unreached = b""
+        self.stride = 0
+
+    @property
+    def unreachable(self) -> List[Point]:
+        return [point for point, dist in self.target_distances.items() if dist is None]
+
+    @property
+    def ok(self) -> bool:
+        stairs_ok = self.stairs_distance is not None or not self.has_stairs
+        return stairs_ok and not self.unreachable
+
+    def summary(self) -> dict:
+        return {
+            "floor_cells": self.floor_cells,
+            "regions": self.region_count,
+            "reachable_cells": self.reachable_cells,
+            "dead_ends": self.dead_ends,
+            "stairs_distance": self.stairs_distance,
+            "unreachable": len(self.unreachable),
+        }
+
+def analyze_floor(game_map: GameMap, start: Point, stairs: Optional[Point] = None,
+                  targets: Iterable[Point] = (), obstacles: Iterable[Point] = ()) -> FloorAnalysis:
+    """Flood fill from `start` plus a region count and dead-end count.
+
+    `obstacles` are walkable tiles that something immovable stands on (the
+    merchant); a target on one counts as reached from any neighbour, since
+    the player interacts with it by bumping into it.
+    """
+    stride = game_map.height + 2
+    grid = walkable_grid(game_map)
+    blocked = set(obstacles)
+    for x, y in blocked:
+        grid[(x + 1) * stride + y + 1] = 0
+
+    analysis = FloorAnalysis()
+    analysis.stride = stride
+    analysis.floor_cells = grid.count(1)
+
+    # Grid index -> points whose distance is settled when that index is reached
+    watched: Dict[int, List[Tuple[Point, int]]] = {}
+    points = list(targets)
+    if stairs is not None:
+        analysis.has_stairs = True
+        points.append(stairs)
+    for point in points:
+        i = (point[0] + 1) * stride + point[1] + 1
+        if point in blocked:
+            for n in (i - 1, i + 1, i - stride, i + stride):
+                watched.setdefault(n, []).append((point, 1))
+        else:
+            watched.setdefault(i, []).append((point, 0))
+    found: Dict[Point, int] = {}
+
+    # Breadth-first from the start, one ring of equal distance at a time
+    seen = bytearray(grid)
+    sx, sy = start
+    origin = (sx + 1) * stride + sy + 1
+    if seen[origin]:
+        seen[origin] = 0
+        frontier = [origin]
+        distance = 0
+        while frontier:
+            next_frontier = []
+            for i in frontier:
+                if i in watched:
+                    for point, extra in watched[i]:
+                        if point not in found:
+                            found[point] = distance + extra
+                exits = 0
+                for n in (i - 1, i + 1, i - stride, i + stride):
+                    if grid[n]:
+                        exits += 1
+                        if seen[n]:
+                            seen[n] = 0
+                            next_frontier.append(n)
+                if exits == 1:
+                    analysis.dead_ends += 1
+            analysis.reachable_cells += len(frontier)
+            frontier = next_frontier
+            distance += 1
+        analysis.region_count = 1
+    # Reached tiles are the walkable ones the fill cleared
+    analysis.grid = grid
+    analysis.unreached = bytes(seen)
+
+    # Remaining regions; bytearray.find does the scanning in C
+    i = seen.find(1)
+    while i != -1:
+        analysis.region_count += 1
+        seen[i] = 0
+        stack = [i]
+        while stack:
+            j = stack.pop()
+            exits = 0
+            for n in (j - 1, j + 1, j - stride, j + stride):
+                if grid[n]:
+                    exits += 1
+                    if seen[n]:
+                        seen[n] = 0
+                        stack.append(n)
+            if exits == 1:
+                analysis.dead_ends += 1
+        i = seen.find(1, i)
+
+    if stairs is not None:
+        analysis.stairs_distance = found.get(stairs)
+    for point in targets:
+        analysis.target_distances[point] = found.get(point)
+    return analysis
+
+def analyze_engine_floor(engine: 'Engine') -> FloorAnalysis:
+    """Analyzes the engine's current floor from the player's position.
+
+    The stairs must be reachable, and so must the merchant and any boss.
+    Entities that block movement and never move (not monsters, not the
+    player) are treated as obstacles.
+    """
+    from ai_behaviors import BossExpertAI
+    stairs = next(((e.x, e.y) for e in engine.entities if e.stairs), None)
+    obstacles: Set[Point] = {(e.x, e.y) for e in engine.entities
+                             if e.blocks_movement and not e.ai and e is not engine.player}
+    targets = [(e.x, e.y) for e in engine.entities
+               if (e.blocks_movement and e.interactive) or isinstance(e.ai, BossExpertAI)]
+    return analyze_floor(engine.game_map, (engine.player.x, engine.player.y), stairs, targets, obstacles)
+
+def nearest_reachable(analysis: FloorAnalysis, point: Point) -> Optional[Point]:
+    """The reachable floor tile closest to `point` (Manhattan distance)."""
+    stride = analysis.stride
+    px, py = point
+    reached = [i for i, (walkable, unreached) in enumerate(zip(analysis.grid, analysis.unreached))
+               if walkable and not unreached]
+    best = min(reached, default=None, key=lambda i: abs(i // stride - 1 - px) + abs(i % stride - 1 - py))
+    if best is None:
+        return None
+    return best // stride - 1, best % stride - 1
@@ -3,6 +3,7 @@ from enum import Enum, auto
 SCREEN_WIDTH = 800
 SCREEN_HEIGHT = 600
 TILE_SIZE = 32
+FOV_RADIUS = 8
 
 COLORS = {
     "black": (0, 0, 0),
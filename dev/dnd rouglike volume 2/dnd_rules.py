@@ -6,7 +6,31 @@ def roll_dice(number_of_dice: int, sides: int) -> int:
 def get_modifier(stat: int) -> int:
     return (stat - 10) // 2
 
+class CacheCounters:
+    """How often a cache answered from memory and how often it had to recompute."""
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.recomputes = 0
+
+    def reset(self):
+        self.hits = self.recomputes = 0
+
+    def summary(self) -> dict:
+        total = self.hits + self.recomputes
+        return {"hits": self.hits, "recomputes": self.recomputes,
+                "hit_rate": self.hits / total if total else 0.0}
+
+MODIFIER_CACHE = CacheCounters("ability modifiers")
+
+ABILITIES = ("strength", "dexterity", "constitution", "intelligence", "wisdom", "charisma")
+
 class Stats:
+    # Class-level defaults so stats from older saves have them too
+    version = 0 # Bumped whenever an ability score changes
+    _mods = None
+
+
     def __init__(self, strength: int, dexterity: int, constitution: int, 
                  intelligence: int, wisdom: int, charisma: int):
         self.strength = strength
@@ -16,15 +40,32 @@ class Stats:
         self.wisdom = wisdom
         self.charisma = charisma
 
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in ABILITIES:
+            object.__setattr__(self, "_mods", None)
+            object.__setattr__(self, "version", self.version + 1)
+
+    def modifier(self, index: int) -> int:
+        """The modifier for ABILITIES[index]; all six are computed together and cached."""
+        mods = self._mods
+        if mods is None:
+            MODIFIER_CACHE.recomputes += 1
+            mods = tuple(get_modifier(getattr(self, ability)) for ability in ABILITIES)
+            object.__setattr__(self, "_mods", mods)
+        else:
+            MODIFIER_CACHE.hits += 1
+        return mods[index]
+
     @property
-    def str_mod(self): return get_modifier(self.strength)
+    def str_mod(self): return self.modifier(0)
     @property
-    def dex_mod(self): return get_modifier(self.dexterity)
+    def dex_mod(self): return self.modifier(1)
     @property
-    def con_mod(self): return get_modifier(self.constitution)
+    def con_mod(self): return self.modifier(2)
     @property
-    def int_mod(self): return get_modifier(self.intelligence)
+    def int_mod(self): return self.modifier(3)
     @property
-    def wis_mod(self): return get_modifier(self.wisdom)
+    def wis_mod(self): return self.modifier(4)
     @property
-    def cha_mod(self): return get_modifier(self.charisma)
+    def cha_mod(self): return self.modifier(5)
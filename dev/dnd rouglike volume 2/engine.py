@@ -1,3 +1,5 @@
+import time
+LAUNCHED = time.perf_counter() # Launch-to-menu time is measured from here
 import pygame
 import sys
 import traceback
@@ -9,36 +11,75 @@ def exception_handler(extype, value, tb):
 
 sys.excepthook = exception_handler
 
+# Benchmarks and batch tools switch this off to keep debug_log.txt quiet.
+LOGGING_ENABLED = True
+
 def log(msg):
+    if not LOGGING_ENABLED:
+        return
     with open("debug_log.txt", "a") as f:
         f.write(f"{pygame.time.get_ticks()}: {msg}\n")
         f.flush()
     print(msg)
     sys.stdout.flush()
 import random
-from typing import List, Tuple, Optional
-from constants import SCREEN_WIDTH, SCREEN_HEIGHT, TILE_SIZE, COLORS, GameState
+from typing import Callable, List, Set, Tuple, Optional
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, TILE_SIZE, FOV_RADIUS, COLORS, GameState
 
 from entity import Entity, Fighter
 from inventory import Inventory
 from dnd_rules import roll_dice
 from map_tiles import GameMap
-from procgen import generate_dungeon
 from chr_classes import FighterClass, WizardClass, RogueClass
 from save_manager import SaveManager
-from ai_behaviors import HostileMelee, HostileRanged, HostileCaster
 from sound_manager import SoundManager
+from glyph_atlas import GlyphAtlas
+from assets import AssetManager, find_font, open_font, load_sounds, load_music, import_modules
+from leveling import check_level_up, get_xp_for_level
+from message_log import MessageLog
+from events import EventBus, GameEvent, MessageEvent, DamageEvent, HealEvent, DeathEvent, XPGainedEvent
+from run_stats import RunStatistics
+from floor_cache import FloorCache
+from state_hash import StateHash, TrackedEntities
+from spatial_index import SpatialIndex
+from targeting import Targeting
+from status_effects import EffectWheel
+from fov import compute_fov
+from pathfinding import explore_step, travel_step
+
+# Safety net for travel and auto-explore; no floor needs this many steps
+MAX_TRAVEL_TURNS = 1000
 
 class Engine:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("D&D Roguelike")
+    def __init__(self, headless: bool = False, record_replays: Optional[bool] = None):
+        # Headless engines (benchmarks, simulations) render to an offscreen
+        # surface and never open a window or touch the mixer.
+        self.headless = headless
+        # New runs are recorded for replay.py; by default only with a window
+        self.record_replays = not headless if record_replays is None else record_replays
+        if headless:
+            pygame.font.init()
+            self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        else:
+            pygame.init()
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("D&D Roguelike")
         self.clock = pygame.time.Clock()
         self.running = True
+        self.frame = 0
         self.screen_shake = 0
-        self.font = pygame.font.SysFont("Arial", 20)
-        self.title_font = pygame.font.SysFont("Arial", 40)
+        # Cosmetic randomness has its own generator so rendering never
+        # changes the game's dice rolls (replays depend on that)
+        self.fx_rng = random.Random()
+        # Fonts, sounds and music load in the background behind the menu
+        self.assets = AssetManager(workers=0 if headless else 2)
+        # Text is drawn from glyph atlases cached on disk; pygame's built-in
+        # font draws anything they lack until Arial has been found
+        self.font = GlyphAtlas("Arial", 20)
+        self.title_font = GlyphAtlas("Arial", 40)
+        self.assets.submit("glyphs", lambda: [atlas.load() for atlas in (self.font, self.title_font)])
+        self.assets.submit("font", lambda: find_font("Arial"))
+        self.assets.on_ready("font", self.set_fonts)
         
         self.state = GameState.MAIN_MENU
         self.menu_index = 0
@@ -47,20 +88,75 @@ class Engine:
         from input_handlers import EventHandler
         self.event_handler = EventHandler(self)
         
-        log("Initializing SoundManager...")
-        # Initialize Sound
-        SoundManager().init_sounds()
-        log("SoundManager initialized.")
+        # Game events: the log, run statistics and (with a window) sounds and VFX
+        self.events = EventBus()
+        self.events.subscribe(GameEvent, self.log_event)
+        self.statistics = RunStatistics()
+        self.statistics.subscribe(self.events, lambda: self.player)
+        
+        if not headless:
+            self.events.subscribe(DamageEvent, self.on_damage)
+            self.events.subscribe(HealEvent, self.on_heal)
+            self.assets.submit("sounds", load_sounds)
+            self.assets.submit("music", load_music, after=("sounds",))
+            SoundManager.subscribe(self.events)
+        # Floor generation (and numpy) isn't needed until a game starts
+        self.assets.submit("gameplay modules", import_modules)
+        if not headless:
+            for name in self.assets.names:
+                self.assets.on_ready(name, lambda _, name=name: log(f"Loaded {name} after {self.assets.timings[name]:.0f} ms"))
+        self.assets.poll() # Headless engines have everything already
         
         # Game Data (initialized on start)
-        self.message_log: List[str] = []
+        self.message_log = MessageLog()
+        # Hash of the floor and everything on it, for replays, saves and sync checks
+        self.state_hash = StateHash()
+        self.spatial_index = SpatialIndex() # Entities by tile, kept current through the hash
+        self.state_hash.index = self.spatial_index
+        self.targeting = Targeting(self)
+        self.turn = 0 # Player turns taken this run
+        self.effects = EffectWheel() # Status effect expiry, driven by `turn`
         self.dungeon_level = 0
         self.player: Optional[Entity] = None
         self.entities: List[Entity] = []
         self.game_map: Optional[GameMap] = None
+        self.floor_cache = FloorCache() # Floors the player has left
+        self.visible: Set[Tuple[int, int]] = set() # Tiles the player can see
         self.vfx = [] # List of dicts: {'text': str, 'x': float, 'y': float, 'color': tuple, 'timer': int}
         self.active_shop = None # Stores Merchant component
 
+    @property
+    def entities(self) -> List[Entity]:
+        return self._entities
+
+    @entities.setter
+    def entities(self, entities: List[Entity]):
+        self._entities = TrackedEntities(self.state_hash, entities)
+
+    @property
+    def game_map(self) -> Optional[GameMap]:
+        return self._game_map
+
+    @game_map.setter
+    def game_map(self, game_map: Optional[GameMap]):
+        self._game_map = game_map
+        self.state_hash.game_map = game_map
+
+    def set_fonts(self, path: Optional[str]):
+        fonts = [open_font(path, 20), open_font(path, 40)]
+        # Once the atlases have been read: glyphs they lack come from Arial, and
+        # atlases that weren't cached are built from it for next time
+        self.assets.on_ready("glyphs", lambda loaded: self.set_glyph_fonts(fonts, loaded, path is not None))
+
+    def set_glyph_fonts(self, fonts: List[pygame.font.Font], loaded: List[bool], found: bool = True):
+        for atlas, font, cached in zip((self.font, self.title_font), fonts, loaded):
+            if cached:
+                atlas.fallback = font
+            else:
+                atlas.build(font)
+                if found: # Not pygame's built-in font standing in for a missing Arial
+                    atlas.save()
+
     def add_vfx(self, text: str, x: int, y: int, color: tuple):
         """Adds a floating text effect at tile coordinates."""
         # Convert tile coords to screen pixels (center of tile)
@@ -72,11 +168,61 @@ class Engine:
             'timer': 40 # frames
         })
 
-    def start_game(self, selected_class):
+    def log_event(self, event: GameEvent):
+        if event.loggable:
+            self.message_log.add(event)
+
+    def on_damage(self, event: DamageEvent):
+        self.add_vfx(str(event.amount), event.target.x, event.target.y, (255, 0, 0))
+        if event.target is self.player:
+            self.screen_shake = 8
+
+    def on_heal(self, event: HealEvent):
+        self.add_vfx(f"+{event.amount}", event.entity.x, event.entity.y, (0, 255, 0))
+
+    def start_game(self, selected_class, seed: Optional[int] = None):
         log(f"Starting game with class: {selected_class.name}")
+        # The whole run follows from this seed and the player's input
+        self.run_seed = seed if seed is not None else random.randrange(2 ** 32)
+        random.seed(self.run_seed)
+        if self.record_replays:
+            self.event_handler.start_recording(self.run_seed, selected_class.name)
         self.state = GameState.PLAYING
-        self.message_log = ["Welcome to the Dungeon!"]
+        self.message_log = MessageLog()
+        self.message_log.add("Welcome to the Dungeon!")
+        self.statistics.reset()
+        self.turn = 0
+        self.effects.reset()
+        self.floor_cache.start_run()
         self.dungeon_level = 1
+        self.create_player(selected_class)
+        log("Calling new_floor()...")
+        self.new_floor()
+        log("Back from new_floor().")
+        if not self.headless:
+            # Starts once the music file is open, which is usually already
+            self.assets.on_ready("music", self.play_music)
+            
+        log("Saving game...")
+        # Save on start
+        try:
+            SaveManager.save_game(self)
+            log("Initial save complete.")
+        except Exception as e:
+            log(f"Initial save FAILED: {e}")
+            
+        log("Game started successfully!")
+
+    def play_music(self, filename: Optional[str]):
+        if filename is None:
+            return
+        try:
+            SoundManager.play_music(filename)
+            log("Music play called.")
+        except Exception as e:
+            log(f"Music play FAILED: {e}")
+
+    def create_player(self, selected_class):
         self.player_class = selected_class
         p_stats = self.player_class.base_stats
         
@@ -91,25 +237,7 @@ class Engine:
             fighter=Fighter(None, hp=starting_hp, ac=10 + p_stats.dex_mod, stats=p_stats, chr_class=self.player_class, lives=3),
             inventory=Inventory(capacity=10)
         )
-        log("Calling new_floor()...")
-        self.new_floor()
-        log("Back from new_floor(). Loading music...")
-        # Start music if available
-        try:
-            SoundManager.play_music("assets/sounds/ambient.mp3")
-            log("Music play called.")
-        except Exception as e:
-            log(f"Music play FAILED: {e}")
-            
-        log("Saving game...")
-        # Save on start
-        try:
-            SaveManager.save_game(self)
-            log("Initial save complete.")
-        except Exception as e:
-            log(f"Initial save FAILED: {e}")
-            
-        log("Game started successfully!")
+        return self.player
 
     def load_game(self):
         save_data = SaveManager.load_game()
@@ -118,14 +246,34 @@ class Engine:
             self.entities = save_data["entities"]
             self.game_map = save_data["game_map"]
             self.message_log = save_data["message_log"]
+            if isinstance(self.message_log, list): # Saves from before MessageLog
+                self.message_log = MessageLog.from_lines(self.message_log)
             self.dungeon_level = save_data["dungeon_level"]
             self.player_class = save_data["player_class"]
+            self.statistics.restore(save_data.get("statistics", {}))
+            self.turn = save_data.get("turn", 0)
+            self.effects.reset(self.turn)
+            self.effects.track(self.entities)
+            saved_hash = save_data.get("state_hash")
+            if saved_hash is not None and saved_hash != self.state_hash.value:
+                log(f"State hash mismatch after loading: saved {saved_hash:016x}, "
+                    f"loaded {self.state_hash.value:016x}")
+            self.recompute_fov()
+            # Saves from before persistent floors regenerate the floors above
+            self.floor_cache = save_data.get("floor_cache") or FloorCache()
             self.state = GameState.PLAYING
             self.add_message("Game Loaded!")
             return True
         return False
 
-    def new_floor(self):
+    def change_floor(self, delta: int):
+        """Takes the stairs: +1 goes down, -1 goes back up."""
+        self.floor_cache.store(self.dungeon_level, self.game_map,
+                               [e for e in self.entities if e is not self.player])
+        self.dungeon_level += delta
+        self.new_floor(ascending=delta < 0)
+
+    def new_floor(self, ascending: bool = False):
         log(f"Entering new_floor() - Level {self.dungeon_level}")
         
         # Victory Condition
@@ -133,44 +281,62 @@ class Engine:
             self.state = GameState.VICTORY
             return
 
-        # Keep only player
-        self.entities = [self.player]
-        
-        # Scale dungeon size and complexity
-        width = min(45, 25 + (self.dungeon_level - 1) * 2)
-        height = min(35, 18 + (self.dungeon_level - 1))
-        rooms = min(25, 10 + (self.dungeon_level - 1))
-
-        log(f"Generating dungeon floor (size {width}x{height}, rooms {rooms})...")
-        self.game_map = generate_dungeon(
-            map_width=width, 
-            map_height=height, 
-            max_rooms=rooms, 
-            room_min_size=4, 
-            room_max_size=8, 
-            engine=self
-        )
-        log("Dungeon floor generated.")
-        self.add_message("You descend deeper into the dungeon...")
+        cached = self.floor_cache.load(self.dungeon_level)
+        if cached:
+            # A floor we've been on: exactly as it was left, arriving on the matching stairs
+            self.game_map, entities = cached
+            self.entities = [self.player] + entities
+            self.effects.track(entities)
+            arrival = next((e for e in entities if (e.stairs if ascending else e.up_stairs)), None)
+            if arrival:
+                self.player.x, self.player.y = arrival.x, arrival.y
+            self.recompute_fov()
+            log(f"Restored dungeon floor {self.dungeon_level}.")
+            self.add_message("You climb back up..." if ascending else "You descend deeper into the dungeon...")
+        else:
+            # Size and layout scale with depth (see generators.choose_generator)
+            log(f"Generating dungeon floor {self.dungeon_level}...")
+            from generators import generate_floor # Usually already imported behind the menu
+            self.game_map = generate_floor(self)
+            self.recompute_fov()
+            log("Dungeon floor generated.")
+            self.add_message("You descend deeper into the dungeon...")
         SoundManager.play_sound("stairs")
         log("Auto-saving...")
         # Auto-save on floor transition
         SaveManager.save_game(self)
         log("new_floor() complete.")
 
-    def add_message(self, text: str):
-        self.message_log.append(text)
-        if len(self.message_log) > 5:
-            self.message_log.pop(0)
+    def add_message(self, message) -> GameEvent:
+        """Publishes an event (plain strings become MessageEvents) and returns it."""
+        if isinstance(message, str):
+            message = MessageEvent(message)
+        return self.events.publish(message)
+
+    def handle_kills(self, killer: Entity, victims: List[Entity], with_gold: bool = False):
+        """Awards XP (and gold for melee kills) and removes the dead in one pass."""
+        for victim in victims:
+            xp_gain = getattr(victim.fighter, 'xp_value', 50)
+            killer.fighter.xp += xp_gain
+            gold_gain = 0
+            if with_gold:
+                gold_gain = roll_dice(1, 10) * self.dungeon_level
+                killer.fighter.gold += gold_gain
+            self.add_message(DeathEvent(victim, killer))
+            self.add_message(XPGainedEvent(killer, xp_gain, gold_gain))
+        self.entities.remove_all(victims)
+        check_level_up(killer, self)
 
     def handle_events(self):
         self.event_handler.handle_events()
 
     def player_turn(self, dx: int, dy: int):
         # Slow Logic: chance to stumble and lose action
-        if "Slow" in self.player.fighter.status_effects and random.random() < 0.5:
+        modifiers = self.player.fighter.modifiers
+        if modifiers.stumble_chance and random.random() < modifiers.stumble_chance:
             self.add_message("You are slowed and stumble!")
-            self.player.fighter.tick_effects() # Still count down effects
+            self.turn += 1
+            self.effects.advance(self.turn) # Still count down effects
             self.monster_turn()
             return
 
@@ -178,21 +344,10 @@ class Engine:
         
         target = next((e for e in self.entities if e.x == new_x and e.y == new_y and e.fighter), None)
         if target:
-            msg = self.player.fighter.attack(target, self)
-            self.add_message(msg)
+            self.player.fighter.attack(target, self)
             if target.fighter.hp <= 0:
-                xp_gain = getattr(target.fighter, 'xp_value', 50)
-                self.player.fighter.xp += xp_gain
-                
-                # New: Gold Drop
-                gold_gain = roll_dice(1, 10) * self.dungeon_level
-                self.player.fighter.gold += gold_gain
-                self.add_message(f"{target.name} dies! You gain {xp_gain} XP and {gold_gain} GP.")
-                self.entities.remove(target)
-                
-                from leveling import check_level_up
-                if check_level_up(self.player):
-                    self.add_message(f"You leveled up to Level {self.player.fighter.level}!")
+                # Melee kills also drop gold
+                self.handle_kills(self.player, [target], with_gold=True)
         else:
             # Check for interactive objects (barrels, chests)
             interact_target = next((e for e in self.entities if e.x == new_x and e.y == new_y and e.interactive and not e.interactive.is_broken), None)
@@ -201,12 +356,12 @@ class Engine:
                 self.add_message(msg)
             elif self.game_map.is_walkable(new_x, new_y):
                 self.player.move(dx, dy)
+                self.recompute_fov()
                 
                 # Check for Traps
                 hazard_target = next((e for e in self.entities if e.x == self.player.x and e.y == self.player.y and e.hazard), None)
                 if hazard_target:
-                    msg = hazard_target.hazard.trigger(self, self.player)
-                    self.add_message(msg)
+                    hazard_target.hazard.trigger(self, self.player)
                     hazard_target.hazard.is_revealed = True
                     hazard_target.color = (255, 0, 0) # Reveal as red
 
@@ -218,8 +373,10 @@ class Engine:
                     self.add_vfx(f"+{gold_entity.gold_value} GP", self.player.x, self.player.y, COLORS["gold"])
                     self.entities.remove(gold_entity)
 
+        self.turn += 1
+
         # Tick effects and cooldowns
-        self.player.fighter.tick_effects()
+        self.effects.advance(self.turn)
         for ability in self.player_class.starting_abilities:
             if ability.current_cooldown > 0:
                 ability.current_cooldown -= 1
@@ -230,15 +387,81 @@ class Engine:
         else:
             # Monsters take their turn if player is alive
             # Haste Logic: skip monster turn if player is hasted (50% chance for extra turn)
-            if "Haste" in self.player.fighter.status_effects and random.random() < 0.5:
+            extra_turn_chance = self.player.fighter.modifiers.extra_turn_chance
+            if extra_turn_chance and random.random() < extra_turn_chance:
                 self.add_message("Haste grants you an extra action!")
             else:
                 self.monster_turn()
 
+    def recompute_fov(self):
+        self.visible = compute_fov(self.game_map, self.player.x, self.player.y, FOV_RADIUS)
+        self.game_map.mark_explored(self.visible)
+
+    def visible_monsters(self) -> List[Entity]:
+        return [e for e in self.entities if e.ai and (e.x, e.y) in self.visible]
+
+    def travel(self, next_step: Callable[['Engine'], Optional[Tuple[int, int]]]) -> str:
+        """Takes turns back to back, without rendering, while `next_step` gives a direction.
+
+        Stops as soon as something needs the player's attention and returns
+        why: "done" (no more steps), "monster" (one came into view), "trap"
+        (one was revealed), "hurt" (HP dropped), "state" (the player died or
+        left play) or "limit" (MAX_TRAVEL_TURNS turns).
+        """
+        fighter = self.player.fighter
+        for _ in range(MAX_TRAVEL_TURNS):
+            step = next_step(self)
+            if step is None:
+                return "done"
+            hp, lives = fighter.hp, fighter.lives
+            revealed = sum(1 for e in self.entities if e.hazard and e.hazard.is_revealed)
+            self.player_turn(*step)
+            if self.state != GameState.PLAYING:
+                return "state"
+            if fighter.hp < hp or fighter.lives < lives:
+                return "hurt"
+            if sum(1 for e in self.entities if e.hazard and e.hazard.is_revealed) > revealed:
+                return "trap"
+            if self.visible_monsters():
+                return "monster"
+        return "limit"
+
+    def auto_explore(self):
+        """Walks to the nearest unexplored tile, over and over, until interrupted."""
+        if self.visible_monsters():
+            self.add_message("Not with enemies in view!")
+            return
+        reason = self.travel(explore_step)
+        if reason == "done":
+            self.add_message("There is nothing left to explore here.")
+        elif reason == "monster":
+            self.add_message(f"You spot a {self.visible_monsters()[0].name}.")
+
+    def travel_to(self, x: int, y: int):
+        """Walks to (x, y) by the shortest route, stopping early like `auto_explore`."""
+        if not (0 <= x < self.game_map.width and 0 <= y < self.game_map.height) \
+                or not self.game_map.is_explored(x, y) or not self.game_map.is_walkable(x, y):
+            self.add_message("You don't know a way there.")
+            return
+        if self.visible_monsters():
+            self.add_message("Not with enemies in view!")
+            return
+        reason = self.travel(lambda engine: travel_step(engine, (x, y)))
+        if reason == "done" and (self.player.x, self.player.y) != (x, y):
+            self.add_message("You don't know a way there.")
+        elif reason == "monster":
+            self.add_message(f"You spot a {self.visible_monsters()[0].name}.")
+
     def monster_turn(self):
         for entity in self.entities:
             if entity.ai and entity.fighter and entity.fighter.hp > 0:
+                modifiers = entity.fighter.modifiers
+                if modifiers.stumble_chance and random.random() < modifiers.stumble_chance:
+                    continue # Slowed monsters lose turns too
                 entity.ai.perform(self, entity)
+                if (modifiers.extra_turn_chance and self.player.fighter.hp > 0
+                        and random.random() < modifiers.extra_turn_chance):
+                    entity.ai.perform(self, entity) # Hasted monsters may act twice
                 
                 # Check if player died during monster turns
                 if self.check_player_death():
@@ -247,7 +470,6 @@ class Engine:
     def check_player_death(self) -> bool:
         """Returns True if the player is permanently dead (GameOver)."""
         if self.player.fighter.hp <= 0:
-            from sound_manager import SoundManager
             if self.player.fighter.lives > 1:
                 self.player.fighter.lives -= 1
                 self.player.fighter.hp = self.player.fighter.max_hp
@@ -263,6 +485,8 @@ class Engine:
         return False
 
     def update(self):
+        self.frame += 1
+        self.assets.poll()
         if self.screen_shake > 0:
             self.screen_shake -= 1
             
@@ -273,6 +497,9 @@ class Engine:
             if effect['timer'] <= 0:
                 self.vfx.remove(effect)
 
+        # Sounds requested this frame play once each
+        SoundManager.flush()
+
     def render_bar(self, x, y, width, current, maximum, color):
         """Draws a progress bar (HP or XP)."""
         bar_height = 15
@@ -301,15 +528,15 @@ class Engine:
             self.render_victory()
         elif self.state == GameState.INVENTORY_MENU:
             self.render_game()
-            self.render_inventory("INVENTORY (Use/Drop)", self.player.inventory.items)
+            self.render_inventory("INVENTORY (Use/Drop)", self.player.inventory.view("all"))
         elif self.state == GameState.EQUIP_MENU:
             self.render_game()
-            equippables = [item for item in self.player.inventory.items if getattr(item, 'owner', None) and item.owner.equippable]
-            self.render_inventory("EQUIPMENT (Toggle Equip)", equippables)
+            self.render_inventory("EQUIPMENT (Toggle Equip)", self.player.inventory.view("equippable"))
         elif self.state == GameState.SHOP_MENU:
             self.render_shop()
 
-        pygame.display.flip()
+        if not self.headless:
+            pygame.display.flip()
 
     def render_shop(self):
         self.screen.fill(COLORS["black"])
@@ -332,7 +559,7 @@ class Engine:
         help_text = self.font.render("[ENTER] Buy | [ESC] Leave", True, COLORS["gray"])
         self.screen.blit(help_text, (SCREEN_WIDTH // 2 - help_text.get_width() // 2, SCREEN_HEIGHT - 50))
 
-    def render_inventory(self, title, items):
+    def render_inventory(self, title, stacks):
         # Dim background
         overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 180))
@@ -347,13 +574,16 @@ class Engine:
         title_surf = self.title_font.render(title, True, COLORS["gold"])
         self.screen.blit(title_surf, (SCREEN_WIDTH // 2 - title_surf.get_width() // 2, 70))
 
-        if not items:
+        if not stacks:
             none_surf = self.font.render("No items.", True, (150, 150, 150))
             self.screen.blit(none_surf, (SCREEN_WIDTH // 2 - none_surf.get_width() // 2, 150))
         else:
-            for i, item in enumerate(items):
+            for i, stack in enumerate(stacks):
+                item = stack.top
                 color = COLORS["gold"] if i == self.menu_index else COLORS["white"]
                 name = item.name if item.is_identified else "Unknown item"
+                if stack.count > 1:
+                    name += f" x{stack.count}"
                 
                 # Show if equipped
                 if self.player.fighter.weapon == item.owner or self.player.fighter.armor == item.owner:
@@ -383,6 +613,11 @@ class Engine:
             opt_surf = self.font.render(f"{'> ' if i == self.menu_index else ''}{option}", True, color)
             self.screen.blit(opt_surf, (SCREEN_WIDTH // 2 - opt_surf.get_width() // 2, 250 + (i * 35)))
 
+        loaded, total = self.assets.progress
+        if loaded < total:
+            loading_surf = self.font.render(f"Loading assets... {loaded}/{total}", True, COLORS["gray"])
+            self.screen.blit(loading_surf, (SCREEN_WIDTH // 2 - loading_surf.get_width() // 2, SCREEN_HEIGHT - 40))
+
     def render_class_select(self):
         title_surf = self.title_font.render("CHOOSE YOUR CLASS", True, COLORS["gold"])
         self.screen.blit(title_surf, (SCREEN_WIDTH // 2 - title_surf.get_width() // 2, 100))
@@ -436,8 +671,8 @@ class Engine:
 
     def render_game(self):
         # Apply screen shake offset
-        offset_x = random.randint(-self.screen_shake, self.screen_shake) if self.screen_shake > 0 else 0
-        offset_y = random.randint(-self.screen_shake, self.screen_shake) if self.screen_shake > 0 else 0
+        offset_x = self.fx_rng.randint(-self.screen_shake, self.screen_shake) if self.screen_shake > 0 else 0
+        offset_y = self.fx_rng.randint(-self.screen_shake, self.screen_shake) if self.screen_shake > 0 else 0
 
         # Original render logic moved here
         for x in range(self.game_map.width):
@@ -452,8 +687,12 @@ class Engine:
             # Only draw hazards if revealed
             if entity.hazard and not entity.hazard.is_revealed:
                 continue
+            if entity is self.player:
+                continue # Drawn last, so it stays visible on stairs
             text_surface = self.font.render(entity.char, True, entity.color)
             self.screen.blit(text_surface, (entity.x * TILE_SIZE + 8 + offset_x, entity.y * TILE_SIZE + 4 + offset_y))
+        player_surface = self.font.render(self.player.char, True, self.player.color)
+        self.screen.blit(player_surface, (self.player.x * TILE_SIZE + 8 + offset_x, self.player.y * TILE_SIZE + 4 + offset_y))
 
         # HUD - Bars
         f = self.player.fighter
@@ -466,7 +705,6 @@ class Engine:
         self.screen.blit(hp_text, (220, hud_y))
 
         # XP Bar
-        from leveling import get_xp_for_level
         current_lvl_xp = get_xp_for_level(f.level)
         next_lvl_xp = get_xp_for_level(f.level + 1)
         xp_needed = next_lvl_xp - current_lvl_xp
@@ -494,8 +732,7 @@ class Engine:
         self.screen.blit(active_surf, (SCREEN_WIDTH - 250, hud_y + 25))
 
         # Message Log
-        for i, msg in enumerate(self.message_log[-5:]): # Only show last 5 messages
-            msg_surface = self.font.render(msg, True, COLORS["white"])
+        for i, msg_surface in enumerate(self.message_log.render(self.font, COLORS["white"])):
             self.screen.blit(msg_surface, (10, SCREEN_HEIGHT - 130 + (i * 20)))
 
         # Draw VFX
@@ -509,7 +746,13 @@ class Engine:
             self.handle_events()
             self.update()
             self.render()
+            if self.frame == 1:
+                self.launch_to_menu_ms = (time.perf_counter() - LAUNCHED) * 1000
+                log(f"Menu ready {self.launch_to_menu_ms:.0f} ms after launch")
             self.clock.tick(60)
+        log(f"Sounds: {SoundManager.counters.summary()}")
+        self.assets.shutdown()
+        SoundManager.shutdown()
         pygame.quit()
         sys.exit()
 
@@ -10,10 +10,80 @@ class Component:
     def __init__(self, owner: 'Entity'):
         self.owner = owner
 
-from dnd_rules import Stats, roll_dice
+class StatusEffects(dict):
+    """Name -> turn the effect expires on (see status_effects.EffectWheel).
+
+    Changes are reported to the owner's state hash and clear the fighter's
+    cached modifiers.
+    """
+    def __init__(self, fighter: 'Fighter', durations: Optional[dict] = None):
+        super().__init__()
+        self.fighter = fighter
+        # Remaining turns from saves before the wheel; filed when the floor is tracked
+        self.pending_durations = dict(durations or {})
+
+    def _changed(self):
+        self.fighter._modifiers = None
+        if self.fighter.owner:
+            self.fighter.owner.mark_changed()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._changed()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._changed()
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._changed()
+        return result
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def __reduce__(self):
+        return (restore_status_effects, (self.fighter, dict(self)))
+
+def restore_status_effects(fighter: 'Fighter', expiries: dict) -> StatusEffects:
+    effects = StatusEffects(fighter)
+    dict.update(effects, expiries)
+    return effects
+
+from dnd_rules import Stats, roll_dice, CacheCounters
 from chr_classes import BaseClass
+from events import AttackEvent, DamageEvent
+from status_effects import EffectModifiers
+
+DERIVED_STAT_CACHE = CacheCounters("derived combat stats")
+
+# Fighter attributes the derived stats depend on; setting one clears them
+DERIVED_INPUTS = frozenset(("base_ac", "base_damage_dice", "weapon", "armor", "stats", "level", "_modifiers"))
+
+class DerivedStats:
+    """A fighter's combat numbers, worked out once from equipment, stats and effects."""
+    def __init__(self, fighter: 'Fighter'):
+        modifiers = fighter.modifiers
+        stats = fighter.stats
+        self.stats_version = stats.version
+        self.ac = fighter.base_ac + modifiers.ac
+        if fighter.armor and fighter.armor.equippable:
+            self.ac += fighter.armor.equippable.ac_bonus
+        if fighter.weapon and fighter.weapon.equippable:
+            self.damage_dice = fighter.weapon.equippable.damage_dice
+        else:
+            self.damage_dice = fighter.base_damage_dice
+        num, sides = map(int, self.damage_dice.split('d'))
+        self.damage_roll = (num, sides)
+        self.to_hit = stats.str_mod + modifiers.to_hit
+        self.damage_bonus = stats.str_mod + modifiers.damage
 
 class Fighter(Component):
+    _modifiers: Optional[EffectModifiers] = None
+    _derived: Optional[DerivedStats] = None
+
     def __init__(self, owner: 'Entity', hp: int, ac: int, stats: Stats, 
                  chr_class: Optional['BaseClass'] = None, lives: int = 1):
         super().__init__(owner)
@@ -31,73 +101,92 @@ class Fighter(Component):
         self.weapon: Optional['Entity'] = None
         self.armor: Optional['Entity'] = None
         self.scroll: Optional['Entity'] = None
-        self.status_effects = {} # Name: Duration
+        self.status_effects = StatusEffects(self) # Name: expiry turn
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name == "hp" and self.owner:
+            self.owner.mark_changed()
+        elif name in DERIVED_INPUTS:
+            self.__dict__["_derived"] = None
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        # Caches are rebuilt on first use
+        state.pop("_modifiers", None)
+        state.pop("_derived", None)
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        if type(self.status_effects) is dict: # Saves from before state hashing
+            self.__dict__["status_effects"] = StatusEffects(self, self.status_effects)
+
+    @property
+    def modifiers(self) -> EffectModifiers:
+        """The status effects' combined modifiers, rebuilt only when the effects change."""
+        if self._modifiers is None:
+            self._modifiers = EffectModifiers(self.status_effects)
+        return self._modifiers
+
+    @property
+    def derived(self) -> DerivedStats:
+        """AC, to-hit and damage, cached until equipment, stats, level or effects change."""
+        derived = self._derived
+        if derived is not None and derived.stats_version == self.stats.version:
+            DERIVED_STAT_CACHE.hits += 1
+            return derived
+        DERIVED_STAT_CACHE.recomputes += 1
+        derived = DerivedStats(self)
+        self.__dict__["_derived"] = derived
+        return derived
 
     @property
     def ac(self) -> int:
-        bonus = 0
-        if self.armor and self.armor.equippable:
-            bonus += self.armor.equippable.ac_bonus
-        if "Rage" in self.status_effects:
-            bonus -= 2
-        return self.base_ac + bonus
+        return self.derived.ac
 
     @property
     def damage_dice(self) -> str:
-        if self.weapon and self.weapon.equippable:
-            return self.weapon.equippable.damage_dice
-        return self.base_damage_dice
-
-    def tick_effects(self):
-        to_remove = []
-        for effect in self.status_effects:
-            self.status_effects[effect] -= 1
-            if self.status_effects[effect] <= 0:
-                to_remove.append(effect)
-        for effect in to_remove:
-            del self.status_effects[effect]
+        return self.derived.damage_dice
 
     def take_damage(self, amount: int, engine: 'Engine' = None):
         self.hp -= amount
         if engine:
-            # Add floating damage number
-            self.owner.x, self.owner.y
-            engine.add_vfx(f"{amount}", self.owner.x, self.owner.y, (255, 0, 0))
-            
-            # Trigger screen shake if player is damaged
-            if self.owner.name == "Player":
-                engine.screen_shake = 8
+            # Damage numbers and screen shake subscribe to this
+            engine.events.publish(DamageEvent(self.owner, amount))
 
-    def attack(self, target: 'Entity', engine: 'Engine' = None) -> str:
-        from sound_manager import SoundManager
+    def attack(self, target: 'Entity', engine: 'Engine' = None) -> AttackEvent:
+        """Resolves one melee attack; the result is published when an engine is given."""
         # d20 + Str Mod vs AC
-        str_bonus = 2 if "Rage" in self.status_effects else 0
-        blind_penalty = -5 if "Blind" in self.status_effects else 0
+        modifiers = self.modifiers
+        derived = self.derived
+        # Effects like Sneak Attack are used up by this attack, hit or miss
+        for name in modifiers.consumed_by_attack:
+            del self.status_effects[name]
         roll = roll_dice(1, 20)
-        total_hit = roll + self.stats.str_mod + str_bonus + blind_penalty
+        total_hit = roll + derived.to_hit
         
         if roll == 20 or total_hit >= target.fighter.ac:
             # Hit!
-            SoundManager.play_sound("hit")
-            num, sides = map(int, self.damage_dice.split('d'))
-            damage = roll_dice(num, sides) + self.stats.str_mod + str_bonus
+            num, sides = derived.damage_roll
+            damage = roll_dice(num, sides) + derived.damage_bonus
             
-            if "SneakAttack" in self.status_effects:
-                damage *= 2
-                del self.status_effects["SneakAttack"]
-                msg_prefix = "[SNEAK ATTACK] "
-            else:
-                msg_prefix = ""
+            sneak_attack = modifiers.damage_multiplier > 1
+            damage *= modifiers.damage_multiplier
                 
             if roll == 20: damage *= 2 # Critical hit
             
+            event = AttackEvent(self.owner, target, hit=True, damage=damage,
+                                critical=roll == 20, sneak_attack=sneak_attack)
+            if engine:
+                engine.add_message(event)
             target.fighter.take_damage(damage, engine)
-            return f"{msg_prefix}{self.owner.name} hits {target.name} for {damage} damage!"
+            return event
         else:
-            SoundManager.play_sound("miss")
-            if "SneakAttack" in self.status_effects:
-                del self.status_effects["SneakAttack"]
-            return f"{self.owner.name} misses {target.name}."
+            event = AttackEvent(self.owner, target, hit=False)
+            if engine:
+                engine.add_message(event)
+            return event
 
 class Equippable(Component):
     def __init__(self, owner: 'Entity', slot: str, 
@@ -107,7 +196,15 @@ class Equippable(Component):
         self.damage_dice = damage_dice
         self.ac_bonus = ac_bonus
 
+# Entity attributes that feed the state hash (see state_hash.py)
+HASHED_ATTRIBUTES = frozenset(("x", "y", "name"))
+
 class Entity:
+    # Class-level default so entities from older saves have it too
+    up_stairs = False
+    # The StateHash tracking this entity, while it's on the current floor
+    _tracker = None
+
     def __init__(self, x: int, y: int, char: str, color: tuple, name: str, 
                  blocks_movement: bool = False,
                  fighter: Optional['Fighter'] = None,
@@ -117,7 +214,8 @@ class Entity:
                  hazard: Optional['Hazard'] = None,
                  interactive: Optional['Interactive'] = None,
                  ai: Optional['BaseAI'] = None,
-                 stairs: bool = False):
+                 stairs: bool = False,
+                 up_stairs: bool = False):
         self.x = x
         self.y = y
         self.char = char
@@ -154,6 +252,30 @@ class Entity:
             self.ai.owner = self
 
         self.stairs = stairs
+        self.up_stairs = up_stairs
+
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name in HASHED_ATTRIBUTES and self._tracker:
+            self._tracker.mark(self)
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.pop("_tracker", None) # Floors are tracked again when they become current
+        return state
+
+    def mark_changed(self):
+        if self._tracker:
+            self._tracker.mark(self)
+
+    def hash_features(self) -> tuple:
+        """What the state hash covers: position, HP, status effects and inventory."""
+        features = (self.name, self.x, self.y)
+        if self.fighter:
+            features += (self.fighter.hp, tuple(sorted(self.fighter.status_effects.items())))
+        if self.inventory:
+            features += tuple(item.prototype.id for item in self.inventory.items)
+        return features
 
     def move(self, dx: int, dy: int):
         self.x += dx
@@ -0,0 +1,255 @@
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Type, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from entity import Entity
+    from items import Item
+
+class GameEvent:
+    """Something that happened in the game.
+
+    Events carry the raw facts and are only turned into text by `format()`
+    when the message log actually draws them, so headless runs never pay for
+    string formatting. `success` replaces the old "look for a keyword in the
+    message" checks, and `loggable` events are the ones the message log shows.
+    """
+    success = True
+    loggable = True
+
+    def format(self) -> str:
+        raise NotImplementedError()
+
+    def key(self) -> tuple:
+        """Identity used to coalesce repeats in the message log."""
+        return (type(self),)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, GameEvent) and self.key() == other.key()
+
+    def __hash__(self) -> int:
+        return hash(self.key())
+
+    def __str__(self) -> str:
+        return self.format()
+
+class MessageEvent(GameEvent):
+    """Free-form text for outcomes that have no structured event."""
+    def __init__(self, text: str, success: bool = True):
+        self.text = text
+        self.success = success
+
+    def format(self) -> str:
+        return self.text
+
+    def key(self) -> tuple:
+        return (MessageEvent, self.text)
+
+class AttackEvent(GameEvent):
+    def __init__(self, attacker: 'Entity', target: 'Entity', hit: bool, damage: int = 0,
+                 critical: bool = False, sneak_attack: bool = False, ranged: bool = False):
+        self.attacker = attacker
+        self.target = target
+        self.hit = hit
+        self.damage = damage
+        self.critical = critical
+        self.sneak_attack = sneak_attack
+        self.ranged = ranged
+
+    def format(self) -> str:
+        if self.ranged:
+            if self.hit:
+                return f"{self.attacker.name} shoots {self.target.name} for {self.damage} damage!"
+            return f"{self.attacker.name} shoots and misses."
+        if self.hit:
+            prefix = "[SNEAK ATTACK] " if self.sneak_attack else ""
+            return f"{prefix}{self.attacker.name} hits {self.target.name} for {self.damage} damage!"
+        return f"{self.attacker.name} misses {self.target.name}."
+
+    def key(self) -> tuple:
+        return (AttackEvent, self.attacker.name, self.target.name, self.hit, self.damage,
+                self.sneak_attack, self.ranged)
+
+class DamageEvent(GameEvent):
+    """Raised by every `take_damage`; drives damage numbers and screen shake."""
+    loggable = False
+
+    def __init__(self, target: 'Entity', amount: int):
+        self.target = target
+        self.amount = amount
+
+    def format(self) -> str:
+        return f"{self.target.name} takes {self.amount} damage."
+
+    def key(self) -> tuple:
+        return (DamageEvent, self.target.name, self.amount)
+
+class SpellDamageEvent(GameEvent):
+    """A damaging spell or monster ability resolving against one or more targets."""
+    def __init__(self, caster: 'Entity', spell_name: str, targets: List['Entity'], damage: int,
+                 area: bool = False):
+        self.caster = caster
+        self.spell_name = spell_name
+        self.targets = targets
+        self.damage = damage
+        self.area = area
+
+    def format(self) -> str:
+        if self.area:
+            names = ", ".join(target.name for target in self.targets)
+            return f"The {self.spell_name} explodes! Hit: {names} for {self.damage} damage!"
+        target_name = self.targets[0].name if self.targets else "nothing"
+        return f"{self.caster.name} casts {self.spell_name} on {target_name} for {self.damage} damage!"
+
+    def key(self) -> tuple:
+        return (SpellDamageEvent, self.caster.name, self.spell_name,
+                tuple(target.name for target in self.targets), self.damage, self.area)
+
+class StatusAppliedEvent(GameEvent):
+    def __init__(self, caster: 'Entity', target: 'Entity', status: str, duration: int,
+                 source: Optional[str] = None):
+        self.caster = caster
+        self.target = target
+        self.status = status
+        self.duration = duration
+        self.source = source or status
+
+    def format(self) -> str:
+        return (f"{self.caster.name} casts {self.source} on {self.target.name}! "
+                f"{self.target.name} is now {self.status} for {self.duration} turns.")
+
+    def key(self) -> tuple:
+        return (StatusAppliedEvent, self.caster.name, self.target.name, self.status, self.duration)
+
+class DeathEvent(GameEvent):
+    def __init__(self, entity: 'Entity', killer: Optional['Entity'] = None):
+        self.entity = entity
+        self.killer = killer
+
+    def format(self) -> str:
+        return f"{self.entity.name} dies!"
+
+    def key(self) -> tuple:
+        return (DeathEvent, self.entity.name)
+
+class XPGainedEvent(GameEvent):
+    def __init__(self, entity: 'Entity', xp: int, gold: int = 0):
+        self.entity = entity
+        self.xp = xp
+        self.gold = gold
+
+    def format(self) -> str:
+        if self.gold:
+            return f"You gain {self.xp} XP and {self.gold} GP."
+        return f"You gain {self.xp} XP."
+
+    def key(self) -> tuple:
+        return (XPGainedEvent, self.xp, self.gold)
+
+class LevelUpEvent(GameEvent):
+    def __init__(self, entity: 'Entity', level: int):
+        self.entity = entity
+        self.level = level
+
+    def format(self) -> str:
+        return f"You leveled up to Level {self.level}!"
+
+    def key(self) -> tuple:
+        return (LevelUpEvent, self.level)
+
+class HealEvent(GameEvent):
+    def __init__(self, entity: 'Entity', amount: int):
+        self.entity = entity
+        self.amount = amount
+
+    def format(self) -> str:
+        return f"You use the potion and heal for {self.amount} HP!"
+
+    def key(self) -> tuple:
+        return (HealEvent, self.amount)
+
+class ItemUsedEvent(GameEvent):
+    """A scroll read or a wand zapped; `charges_left` is set for wands."""
+    def __init__(self, item: 'Item', user: 'Entity', verb: str = "use",
+                 charges_left: Optional[int] = None):
+        self.item = item
+        self.user = user
+        self.verb = verb
+        self.charges_left = charges_left
+
+    def format(self) -> str:
+        text = f"You {self.verb} the {self.item.name}."
+        if self.charges_left is not None:
+            text += f" ({self.charges_left} charges left)"
+        return text
+
+    def key(self) -> tuple:
+        return (ItemUsedEvent, self.item.name, self.verb, self.charges_left)
+
+class ItemIdentifiedEvent(GameEvent):
+    def __init__(self, item: 'Item'):
+        self.item = item
+
+    def format(self) -> str:
+        return f"(Identified as {self.item.name})"
+
+    def key(self) -> tuple:
+        return (ItemIdentifiedEvent, self.item.name)
+
+class ItemConsumedEvent(GameEvent):
+    """An item left the inventory by being used up. Only crumbling wands are announced."""
+    def __init__(self, item: 'Item', user: 'Entity', crumbled: bool = False):
+        self.item = item
+        self.user = user
+        self.crumbled = crumbled
+        self.loggable = crumbled
+
+    def format(self) -> str:
+        if self.crumbled:
+            return f"The {self.item.name} crumbles to dust!"
+        return f"The {self.item.name} is used up."
+
+    def key(self) -> tuple:
+        return (ItemConsumedEvent, self.item.name, self.crumbled)
+
+class TrapTriggeredEvent(GameEvent):
+    def __init__(self, entity: 'Entity', trap_name: str, damage: int):
+        self.entity = entity
+        self.trap_name = trap_name
+        self.damage = damage
+
+    def format(self) -> str:
+        return f"{self.entity.name} triggers a {self.trap_name.lower()} and takes {self.damage} damage!"
+
+    def key(self) -> tuple:
+        return (TrapTriggeredEvent, self.entity.name, self.trap_name, self.damage)
+
+Handler = Callable[[GameEvent], None]
+
+class EventBus:
+    """Synchronous publish/subscribe dispatch keyed by event class.
+
+    Subscribing to a base class (e.g. GameEvent) receives every subclass too.
+    The handler list per concrete event type is resolved once and cached.
+    """
+    def __init__(self):
+        self._handlers: Dict[Type[GameEvent], List[Handler]] = defaultdict(list)
+        self._resolved: Dict[Type[GameEvent], List[Handler]] = {}
+
+    def subscribe(self, event_type: Type[GameEvent], handler: Handler):
+        self._handlers[event_type].append(handler)
+        self._resolved.clear()
+
+    def unsubscribe(self, event_type: Type[GameEvent], handler: Handler):
+        if handler in self._handlers[event_type]:
+            self._handlers[event_type].remove(handler)
+            self._resolved.clear()
+
+    def publish(self, event: GameEvent) -> GameEvent:
+        event_type = type(event)
+        handlers = self._resolved.get(event_type)
+        if handlers is None:
+            handlers = [h for cls in event_type.__mro__ for h in self._handlers.get(cls, ())]
+            self._resolved[event_type] = handlers
+        for handler in handlers:
+            handler(event)
+        return event
@@ -0,0 +1,104 @@
+import os
+import pickle
+import shutil
+import time
+import zlib
+from collections import OrderedDict
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from entity import Entity
+    from map_tiles import GameMap
+
+Floor = Tuple['GameMap', List['Entity']]
+
+class FloorCache:
+    """Floors the player has left, so the stairs can lead back to them.
+
+    The `capacity` most recently left floors stay in memory as live objects;
+    every floor is also written, pickled and zlib-compressed, to a directory
+    for the current run, so older ones are read back from disk. Only floors
+    that changed since they were last written are written again.
+
+    Floors are stored without the player, and a floor handed out by `load`
+    leaves the cache until it is stored again: the current floor lives in
+    the engine, never here.
+    """
+    ROOT = "floor_cache"
+
+    def __init__(self, capacity: int = 3):
+        self.capacity = capacity
+        self.run_id = self.new_run_id()
+        self._memory: "OrderedDict[int, Floor]" = OrderedDict()
+        self._dirty = set()
+
+    @staticmethod
+    def new_run_id() -> str:
+        return f"{int(time.time())}-{os.getpid()}"
+
+    @property
+    def directory(self) -> str:
+        return os.path.join(self.ROOT, self.run_id)
+
+    def start_run(self):
+        """Forgets every floor and starts a fresh run directory.
+
+        There is only one save slot, so older runs' floors can't be reached
+        any more and are deleted.
+        """
+        self._memory.clear()
+        self._dirty.clear()
+        shutil.rmtree(self.ROOT, ignore_errors=True)
+        self.run_id = self.new_run_id()
+
+    def discard(self):
+        """Deletes this run's floors (the run is over)."""
+        self._memory.clear()
+        self._dirty.clear()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def path(self, level: int) -> str:
+        return os.path.join(self.directory, f"floor_{level}.bin")
+
+    def store(self, level: int, game_map: 'GameMap', entities: List['Entity']):
+        self._memory[level] = (game_map, entities)
+        self._memory.move_to_end(level)
+        self._dirty.add(level)
+        while len(self._memory) > self.capacity:
+            old_level, floor = self._memory.popitem(last=False)
+            if old_level in self._dirty:
+                self._write(old_level, floor)
+
+    def load(self, level: int) -> Optional[Floor]:
+        """Takes a visited floor out of the cache; None if the floor is new."""
+        floor = self._memory.pop(level, None)
+        if floor is not None:
+            return floor
+        if not os.path.exists(self.path(level)):
+            return None
+        with open(self.path(level), "rb") as f:
+            return pickle.loads(zlib.decompress(f.read()))
+
+    def flush(self):
+        """Writes every changed floor still in memory (before saving the game)."""
+        for level, floor in self._memory.items():
+            if level in self._dirty:
+                self._write(level, floor)
+
+    def _write(self, level: int, floor: Floor):
+        os.makedirs(self.directory, exist_ok=True)
+        data = zlib.compress(pickle.dumps(floor, pickle.HIGHEST_PROTOCOL))
+        # Write then rename, so a crash never leaves half a floor behind
+        temp_path = self.path(level) + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, self.path(level))
+        self._dirty.discard(level)
+
+    def __getstate__(self) -> dict:
+        # Saves refer to the run directory; the in-memory floors are flushed first
+        return {"capacity": self.capacity, "run_id": self.run_id}
+
+    def __setstate__(self, state: dict):
+        self.__init__(state["capacity"])
+        self.run_id = state["run_id"]
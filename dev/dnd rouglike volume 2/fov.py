@@ -0,0 +1,42 @@
+import math
+from typing import Dict, List, Set, Tuple
+from map_tiles import GameMap
+
+Point = Tuple[int, int]
+
+_rays: Dict[int, List[List[Point]]] = {}
+
+def rays(radius: int) -> List[List[Point]]:
+    """One ray per degree, as (dx, dy) cell offsets out to `radius`.
+
+    Rounding the float steps to cells is the same for every origin, so it is
+    done once per radius; consecutive repeats of a cell are dropped.
+    """
+    if radius not in _rays:
+        result = []
+        for degree in range(360):
+            rad = math.radians(degree)
+            dx, dy = math.cos(rad), math.sin(rad)
+            ray: List[Point] = []
+            for step in range(1, radius + 1):
+                cell = (int(round(dx * step)), int(round(dy * step)))
+                if not ray or ray[-1] != cell:
+                    ray.append(cell)
+            result.append(ray)
+        _rays[radius] = result
+    return _rays[radius]
+
+def compute_fov(game_map: GameMap, x: int, y: int, radius: int) -> Set[Point]:
+    """Tiles visible from (x, y): rays stop at the first opaque tile, which is itself visible."""
+    visible = {(x, y)}
+    tiles = game_map.tiles
+    width, height = game_map.width, game_map.height
+    for ray in rays(radius):
+        for dx, dy in ray:
+            ix, iy = x + dx, y + dy
+            if not (0 <= ix < width and 0 <= iy < height):
+                break
+            visible.add((ix, iy))
+            if not tiles[ix][iy].transparent:
+                break
+    return visible
@@ -0,0 +1,332 @@
+import random
+from collections import deque
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+from map_tiles import GameMap, Tile
+from entity import Entity
+from procgen import (Room, ROOM_FLOOR, create_h_tunnel, create_v_tunnel, floor_dimensions,
+                     place_entities, place_boss, place_merchant)
+from weighted_tables import TABLES
+from connectivity import FloorAnalysis, analyze_engine_floor, nearest_reachable
+
+try:
+    import numpy as np
+except ImportError: # Cave floors need numpy; without it they are built with BSP instead
+    np = None
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+SHOP_FLOOR = Tile(".", (80, 60, 40), walkable=True, transparent=True)
+
+class CaveRegion:
+    """A patch of cave floor that stands in for a room when placing entities."""
+    def __init__(self, cells: List[Tuple[int, int]]):
+        self.cells = cells
+        xs = [x for x, _ in cells]
+        ys = [y for _, y in cells]
+        self.x1, self.y1, self.x2, self.y2 = min(xs), min(ys), max(xs), max(ys)
+        # The cell nearest the middle, so the centre is always walkable
+        mx, my = sum(xs) / len(cells), sum(ys) / len(cells)
+        self.center = min(cells, key=lambda c: abs(c[0] - mx) + abs(c[1] - my))
+
+    def random_point(self) -> Tuple[int, int]:
+        return random.choice(self.cells)
+
+class FloorGenerator:
+    """Builds one floor.
+
+    Subclasses implement `carve`, which returns the map and its rooms (or
+    anything with `center` and `random_point`). `generate` then loads the
+    map into the engine, puts the player in the first room, populates every
+    room with `place_entities` and puts the stairs in the last one. Below
+    the first floor, up stairs go under the player's starting position.
+    """
+    name = "base"
+    MAX_ATTEMPTS = 3
+
+    def __init__(self):
+        self.analysis: Optional[FloorAnalysis] = None
+        # Theme of each populated room, in order; read by batch_generate.py
+        self.themes: List[str] = []
+
+    def carve(self, width: int, height: int) -> Tuple[GameMap, list]:
+        raise NotImplementedError()
+
+    def generate(self, engine: 'Engine', width: int, height: int) -> GameMap:
+        """Builds a floor whose stairs, merchant and boss are reachable from the player.
+
+        Failures are patched with extra tunnels; if that doesn't fix the
+        floor it is thrown away and generated again.
+        """
+        for _ in range(self.MAX_ATTEMPTS):
+            engine.entities = [engine.player]
+            self.themes = []
+            game_map, rooms = self.carve(width, height)
+            engine.game_map = game_map
+            self.populate(engine, rooms)
+            if engine.dungeon_level > 1:
+                # The way back up is where the player arrives
+                place_up_stairs(engine, engine.player.x, engine.player.y)
+            self.analysis = validate_floor(engine)
+            if self.analysis.ok:
+                break
+        return game_map
+
+    def populate(self, engine: 'Engine', rooms: list):
+        engine.player.x, engine.player.y = rooms[0].center
+        occupied = {(engine.player.x, engine.player.y)}
+        for i, room in enumerate(rooms):
+            # Don't theme the first room
+            theme = TABLES.draw("room_themes") if i > 0 else "normal"
+            self.themes.append(theme)
+            place_entities(room, engine, theme=theme, occupied=occupied)
+        place_stairs(engine, *rooms[-1].center)
+
+def place_stairs(engine: 'Engine', x: int, y: int):
+    engine.entities.append(Entity(x, y, ">", (255, 255, 255), "Stairs", stairs=True))
+
+def place_up_stairs(engine: 'Engine', x: int, y: int):
+    engine.entities.append(Entity(x, y, "<", (255, 255, 255), "Up Stairs", up_stairs=True))
+
+def connect(game_map: GameMap, a: Tuple[int, int], b: Tuple[int, int]):
+    """L-shaped tunnel between two points, bending at a random corner."""
+    (x1, y1), (x2, y2) = a, b
+    if random.random() < 0.5:
+        create_v_tunnel(game_map, y1, y2, x2)
+        create_h_tunnel(game_map, x1, x2, y1)
+    else:
+        create_v_tunnel(game_map, y1, y2, x1)
+        create_h_tunnel(game_map, x1, x2, y2)
+
+def validate_floor(engine: 'Engine') -> FloorAnalysis:
+    """Analyzes the engine's floor, tunnelling to anything the player can't reach."""
+    analysis = analyze_engine_floor(engine)
+    if analysis.ok:
+        return analysis
+    cut_off = analysis.unreachable
+    if analysis.has_stairs and analysis.stairs_distance is None:
+        cut_off.append(next((e.x, e.y) for e in engine.entities if e.stairs))
+    for point in cut_off:
+        start = nearest_reachable(analysis, point)
+        if start is not None:
+            connect(engine.game_map, start, point)
+    return analyze_engine_floor(engine)
+
+class RoomsGenerator(FloorGenerator):
+    """The original layout: random non-overlapping rooms, each joined to the previous one."""
+    name = "rooms"
+
+    def __init__(self, max_rooms: int = 10, room_min_size: int = 4, room_max_size: int = 8):
+        super().__init__()
+        self.max_rooms = max_rooms
+        self.room_min_size = room_min_size
+        self.room_max_size = room_max_size
+
+    def carve(self, width: int, height: int) -> Tuple[GameMap, List[Room]]:
+        game_map = GameMap(width, height)
+        rooms: List[Room] = []
+        for _ in range(self.max_rooms):
+            w = random.randint(self.room_min_size, self.room_max_size)
+            h = random.randint(self.room_min_size, self.room_max_size)
+            x = random.randint(0, width - w - 1)
+            y = random.randint(0, height - h - 1)
+
+            new_room = Room(x, y, w, h)
+            if any(new_room.intersects(other) for other in rooms):
+                continue
+            new_room.carve(game_map)
+            if rooms:
+                connect(game_map, rooms[-1].center, new_room.center)
+            rooms.append(new_room)
+        return game_map, rooms
+
+class BSPGenerator(FloorGenerator):
+    """Binary space partitioning: split the map into leaves and put one room in each.
+
+    Every leaf is big enough for a room, so nothing is ever rejected and the
+    cost is linear in the map area. Sibling subtrees are joined by a tunnel,
+    which keeps the whole floor connected.
+    """
+    name = "bsp"
+
+    def __init__(self, room_min_size: int = 4, room_max_size: int = 8):
+        super().__init__()
+        self.room_min_size = room_min_size
+        self.room_max_size = room_max_size
+        self.min_leaf = room_max_size + 2
+
+    def carve(self, width: int, height: int) -> Tuple[GameMap, List[Room]]:
+        game_map = GameMap(width, height)
+        rooms: List[Room] = []
+        self._build(game_map, 0, 0, width, height, rooms)
+        return game_map, rooms
+
+    def _build(self, game_map: GameMap, x: int, y: int, w: int, h: int, rooms: List[Room]):
+        """Partitions the leaf (x, y, w, h), appending its rooms in order."""
+        can_split_x = w >= self.min_leaf * 2
+        can_split_y = h >= self.min_leaf * 2
+        if can_split_x or can_split_y:
+            # Prefer cutting across the longer side
+            split_x = can_split_x and (not can_split_y or random.random() < w / (w + h))
+            first = len(rooms)
+            if split_x:
+                cut = random.randint(self.min_leaf, w - self.min_leaf)
+                self._build(game_map, x, y, cut, h, rooms)
+                middle = len(rooms)
+                self._build(game_map, x + cut, y, w - cut, h, rooms)
+            else:
+                cut = random.randint(self.min_leaf, h - self.min_leaf)
+                self._build(game_map, x, y, w, cut, rooms)
+                middle = len(rooms)
+                self._build(game_map, x, y + cut, w, h - cut, rooms)
+            if first < middle < len(rooms):
+                connect(game_map, random.choice(rooms[first:middle]).center,
+                        random.choice(rooms[middle:]).center)
+            return
+
+        max_w = min(self.room_max_size, w - 1)
+        max_h = min(self.room_max_size, h - 1)
+        if max_w < self.room_min_size or max_h < self.room_min_size:
+            return # Only possible when the whole map is smaller than one room
+        room_w = random.randint(self.room_min_size, max_w)
+        room_h = random.randint(self.room_min_size, max_h)
+        room = Room(x + random.randint(0, w - room_w - 1), y + random.randint(0, h - room_h - 1),
+                    room_w, room_h)
+        room.carve(game_map)
+        rooms.append(room)
+
+class CaveGenerator(FloorGenerator):
+    """Cellular-automata caves, smoothed with NumPy array operations.
+
+    Random noise is run through the 4-5 rule a few times, the largest
+    connected cave is kept, and it is cut into REGION_SIZE blocks that act
+    as rooms for entity placement.
+    """
+    name = "caves"
+    REGION_SIZE = 12
+    MIN_REGION_CELLS = 9
+
+    def __init__(self, wall_chance: float = 0.45, iterations: int = 4):
+        super().__init__()
+        self.wall_chance = wall_chance
+        self.iterations = iterations
+
+    def carve(self, width: int, height: int) -> Tuple[GameMap, List[CaveRegion]]:
+        # Seeded from `random` so seeded runs reproduce the same caves
+        rng = np.random.default_rng(random.getrandbits(64))
+        walls = rng.random((width, height)) < self.wall_chance
+        for _ in range(self.iterations):
+            walls[0, :] = walls[-1, :] = walls[:, 0] = walls[:, -1] = True
+            padded = np.pad(walls, 1, constant_values=True).astype(np.uint8)
+            neighbours = (padded[:-2, :-2] + padded[1:-1, :-2] + padded[2:, :-2] +
+                          padded[:-2, 1:-1] + padded[2:, 1:-1] +
+                          padded[:-2, 2:] + padded[1:-1, 2:] + padded[2:, 2:])
+            walls = (neighbours >= 5) | (walls & (neighbours == 4))
+        walls[0, :] = walls[-1, :] = walls[:, 0] = walls[:, -1] = True
+
+        cells = largest_region(width, height, bytes((~walls).astype(np.uint8).ravel()))
+        game_map = GameMap(width, height)
+        for x, y in cells:
+            game_map.tiles[x][y] = ROOM_FLOOR
+
+        blocks: Dict[Tuple[int, int], List[Tuple[int, int]]] = {}
+        for x, y in cells:
+            blocks.setdefault((x // self.REGION_SIZE, y // self.REGION_SIZE), []).append((x, y))
+        regions = [CaveRegion(block) for block in blocks.values() if len(block) >= self.MIN_REGION_CELLS]
+        if not regions:
+            # A degenerate cave (tiny map, unlucky noise); fall back to rooms
+            return BSPGenerator().carve(width, height)
+        random.shuffle(regions)
+        # Stairs go in the region furthest from the player
+        sx, sy = regions[0].center
+        far = max(range(len(regions)),
+                  key=lambda i: abs(regions[i].center[0] - sx) + abs(regions[i].center[1] - sy))
+        regions.append(regions.pop(far))
+        return game_map, regions
+
+def largest_region(width: int, height: int, open_cells: bytes) -> List[Tuple[int, int]]:
+    """The biggest 4-connected group of open cells; `open_cells` is column-major (x * height + y)."""
+    seen = bytearray(open_cells)
+    best: List[int] = []
+    for start in range(len(seen)):
+        if not seen[start]:
+            continue
+        seen[start] = 0
+        region = [start]
+        queue = deque(region)
+        while queue:
+            i = queue.popleft()
+            for n in (i - 1, i + 1, i - height, i + height):
+                # The border is always wall, so neighbours never wrap around
+                if seen[n]:
+                    seen[n] = 0
+                    region.append(n)
+                    queue.append(n)
+        if len(region) > len(best):
+            best = region
+    return [divmod(i, height) for i in best]
+
+class ShopGenerator(FloorGenerator):
+    """A small shop room with the merchant behind the counter."""
+    name = "shop"
+
+    def carve(self, width: int, height: int) -> Tuple[GameMap, List[Room]]:
+        game_map = GameMap(width, height)
+        # Small cozy shop room
+        room = Room(width // 2 - 4, height // 2 - 4, 8, 8)
+        room.carve(game_map, SHOP_FLOOR)
+        return game_map, [room]
+
+    def populate(self, engine: 'Engine', rooms: List[Room]):
+        room = rooms[0]
+        # Player at door, Merchant at counter, stairs behind the counter
+        px, py = room.center
+        engine.player.x, engine.player.y = px, py + 2
+        place_merchant(room, engine)
+        place_stairs(engine, px, py - 2)
+
+class BossGenerator(FloorGenerator):
+    """One giant room with the boss in the middle."""
+    name = "boss"
+
+    def carve(self, width: int, height: int) -> Tuple[GameMap, List[Room]]:
+        game_map = GameMap(width, height)
+        room = Room(2, 2, width - 4, height - 12)
+        room.carve(game_map)
+        return game_map, [room]
+
+    def populate(self, engine: 'Engine', rooms: List[Room]):
+        room = rooms[0]
+        # Center player and place boss; the stairs are under the boss.
+        # Short maps (floor 5) would put py + 5 in the wall, so clamp it.
+        px, py = room.center
+        engine.player.x, engine.player.y = px, min(py + 5, room.y2 - 1)
+        place_boss(room, engine)
+        place_stairs(engine, px, py)
+
+GENERATORS = {
+    "rooms": RoomsGenerator,
+    "bsp": BSPGenerator,
+    "caves": CaveGenerator,
+    "shop": ShopGenerator,
+    "boss": BossGenerator,
+}
+
+def choose_generator(dungeon_level: int, max_rooms: int = 10) -> FloorGenerator:
+    """Boss floors every 5th level, shops every 3rd, otherwise the floor band's table."""
+    if dungeon_level % 5 == 0:
+        return BossGenerator()
+    if dungeon_level % 3 == 0:
+        return ShopGenerator()
+    name = TABLES.for_floor("floor_generators", dungeon_level).draw()
+    if name == "caves" and np is None:
+        name = "bsp"
+    if name == "rooms":
+        return RoomsGenerator(max_rooms)
+    return GENERATORS[name]()
+
+def generate_floor(engine: 'Engine', generator: Optional[FloorGenerator] = None) -> GameMap:
+    """Generates the engine's current dungeon level (player must already exist)."""
+    width, height, max_rooms = floor_dimensions(engine.dungeon_level)
+    generator = generator or choose_generator(engine.dungeon_level, max_rooms)
+    return generator.generate(engine, width, height)
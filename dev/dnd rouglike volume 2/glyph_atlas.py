@@ -0,0 +1,183 @@
+import hashlib
+import json
+import os
+import re
+from typing import Callable, Dict, Optional, Tuple, Union
+
+import pygame
+
+# The same file is in dnd_roguelike/ and "dnd rouglike volume 2"/, which each run from their own folder
+CACHE_DIR = "glyph_cache"
+# Drawn by the map but outside ASCII (map_tiles.WALL in volume 2)
+MAP_GLYPHS = "█"
+# Printable ASCII for entities and the HUD text, plus the map's own glyphs
+DEFAULT_CHARSET = "".join(chr(code) for code in range(32, 127)) + MAP_GLYPHS
+ATLAS_WIDTH = 512
+FORMAT_VERSION = 1 # Bump when the PNG or index layout changes
+
+Color = Tuple[int, int, int]
+
+class GlyphAtlas:
+    """Pre-rendered glyphs for one font and size, with an on-disk cache.
+
+    The first launch renders `charset` once and saves it to `cache_dir` as a
+    PNG plus a JSON index, keyed by font, size and charset; later launches
+    just load the image, without looking the font up at all. Glyphs are
+    stored white and tinted on first use in each color, and text is drawn
+    by placing glyphs side by side.
+
+    `render` matches pygame.font.Font.render, so an atlas can stand in for
+    a font. Characters outside the atlas are drawn with `fallback`: a Font,
+    or a function that opens one the first time it is needed. Without one,
+    pygame's built-in font is used.
+    """
+    def __init__(self, font_name: str, size: int, charset: str = DEFAULT_CHARSET, cache_dir: str = CACHE_DIR):
+        self.font_name = font_name
+        self.size = size
+        self.charset = charset
+        self.cache_dir = cache_dir
+        self.height = 0
+        # White glyphs and their tinted copies, swapped together when the atlas loads
+        self._table: Tuple[Dict[str, pygame.Surface], Dict[Tuple[str, Color], pygame.Surface]] = ({}, {})
+        self._fallback: Union[pygame.font.Font, Callable[[], pygame.font.Font], None] = None
+        self._image: Optional[pygame.Surface] = None # Only after `build`, for `save`
+        self._rects: Dict[str, pygame.Rect] = {}
+        self.misses = 0 # Glyphs drawn with the fallback font
+
+    @property
+    def key(self) -> str:
+        digest = hashlib.sha1(f"{FORMAT_VERSION}:{self.charset}".encode("utf-8")).hexdigest()[:10]
+        name = re.sub(r"[^A-Za-z0-9]+", "_", self.font_name or "default")
+        return f"{name}-{self.size}-{digest}"
+
+    @property
+    def paths(self) -> Tuple[str, str]:
+        base = os.path.join(self.cache_dir, self.key)
+        return base + ".png", base + ".json"
+
+    @property
+    def loaded(self) -> bool:
+        return bool(self._table[0])
+
+    @property
+    def fallback(self):
+        return self._fallback
+
+    @fallback.setter
+    def fallback(self, font):
+        self._fallback = font
+        self._table = (self._table[0], {}) # Drop glyphs tinted from the old fallback
+
+    def _fallback_font(self) -> pygame.font.Font:
+        if callable(self._fallback):
+            self._fallback = self._fallback()
+        if self._fallback is None:
+            self._fallback = pygame.font.Font(None, self.size)
+        return self._fallback
+
+    def load(self) -> bool:
+        """Reads the cached atlas, if there is one; safe to call from a loader thread."""
+        image_path, index_path = self.paths
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") != FORMAT_VERSION or index.get("charset") != self.charset:
+                return False
+            image = pygame.image.load(image_path)
+        except (OSError, ValueError, pygame.error):
+            return False
+        glyphs = {char: image.subsurface(rect) for char, rect in index["glyphs"].items()}
+        self.height = index["height"]
+        self._table = (glyphs, {})
+        return True
+
+    def build(self, font: pygame.font.Font):
+        """Renders the charset with `font` (which also becomes the fallback)."""
+        rendered = {char: font.render(char, True, (255, 255, 255)) for char in self.charset}
+        self.height = font.get_height()
+        row_height = max(surface.get_height() for surface in rendered.values())
+        rects, x, y = {}, 0, 0
+        for char, surface in rendered.items():
+            if x + surface.get_width() > ATLAS_WIDTH:
+                x, y = 0, y + row_height
+            rects[char] = pygame.Rect(x, y, surface.get_width(), surface.get_height())
+            x += surface.get_width()
+        image = pygame.Surface((ATLAS_WIDTH, y + row_height), pygame.SRCALPHA)
+        for char, rect in rects.items():
+            # Copied as-is; a normal alpha blit would darken the antialiased edges
+            image.blit(rendered[char], rect, special_flags=pygame.BLEND_RGBA_MAX)
+        self._image, self._rects = image, rects
+        self._fallback = font
+        self._table = ({char: image.subsurface(rect) for char, rect in rects.items()}, {})
+
+    def save(self) -> bool:
+        """Writes the atlas built by `build` to the cache directory."""
+        if self._image is None:
+            return False
+        image_path, index_path = self.paths
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            pygame.image.save(self._image, image_path)
+            index = {
+                "version": FORMAT_VERSION,
+                "font": self.font_name,
+                "size": self.size,
+                "charset": self.charset,
+                "height": self.height,
+                "glyphs": {char: list(rect) for char, rect in self._rects.items()},
+            }
+            with open(index_path, "w", encoding="utf-8") as f:
+                json.dump(index, f)
+        except (OSError, pygame.error) as e:
+            print(f"Could not save glyph atlas {image_path}: {e}")
+            return False
+        return True
+
+    @classmethod
+    def open(cls, font_name: str, size: int, charset: str = DEFAULT_CHARSET, cache_dir: str = CACHE_DIR) -> 'GlyphAtlas':
+        """The cached atlas for a system font, built and saved on the first run."""
+        atlas = cls(font_name, size, charset, cache_dir)
+        atlas.fallback = lambda: pygame.font.SysFont(font_name, size)
+        if not atlas.load():
+            path = pygame.font.match_font(font_name)
+            atlas.build(pygame.font.Font(path, size))
+            if path:
+                # Without the font pygame's built-in one stands in; that isn't cached under this name
+                atlas.save()
+        return atlas
+
+    def glyph(self, char: str, color: Color) -> pygame.Surface:
+        """One character in `color`; shared, so blit it but don't draw on it."""
+        glyphs, tinted = self._table
+        key = (char, color)
+        surface = tinted.get(key)
+        if surface is None:
+            white = glyphs.get(char)
+            if white is None:
+                self.misses += 1
+                surface = self._fallback_font().render(char, True, color)
+            else:
+                surface = white.copy()
+                surface.fill((*color[:3], 255), special_flags=pygame.BLEND_RGBA_MULT)
+            tinted[key] = surface
+        return surface
+
+    def get_height(self) -> int:
+        return self.height or self._fallback_font().get_height()
+
+    def render(self, text: str, antialias: bool, color: Color, background: Optional[Color] = None) -> pygame.Surface:
+        """Draws `text` like Font.render (always antialiased)."""
+        if len(text) == 1 and background is None:
+            return self.glyph(text, color)
+        glyphs = [self.glyph(char, color) for char in text]
+        height = max([self.get_height()] + [glyph.get_height() for glyph in glyphs])
+        surface = pygame.Surface((max(1, sum(glyph.get_width() for glyph in glyphs)), height), pygame.SRCALPHA)
+        flags = pygame.BLEND_RGBA_MAX
+        if background is not None:
+            surface.fill(background)
+            flags = 0
+        x = 0
+        for glyph in glyphs:
+            surface.blit(glyph, (x, 0), special_flags=flags)
+            x += glyph.get_width()
+        return surface
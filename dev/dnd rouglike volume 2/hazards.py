@@ -1,7 +1,11 @@
 from typing import TYPE_CHECKING, Optional, Callable
+from events import TrapTriggeredEvent
+from items import ITEMS
+from sound_manager import SoundManager
 if TYPE_CHECKING:
     from entity import Entity
     from engine import Engine
+    from events import GameEvent
 
 class Hazard:
     def __init__(self, name: str, trigger_func: Callable, **kwargs):
@@ -10,15 +14,13 @@ class Hazard:
         self.function_kwargs = kwargs
         self.is_revealed = False
 
-    def trigger(self, engine: 'Engine', entity: 'Entity') -> str:
+    def trigger(self, engine: 'Engine', entity: 'Entity') -> 'GameEvent':
         return self.trigger_func(engine, entity, **self.function_kwargs)
 
 def spike_trap(engine: 'Engine', entity: 'Entity', damage: int = 5):
-    from dnd_rules import roll_dice
-    from sound_manager import SoundManager
-    SoundManager.play_sound("trap")
+    event = engine.add_message(TrapTriggeredEvent(entity, "Spike Trap", damage))
     entity.fighter.take_damage(damage, engine)
-    return f"{entity.name} triggers a spike trap and takes {damage} damage!"
+    return event
 
 class Interactive:
     def __init__(self, name: str, interact_func: Callable, **kwargs):
@@ -35,22 +37,14 @@ class Interactive:
 def open_chest(engine: 'Engine', entity: 'Entity', interactive: 'Interactive'):
     interactive.is_broken = True
     # Spawn a random item on top of the chest
-    from procgen import place_entities
-    from items import Item, heal
-    from entity import Entity as EntityObj
-    
     # Simple version: always a potion for now
-    item_comp = Item("Healing Potion", "!", (0, 255, 0), use_function=heal, amount=10)
-    potion = EntityObj(entity.x, entity.y, "!", (0, 255, 0), "Healing Potion", item=item_comp)
-    engine.entities.append(potion)
+    engine.entities.append(ITEMS.spawn("healing_potion", entity.x, entity.y))
     
-    from sound_manager import SoundManager
     SoundManager.play_sound("interact")
     
     return f"You open the chest and find a Healing Potion!"
 
 def smash_barrel(engine: 'Engine', entity: 'Entity', interactive: 'Interactive'):
-    from sound_manager import SoundManager
     SoundManager.play_sound("interact")
     interactive.is_broken = True
     entity.char = "%" # Change to debris
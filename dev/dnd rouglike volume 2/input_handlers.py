@@ -1,34 +1,69 @@
 import pygame
-from constants import GameState
+from collections import deque
+from typing import Deque, Optional
+from constants import GameState, TILE_SIZE
+from replay import Command, ReplayRecorder, REPLAY_FILE
+from save_manager import SaveManager
+from sound_manager import SoundManager
+from dnd_rules import roll_dice
+from items import find_spell_target
 
 class EventHandler:
     def __init__(self, engine):
         self.engine = engine
+        # Input of the current run goes to the recorder (see replay.py)
+        self.recorder: Optional[ReplayRecorder] = None
+        # Commands being replayed in real time, applied on their recorded frames
+        self.playback: Deque[Command] = deque()
+        self.playback_start = 0
+
+    def start_recording(self, seed: int, class_name: str):
+        self.stop_recording()
+        self.recorder = ReplayRecorder(REPLAY_FILE, seed, class_name, self.engine.frame)
+
+    def stop_recording(self):
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
 
     def handle_events(self):
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.engine.running = False
-            
-            if self.engine.state == GameState.MAIN_MENU:
-                self.handle_menu_events(event)
-            elif self.engine.state == GameState.CLASS_SELECT:
-                self.handle_class_select_events(event)
-            elif self.engine.state == GameState.PLAYING:
-                self.handle_playing_events(event)
-            elif self.engine.state == GameState.GAME_OVER:
-                self.handle_game_over_events(event)
-            elif self.engine.state == GameState.INVENTORY_MENU:
-                self.handle_inventory_events(event, "inventory")
-            elif self.engine.state == GameState.EQUIP_MENU:
-                self.handle_inventory_events(event, "equipment")
-            elif self.engine.state == GameState.SHOP_MENU:
-                self.handle_shop_events(event)
-            elif self.engine.state == GameState.VICTORY:
-                self.handle_victory_events(event)
+            if self.playback and event.type != pygame.QUIT:
+                continue # Only the replay gets to play
+            self.handle_event(event)
+        while self.playback and self.playback[0].frame + self.playback_start <= self.engine.frame:
+            self.handle_event(self.playback.popleft().to_event())
+
+    def handle_event(self, event):
+        if event.type == pygame.QUIT:
+            self.engine.running = False
+
+        recorder = self.recorder
+        command = Command.from_event(event, self.engine.frame) if recorder else None
+
+        if self.engine.state == GameState.MAIN_MENU:
+            self.handle_menu_events(event)
+        elif self.engine.state == GameState.CLASS_SELECT:
+            self.handle_class_select_events(event)
+        elif self.engine.state == GameState.PLAYING:
+            self.handle_playing_events(event)
+        elif self.engine.state == GameState.GAME_OVER:
+            self.handle_game_over_events(event)
+        elif self.engine.state == GameState.INVENTORY_MENU:
+            self.handle_inventory_events(event, "inventory")
+        elif self.engine.state == GameState.EQUIP_MENU:
+            self.handle_inventory_events(event, "equipment")
+        elif self.engine.state == GameState.SHOP_MENU:
+            self.handle_shop_events(event)
+        elif self.engine.state == GameState.VICTORY:
+            self.handle_victory_events(event)
+
+        # Recorded with the state hash it led to, so replays can check they match.
+        # A command that started a new run (or loaded a save) belongs to neither recording.
+        if command and recorder is self.recorder:
+            recorder.record(command, self.engine.state_hash.value)
 
     def handle_menu_events(self, event):
-        from save_manager import SaveManager
         menu_options = ["New Game"]
         if SaveManager.save_exists():
             menu_options.append("Load Game")
@@ -45,6 +80,8 @@ class EventHandler:
                     self.engine.state = GameState.CLASS_SELECT
                     self.engine.menu_index = 0
                 elif selected == "Load Game":
+                    # A loaded game can't be replayed from its seed
+                    self.stop_recording()
                     if not self.engine.load_game():
                         self.engine.add_message("Load failed!")
                 elif selected == "Quit":
@@ -67,18 +104,18 @@ class EventHandler:
                 self.engine.menu_index = 0
 
     def handle_game_over_events(self, event):
-        from save_manager import SaveManager
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_RETURN or event.key == pygame.K_ESCAPE:
                 SaveManager.delete_save() # Permadeath
+                self.engine.floor_cache.discard()
                 self.engine.state = GameState.MAIN_MENU
                 self.engine.menu_index = 0
 
     def handle_victory_events(self, event):
-        from save_manager import SaveManager
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_RETURN or event.key == pygame.K_ESCAPE:
                 SaveManager.delete_save() # Run complete
+                self.engine.floor_cache.discard()
                 self.engine.state = GameState.MAIN_MENU
                 self.engine.menu_index = 0
 
@@ -87,22 +124,35 @@ class EventHandler:
             if event.key == pygame.K_ESCAPE or (menu_type == "inventory" and event.key == pygame.K_i) or (menu_type == "equipment" and event.key == pygame.K_e):
                 self.engine.state = GameState.PLAYING
             
-            items = self.engine.player.inventory.items
-            if menu_type == "equipment":
-                items = [item for item in items if getattr(item, 'owner', None) and item.owner.equippable]
+            inventory = self.engine.player.inventory
+            stacks = inventory.view("all" if menu_type == "inventory" else "equippable")
 
             if event.key == pygame.K_UP:
-                self.engine.menu_index = (self.engine.menu_index - 1) % len(items) if items else 0
+                self.engine.menu_index = (self.engine.menu_index - 1) % len(stacks) if stacks else 0
             elif event.key == pygame.K_DOWN:
-                self.engine.menu_index = (self.engine.menu_index + 1) % len(items) if items else 0
+                self.engine.menu_index = (self.engine.menu_index + 1) % len(stacks) if stacks else 0
             elif event.key == pygame.K_RETURN:
-                if items:
-                    item = items[self.engine.menu_index]
+                if stacks:
+                    item = stacks[self.engine.menu_index].top
                     if menu_type == "inventory":
-                        msg = item.use(self.engine, self.engine.player)
+                        item.use(self.engine, self.engine.player)
+                    else:
+                        self.engine.add_message(inventory.toggle_equip(item.owner))
+                    # A slot that was used up leaves the menu shorter
+                    stacks = inventory.view("all" if menu_type == "inventory" else "equippable")
+                    self.engine.menu_index = min(self.engine.menu_index, len(stacks) - 1) if stacks else 0
+            elif event.key == pygame.K_d:
+                if stacks and menu_type == "inventory":
+                    item = stacks[self.engine.menu_index].top
+                    if item.owner:
+                        inventory.remove_item(item)
+                        item_entity = item.owner
+                        item_entity.x, item_entity.y = self.engine.player.x, self.engine.player.y
+                        self.engine.entities.append(item_entity)
+                        self.engine.add_message(f"You drop the {item_entity.name}.")
+                        self.engine.state = GameState.PLAYING
                     else:
-                        msg = self.engine.player.inventory.toggle_equip(item.owner)
-                    self.engine.add_message(msg)
+                        self.engine.add_message("This item cannot be dropped.")
 
     def handle_shop_events(self, event):
         if event.type == pygame.KEYDOWN:
@@ -121,7 +171,6 @@ class EventHandler:
                         if self.engine.player.inventory.add_item(item):
                             self.engine.player.fighter.gold -= price
                             self.engine.add_message(f"You bought the {item.name}!")
-                            from sound_manager import SoundManager
                             SoundManager.play_sound("pickup")
                             items.pop(self.engine.menu_index)
                             self.engine.menu_index = min(self.engine.menu_index, len(items) - 1) if items else 0
@@ -129,21 +178,21 @@ class EventHandler:
                             self.engine.add_message("Your inventory is full!")
                     else:
                         self.engine.add_message("You don't have enough gold!")
-            elif event.key == pygame.K_d:
-                if items and menu_type == "inventory":
-                    item = items[self.engine.menu_index]
-                    if item.owner:
-                        self.engine.player.inventory.remove_item(item)
-                        item_entity = item.owner
-                        item_entity.x, item_entity.y = self.engine.player.x, self.engine.player.y
-                        self.engine.entities.append(item_entity)
-                        self.engine.add_message(f"You drop the {item_entity.name}.")
-                        self.engine.state = GameState.PLAYING
-                    else:
-                        self.engine.add_message("This item cannot be dropped.")
+
+    def travel_to_stairs(self, down: bool):
+        stairs = next((e for e in self.engine.entities if (e.stairs if down else e.up_stairs)
+                       and self.engine.game_map.is_explored(e.x, e.y)), None)
+        if stairs:
+            self.engine.travel_to(stairs.x, stairs.y)
+        else:
+            self.engine.add_message("You haven't found any stairs that way.")
 
     def handle_playing_events(self, event):
-        if event.type == pygame.KEYDOWN:
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            # Click a tile to travel there
+            mx, my = event.pos
+            self.engine.travel_to(mx // TILE_SIZE, my // TILE_SIZE)
+        elif event.type == pygame.KEYDOWN:
             dx, dy = 0, 0
             if event.key == pygame.K_ESCAPE:
                 self.engine.state = GameState.MAIN_MENU
@@ -160,7 +209,6 @@ class EventHandler:
                 item_entity = next((e for e in self.engine.entities if e.x == self.engine.player.x and e.y == self.engine.player.y and e.item), None)
                 if item_entity:
                     if self.engine.player.inventory.add_item(item_entity.item):
-                        from sound_manager import SoundManager
                         SoundManager.play_sound("pickup")
                         self.engine.add_message(f"You pick up the {item_entity.name}.")
                         self.engine.entities.remove(item_entity)
@@ -168,6 +216,12 @@ class EventHandler:
                         self.engine.add_message("Your inventory is full!")
                 else:
                     self.engine.add_message("There is nothing here to pick up.")
+            elif event.key == pygame.K_x:
+                self.engine.auto_explore()
+            elif event.unicode == ">":
+                self.travel_to_stairs(down=True)
+            elif event.unicode == "<":
+                self.travel_to_stairs(down=False)
             elif event.key == pygame.K_i:
                 self.engine.state = GameState.INVENTORY_MENU
                 self.engine.menu_index = 0
@@ -177,13 +231,11 @@ class EventHandler:
             elif event.key == pygame.K_a:
                 if self.engine.player_class.starting_abilities:
                     ability = self.engine.player_class.starting_abilities[0]
-                    msg = ability.activate(self.engine.player)
-                    self.engine.add_message(msg)
+                    ability.activate(self.engine.player, self.engine)
                 else:
                     self.engine.add_message("You have no special abilities.")
             elif event.key == pygame.K_s:
                 self.engine.add_message("You search the area...")
-                from dnd_rules import roll_dice
                 for e in self.engine.entities:
                     if e.hazard and not e.hazard.is_revealed:
                         dist = abs(e.x - self.engine.player.x) + abs(e.y - self.engine.player.y)
@@ -196,27 +248,22 @@ class EventHandler:
                 # Prioritize equipped scroll as active spell
                 active_scroll = self.engine.player.fighter.scroll
                 if active_scroll:
-                    msg = active_scroll.item.use(self.engine, self.engine.player)
-                    self.engine.add_message(msg)
+                    active_scroll.item.use(self.engine, self.engine.player)
                 elif self.engine.player_class.starting_spells:
                     spell = self.engine.player_class.starting_spells[0]
-                    monsters = [e for e in self.engine.entities if e != self.engine.player and e.fighter]
-                    if monsters:
-                        nearest = min(monsters, key=lambda m: abs(m.x - self.engine.player.x) + abs(m.y - self.engine.player.y))
-                        dist = abs(nearest.x - self.engine.player.x) + abs(nearest.y - self.engine.player.y)
-                        if dist <= spell.range:
-                            msg = spell.cast(self.engine, self.engine.player, nearest)
-                            self.engine.add_message(msg)
-                        else:
-                            self.engine.add_message(f"Target is too far for {spell.name}!")
+                    nearest, failure = find_spell_target(self.engine, self.engine.player, spell)
+                    if failure:
+                        self.engine.add_message(failure)
                     else:
-                        self.engine.add_message("No monsters in range!")
+                        spell.cast(self.engine, self.engine.player, nearest)
                 else:
                     self.engine.add_message("You don't have an active spell or any class spells!")
             elif event.key == pygame.K_RETURN:
-                if any(e.stairs for e in self.engine.entities if e.x == self.engine.player.x and e.y == self.engine.player.y):
-                    self.engine.dungeon_level += 1
-                    self.engine.new_floor()
+                here = [e for e in self.engine.entities if e.x == self.engine.player.x and e.y == self.engine.player.y]
+                if any(e.stairs for e in here):
+                    self.engine.change_floor(1)
+                elif any(e.up_stairs for e in here):
+                    self.engine.change_floor(-1)
                 else:
                     self.engine.add_message("There are no stairs here.")
 
@@ -1,23 +1,145 @@
-from typing import List, TYPE_CHECKING
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
 from items import Item
 
 if TYPE_CHECKING:
     from entity import Entity
 
+# Most identical items one slot holds
+STACK_LIMIT = 20
+
+# Menu views: name -> which stacks it lists
+CATEGORIES = ("all", "consumable", "equippable", "magic")
+
+class ItemStack:
+    """Identical items sharing one inventory slot; the newest is used first."""
+    def __init__(self, key: tuple, item: Item):
+        self.key = key
+        self.items: List[Item] = [item]
+
+    @property
+    def top(self) -> Item:
+        return self.items[-1]
+
+    @property
+    def count(self) -> int:
+        return len(self.items)
+
+    @property
+    def name(self) -> str:
+        return self.top.name
+
+    @property
+    def categories(self) -> Tuple[str, ...]:
+        item = self.top
+        found = ["all"]
+        if item.use_function and item.charges is None:
+            found.append("consumable")
+        if item.owner and item.owner.equippable:
+            found.append("equippable")
+        if item.prototype.slot == "scroll" or item.charges is not None:
+            found.append("magic")
+        return tuple(found)
+
+def stack_key(item: Item) -> Optional[tuple]:
+    """What identical items have in common; None for items that never stack.
+
+    Weapons and armor are worn one at a time and wands carry their own
+    charges, so each keeps a slot of its own.
+    """
+    if item.charges is not None or item.prototype.slot in ("weapon", "armor") or item.prototype.id is None:
+        return None
+    return (item.prototype.id, item.is_identified)
+
 class Inventory:
+    """Items in slots, with identical potions and scrolls stacked.
+
+    Each slot is an ItemStack. Items know their stack through `_stack_of`,
+    so removing one is a dictionary lookup rather than a search, and the
+    menus read `view(category)`, which is rebuilt only after the inventory
+    changes.
+    """
     def __init__(self, capacity: int):
         self.capacity = capacity
-        self.items: List[Item] = []
+        self.stacks: List[ItemStack] = []
+        self._by_key: Dict[tuple, List[ItemStack]] = {} # Every stack of each kind, oldest first
+        self._stack_of: Dict[Item, ItemStack] = {}
+        self._views: Optional[Dict[str, List[ItemStack]]] = None
+
+    @property
+    def items(self) -> List[Item]:
+        """Every item, slot by slot."""
+        return [item for stack in self.stacks for item in stack.items]
+
+    def __contains__(self, item: Item) -> bool:
+        return item in self._stack_of
+
+    def __getstate__(self) -> dict:
+        return {"capacity": self.capacity, "items": self.items, "owner": getattr(self, "owner", None)}
+
+    def __setstate__(self, state: dict):
+        # Older saves pickled a plain item list the same way
+        self.__init__(state["capacity"])
+        self.owner = state.get("owner")
+        for item in state["items"]:
+            self._insert(item, force=True)
+
+    def view(self, category: str = "all") -> List[ItemStack]:
+        """The slots a menu lists for `category` (see CATEGORIES)."""
+        if self._views is None:
+            self._views = {name: [] for name in CATEGORIES}
+            for stack in self.stacks:
+                for name in stack.categories:
+                    self._views[name].append(stack)
+        return self._views[category]
+
+    def stack_of(self, item: Item) -> Optional[ItemStack]:
+        return self._stack_of.get(item)
+
+    def _insert(self, item: Item, force: bool = False) -> bool:
+        key = stack_key(item)
+        # Any stack of the kind with room, so partial stacks fill up before a new slot opens
+        open_stacks = [stack for stack in self._by_key.get(key, ()) if stack.count < STACK_LIMIT] if key else []
+        stack = open_stacks[0] if open_stacks else None
+        if stack:
+            stack.items.append(item)
+        elif len(self.stacks) < self.capacity or force:
+            stack = ItemStack(key, item)
+            self.stacks.append(stack)
+            if key:
+                self._by_key.setdefault(key, []).append(stack)
+        else:
+            return False
+        self._stack_of[item] = stack
+        self._views = None
+        return True
 
     def add_item(self, item: Item) -> bool:
-        if len(self.items) >= self.capacity:
+        if not self._insert(item):
             return False
-        self.items.append(item)
+        self.owner.mark_changed()
         return True
 
     def remove_item(self, item: Item):
-        if item in self.items:
-            self.items.remove(item)
+        stack = self._stack_of.pop(item, None)
+        if stack is None:
+            return
+        if stack.top is item:
+            stack.items.pop()
+        else:
+            stack.items.remove(item)
+        if not stack.items:
+            self.stacks.remove(stack) # At most `capacity` slots to look through
+            if stack.key:
+                same_kind = self._by_key[stack.key]
+                same_kind.remove(stack)
+                if not same_kind:
+                    del self._by_key[stack.key]
+        # An equipped scroll that was used up hands over to the next one in its stack
+        fighter = self.owner.fighter
+        if fighter and item.owner is not None and fighter.scroll is item.owner:
+            fighter.scroll = stack.top.owner if stack.items else None
+        self._views = None
+        self.owner.mark_changed()
 
     def toggle_equip(self, item_entity: 'Entity') -> str:
         if not item_entity.equippable:
@@ -1,122 +1,245 @@
-from typing import Tuple, Optional, Callable, TYPE_CHECKING
+import json
+import os
+import random
+from typing import Dict, Tuple, Optional, Callable, TYPE_CHECKING
+from constants import FOV_RADIUS
+from events import (GameEvent, MessageEvent, HealEvent, ItemUsedEvent, ItemIdentifiedEvent,
+                    ItemConsumedEvent)
 
 if TYPE_CHECKING:
     from entity import Entity
     from engine import Engine
 
-class Item:
-    def __init__(self, name: str, char: str, color: Tuple[int, int, int], 
-                 use_function: Optional[Callable] = None, 
-                 charges: Optional[int] = None, **kwargs):
+ITEM_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "items.json")
+
+class ItemPrototype:
+    """The shared, read-only definition of one kind of item.
+
+    Prototypes are loaded once from items.json; every potion on every floor
+    points at the same one, so only charges and identification are per item.
+    Unidentified kinds share one `color` on the floor, so the glyph gives
+    nothing away; `shop_color` is what the merchant's identified stock shows.
+    """
+    def __init__(self, id: Optional[str], name: str, char: str, color: Tuple[int, int, int],
+                 use_function: Optional[Callable] = None, function_kwargs: Optional[dict] = None,
+                 slot: Optional[str] = None, damage_dice: str = "1d4", ac_bonus: int = 0,
+                 identified: bool = True, charges: Optional[Tuple[int, int]] = None, price: int = 0,
+                 shop_color: Optional[Tuple[int, int, int]] = None):
+        self.id = id
         self.name = name
         self.char = char
         self.color = color
         self.use_function = use_function
+        self.function_kwargs = function_kwargs or {}
+        self.slot = slot
+        self.damage_dice = damage_dice
+        self.ac_bonus = ac_bonus
+        self.identified = identified
+        self.charges = charges
+        self.price = price
+        self.shop_color = shop_color or color
+
+    @classmethod
+    def from_data(cls, item_id: str, data: dict) -> 'ItemPrototype':
+        data = dict(data)
+        use = data.pop("use", None)
+        spell = data.pop("spell", None)
+        fields = {key: data.pop(key) for key in ("slot", "damage_dice", "ac_bonus", "identified", "price")
+                  if key in data}
+        charges = data.pop("charges", None)
+        name, char, color = data.pop("name"), data.pop("char"), tuple(data.pop("color"))
+        if "shop_color" in data:
+            fields["shop_color"] = tuple(data.pop("shop_color"))
+        # Whatever is left is passed to the use function (e.g. a potion's amount)
+        if spell:
+            import spells
+            data["spell"] = getattr(spells, spell)()
+        return cls(item_id, name, char, color,
+                   use_function=USE_FUNCTIONS[use] if use else None, function_kwargs=data,
+                   charges=tuple(charges) if charges else None, **fields)
+
+    def roll_charges(self) -> Optional[int]:
+        if self.charges is None:
+            return None
+        return random.randint(*self.charges)
+
+class ItemRegistry:
+    """All item prototypes by id, read from the data file on first use."""
+    def __init__(self, path: str = ITEM_DATA_FILE):
+        self.path = path
+        self._prototypes: Optional[Dict[str, ItemPrototype]] = None
+
+    @property
+    def prototypes(self) -> Dict[str, ItemPrototype]:
+        if self._prototypes is None:
+            with open(self.path) as f:
+                data = json.load(f)
+            self._prototypes = {item_id: ItemPrototype.from_data(item_id, entry)
+                                for item_id, entry in data.items()}
+        return self._prototypes
+
+    def get(self, item_id: str) -> ItemPrototype:
+        return self.prototypes[item_id]
+
+    def find_legacy(self, name: str, function_kwargs: dict) -> Optional[ItemPrototype]:
+        """The prototype an item from a save before prototypes was made as, if exactly one fits.
+
+        Those saves only have the item's name and use-function arguments,
+        and two kinds of potion share a name, so the arguments (or, for
+        scrolls and wands, the kind of spell) must match too.
+        """
+        def comparable(kwargs: dict) -> dict:
+            return {key: type(value).__name__ if key == "spell" else value for key, value in kwargs.items()}
+        wanted = comparable(function_kwargs or {})
+        matches = [prototype for prototype in self.prototypes.values()
+                   if prototype.name == name and comparable(prototype.function_kwargs) == wanted]
+        return matches[0] if len(matches) == 1 else None
+
+    def create(self, item_id: str, is_identified: Optional[bool] = None) -> 'Item':
+        prototype = self.get(item_id)
+        return Item(prototype, charges=prototype.roll_charges(), is_identified=is_identified)
+
+    def spawn(self, item_id: str, x: int, y: int, is_identified: Optional[bool] = None,
+              color: Optional[Tuple[int, int, int]] = None) -> 'Entity':
+        """A new item entity at (x, y), drawn in `color` if given instead of the prototype's."""
+        from entity import Entity, Equippable
+        item = self.create(item_id, is_identified)
+        prototype = item.prototype
+        equippable = None
+        if prototype.slot:
+            equippable = Equippable(None, slot=prototype.slot, damage_dice=prototype.damage_dice,
+                                    ac_bonus=prototype.ac_bonus)
+        return Entity(x, y, prototype.char, color or prototype.color, prototype.name, item=item, equippable=equippable)
+
+class Item:
+    """One item in the game. Everything except charges and identification lives on the prototype."""
+    def __init__(self, prototype: ItemPrototype, charges: Optional[int] = None,
+                 is_identified: Optional[bool] = None):
+        self.prototype = prototype
         self.charges = charges
-        self.is_identified = kwargs.pop("is_identified", True)
-        self.function_kwargs = kwargs
+        self.is_identified = prototype.identified if is_identified is None else is_identified
+        self.owner: Optional['Entity'] = None
+
+    @property
+    def name(self) -> str:
+        return self.prototype.name
 
-    def use(self, engine: 'Engine', user: 'Entity'):
+    @property
+    def char(self) -> str:
+        return self.prototype.char
+
+    @property
+    def color(self) -> Tuple[int, int, int]:
+        return self.prototype.color
+
+    @property
+    def use_function(self) -> Optional[Callable]:
+        return self.prototype.use_function
+
+    @property
+    def function_kwargs(self) -> dict:
+        return self.prototype.function_kwargs
+
+    def __getstate__(self):
+        state = {"charges": self.charges, "is_identified": self.is_identified, "owner": self.owner}
+        if self.prototype.id is None:
+            # An old-save item that matches nothing in the data file keeps its own fields
+            prototype = self.prototype
+            state.update(name=prototype.name, char=prototype.char, color=prototype.color,
+                         use_function=prototype.use_function, function_kwargs=prototype.function_kwargs)
+        else:
+            # Saves store the prototype id; the prototype itself comes from the data file.
+            state["prototype"] = self.prototype.id
+        return state
+
+    def __setstate__(self, state):
+        if "prototype" in state:
+            state["prototype"] = ITEMS.get(state["prototype"])
+        else:
+            # Saves from before prototypes pickled every field on the item
+            legacy = {key: state.pop(key) for key in ("name", "char", "color", "use_function", "function_kwargs")}
+            state["prototype"] = ITEMS.find_legacy(legacy["name"], legacy["function_kwargs"]) or ItemPrototype(
+                None, legacy["name"], legacy["char"], legacy["color"],
+                use_function=legacy["use_function"], function_kwargs=legacy["function_kwargs"])
+            state.setdefault("charges", None)
+            state.setdefault("is_identified", state["prototype"].identified)
+        self.__dict__.update(state)
+
+    def use(self, engine: 'Engine', user: 'Entity') -> GameEvent:
+        """Applies the item. The outcome is published and returned; `success` says whether it worked."""
         if self.use_function:
             if not self.is_identified:
                 self.is_identified = True
-                msg_suffix = f" (Identified as {self.name})"
-            else:
-                msg_suffix = ""
+                engine.add_message(ItemIdentifiedEvent(self))
                 
-            msg = self.use_function(self, engine, user, **self.function_kwargs)
+            result = self.use_function(self, engine, user, **self.function_kwargs)
             # Only remove if it's a one-time use item (not a wand with charges)
-            # Check for generic 'use' or 'cast' or 'heal' in message to confirm success
-            success_keywords = ["You use", "You cast", "You read", "restored", "heal"]
-            if self.charges is None and any(k in msg for k in success_keywords) and "wand" not in self.name.lower():
+            if self.charges is None and result.success and "wand" not in self.name.lower():
                 user.inventory.remove_item(self)
-            return msg + msg_suffix
+                engine.add_message(ItemConsumedEvent(self, user))
+            return result
         elif self.owner and self.owner.equippable:
             # Auto-equip if no use function but is equippable
-            return user.inventory.toggle_equip(self.owner)
-        return f"The {self.name} cannot be used."
+            return engine.add_message(user.inventory.toggle_equip(self.owner))
+        return engine.add_message(MessageEvent(f"The {self.name} cannot be used.", success=False))
+
+def find_spell_target(engine: 'Engine', user: 'Entity', spell) -> Tuple[Optional['Entity'], Optional[MessageEvent]]:
+    """Nearest visible monster within the spell's range, or a failure message."""
+    nearest = engine.targeting.nearest(user, spell.range)
+    if nearest:
+        return nearest[0], None
+    if engine.targeting.nearest(user, FOV_RADIUS):
+        return None, MessageEvent(f"Target is too far for {spell.name}.", success=False)
+    return None, MessageEvent("There are no targets in range.", success=False)
 
 def cast_spell(item: 'Item', engine: 'Engine', user: 'Entity', spell_data: dict):
     from spells import Spell
     spell = Spell(spell_data["name"], spell_data["damage_dice"], 
-                  range=spell_data["range"], area=spell_data.get("area", 0))
+                  range=spell_data["range"], area=spell_data.get("area", 0),
+                  shape=spell_data.get("shape", "radius"))
     
     # Find target (nearest monster for now, similar to Wizard casting)
-    monsters = [e for e in engine.entities if e != user and e.fighter]
-    if not monsters:
-        return "No targets in range."
-    
-    nearest = min(monsters, key=lambda m: abs(m.x - user.x) + abs(m.y - user.y))
-    dist = abs(nearest.x - user.x) + abs(nearest.y - user.y)
-    
-    if dist > spell.range:
-        return f"Target is too far for {spell.name}."
+    nearest, failure = find_spell_target(engine, user, spell)
+    if failure:
+        return engine.add_message(failure)
 
-    from sound_manager import SoundManager
-    SoundManager.play_sound("spell")
-    msg = f"You cast {spell.name} from the {item.name}. " + spell.cast(engine, user, nearest)
-    
     # Handle charges for Wands
+    charges_left = None
     if item.charges is not None:
         item.charges -= 1
-        msg += f" ({item.charges} charges left)"
-        if item.charges <= 0:
-            user.inventory.remove_item(item)
-            msg += f" The {item.name} crumbles to dust!"
+        charges_left = item.charges
+    event = engine.add_message(ItemUsedEvent(item, user, verb="cast a spell from", charges_left=charges_left))
+    spell.cast(engine, user, nearest)
     
-    # Handle monster death (copied from engine.py logic for now)
-    if nearest.fighter.hp <= 0:
-        xp_gain = getattr(nearest.fighter, 'xp_value', 50)
-        user.fighter.xp += xp_gain
-        msg += f" {nearest.name} dies! You gain {xp_gain} XP."
-        engine.entities.remove(nearest)
-        
-        from leveling import check_level_up
-        if check_level_up(user):
-            engine.add_message(f"You leveled up to Level {user.fighter.level}!")
-
-    return msg
+    if item.charges is not None and item.charges <= 0:
+        user.inventory.remove_item(item)
+        engine.add_message(ItemConsumedEvent(item, user, crumbled=True))
+    return event
 
 def heal(item: 'Item', engine: 'Engine', user: 'Entity', amount: int, **kwargs):
     if user.fighter.hp >= user.fighter.max_hp:
-        return "You are already at full health."
+        return engine.add_message(MessageEvent("You are already at full health.", success=False))
     
     heal_amount = min(amount, user.fighter.max_hp - user.fighter.hp)
     user.fighter.hp += heal_amount
-    if engine:
-        engine.add_vfx(f"+{heal_amount}", user.x, user.y, (0, 255, 0))
-    from sound_manager import SoundManager
-    SoundManager.play_sound("pickup")
-    return f"You use the potion and heal for {heal_amount} HP!"
+    return engine.add_message(HealEvent(user, heal_amount))
 
 def use_scroll(item: 'Item', engine: 'Engine', user: 'Entity', spell=None, **kwargs):
     """Generic scroll use: find nearest monster and cast stored spell."""
     if spell is None:
-        return "This scroll crumbles without effect."
-    
-    monsters = [e for e in engine.entities if e != user and e.fighter]
-    if not monsters:
-        return "There are no targets in range."
-    
-    nearest = min(monsters, key=lambda m: abs(m.x - user.x) + abs(m.y - user.y))
-    dist = abs(nearest.x - user.x) + abs(nearest.y - user.y)
+        return engine.add_message(MessageEvent("This scroll crumbles without effect.", success=False))
     
-    if dist > spell.range:
-        return f"Target is too far for {spell.name}."
+    nearest, failure = find_spell_target(engine, user, spell)
+    if failure:
+        return engine.add_message(failure)
     
-    from sound_manager import SoundManager
-    SoundManager.play_sound("spell")
-    msg = f"You read the {item.name}. " + spell.cast(engine, user, nearest)
-    
-    # Handle monster death
-    if nearest.fighter.hp <= 0:
-        xp_gain = getattr(nearest.fighter, 'xp_value', 50)
-        user.fighter.xp += xp_gain
-        msg += f" {nearest.name} dies! You gain {xp_gain} XP."
-        if nearest in engine.entities:
-            engine.entities.remove(nearest)
-        from leveling import check_level_up
-        if check_level_up(user):
-            engine.add_message(f"You leveled up to Level {user.fighter.level}!")
-    
-    return msg
+    event = engine.add_message(ItemUsedEvent(item, user, verb="read"))
+    spell.cast(engine, user, nearest)
+    return event
+
+USE_FUNCTIONS = {
+    "heal": heal,
+    "use_scroll": use_scroll,
+}
+
+ITEMS = ItemRegistry()
@@ -1,8 +1,10 @@
 from typing import TYPE_CHECKING
 from dnd_rules import roll_dice
+from events import LevelUpEvent
 
 if TYPE_CHECKING:
     from entity import Entity
+    from engine import Engine
 
 LEVEL_UP_BASE = 200
 LEVEL_UP_FACTOR = 150
@@ -11,11 +13,9 @@ def get_xp_for_level(level: int) -> int:
     if level <= 1: return 0
     return LEVEL_UP_BASE + (level - 2) * LEVEL_UP_FACTOR
 
-def check_level_up(entity: 'Entity') -> bool:
+def check_level_up(entity: 'Entity', engine: 'Engine' = None) -> bool:
     next_level_xp = get_xp_for_level(entity.fighter.level + 1)
     if entity.fighter.xp >= next_level_xp:
-        from sound_manager import SoundManager
-        SoundManager.play_sound("level_up")
         entity.fighter.level += 1
         
         # Rewards
@@ -27,5 +27,7 @@ def check_level_up(entity: 'Entity') -> bool:
         entity.fighter.max_hp += hp_increase
         entity.fighter.hp += hp_increase
         
+        if engine:
+            engine.add_message(LevelUpEvent(entity, entity.fighter.level))
         return True
     return False
@@ -1,5 +1,5 @@
 import pygame
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
 class Tile:
     def __init__(self, char: str, color: tuple, walkable: bool = False, transparent: bool = False):
@@ -8,12 +8,55 @@ class Tile:
         self.walkable = walkable
         self.transparent = transparent
 
+# Tiles are replaced rather than modified, so one wall instance fills every new map
+WALL = Tile("█", (60, 60, 60), walkable=False, transparent=False)
+
 class GameMap:
+    _tile_hash = None # Saves from before state hashing
+
     def __init__(self, width: int, height: int):
         self.width = width
         self.height = height
         # Initialize with walls
-        self.tiles = [[Tile("█", (60, 60, 60), walkable=False, transparent=False) for _ in range(height)] for _ in range(width)]
+        self.tiles = [[WALL] * height for _ in range(width)]
+        # Tiles the player has seen, column-major (x * height + y)
+        self.explored = bytearray(width * height)
+        # Sum of the tiles' state hash parts, computed on first use
+        self._tile_hash: Optional[int] = None
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        if "explored" not in state: # Saves from before explored tracking
+            self.explored = bytearray(self.width * self.height)
+
+    def tile_hash(self) -> int:
+        if self._tile_hash is None:
+            from state_hash import map_hash
+            self._tile_hash = map_hash(self)
+        return self._tile_hash
+
+    def set_tile(self, x: int, y: int, tile: Tile):
+        """Replaces one tile, keeping the tile hash current.
+
+        Generators carve by writing `tiles` directly, before anything has
+        asked for the hash; changes to a finished floor go through here.
+        """
+        if self._tile_hash is not None:
+            from state_hash import tile_part, MASK
+            old = tile_part(self, x, y, self.tiles[x][y])
+            self._tile_hash = (self._tile_hash - old + tile_part(self, x, y, tile)) & MASK
+        self.tiles[x][y] = tile
+
+    def mark_explored(self, cells):
+        explored, height = self.explored, self.height
+        for x, y in cells:
+            explored[x * height + y] = 1
+
+    def is_explored(self, x: int, y: int) -> bool:
+        return bool(self.explored[x * self.height + y])
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
 
     def is_walkable(self, x: int, y: int) -> bool:
         if 0 <= x < self.width and 0 <= y < self.height:
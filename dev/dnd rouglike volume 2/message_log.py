@@ -0,0 +1,94 @@
+from collections import deque
+from typing import Iterable, List, Optional, Tuple, Union
+from events import GameEvent, MessageEvent
+
+VISIBLE_LINES = 5
+HISTORY_LIMIT = 1000
+
+class Message:
+    """One log line. `text` is a GameEvent, which is only formatted when drawn."""
+    def __init__(self, text: GameEvent):
+        self.text = text
+        self.count = 1
+
+    @property
+    def full_text(self) -> str:
+        if self.count > 1:
+            return f"{self.text} x{self.count}"
+        return str(self.text)
+
+    def __getstate__(self):
+        # Events reference live entities; saves only need the finished line.
+        return {"text": str(self.text), "count": self.count}
+
+    def __setstate__(self, state: dict):
+        self.text = MessageEvent(state["text"])
+        self.count = state["count"]
+
+    def repeated_by(self, event: GameEvent) -> bool:
+        if self.text == event:
+            return True
+        # A line restored from a save is plain text, so only the wording can match
+        return type(self.text) is MessageEvent and type(event) is not MessageEvent and self.text.text == str(event)
+
+class MessageLog:
+    """The on-screen message log plus a longer scrollback history.
+
+    Repeats of the newest line are coalesced into one "x3" entry, and the
+    rendered text surfaces are cached until the log changes, so frames
+    between turns don't re-render any text.
+    """
+    def __init__(self, visible_lines: int = VISIBLE_LINES, history_limit: int = HISTORY_LIMIT):
+        self.visible = deque(maxlen=visible_lines)
+        self.history = deque(maxlen=history_limit)
+        self.version = 0
+        self._cache_key: Optional[Tuple[int, int, tuple]] = None
+        self._cache: List = []
+
+    @classmethod
+    def from_lines(cls, lines: Iterable[str]) -> 'MessageLog':
+        log = cls()
+        for line in lines:
+            log.add(line)
+        return log
+
+    def add(self, text: Union[str, GameEvent]):
+        if isinstance(text, str):
+            text = MessageEvent(text)
+        last = self.visible[-1] if self.visible else None
+        if last is not None and last.repeated_by(text):
+            last.count += 1
+        else:
+            message = Message(text)
+            self.visible.append(message)
+            self.history.append(message)
+        self.version += 1
+
+    def clear(self):
+        self.visible.clear()
+        self.history.clear()
+        self.version += 1
+
+    def lines(self) -> List[str]:
+        return [message.full_text for message in self.visible]
+
+    def render(self, font, color: tuple) -> List:
+        """Text surfaces for the visible lines, re-rendered only when the log changed."""
+        key = (self.version, id(font), color)
+        if key != self._cache_key:
+            self._cache = [font.render(line, True, color) for line in self.lines()]
+            self._cache_key = key
+        return self._cache
+
+    def __len__(self) -> int:
+        return len(self.visible)
+
+    def __iter__(self):
+        return iter(self.lines())
+
+    def __getstate__(self):
+        # Surfaces can't be pickled; they are rebuilt on the first frame after loading.
+        state = self.__dict__.copy()
+        state["_cache_key"] = None
+        state["_cache"] = []
+        return state
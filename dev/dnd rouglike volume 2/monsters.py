@@ -1,5 +1,6 @@
 from dnd_rules import Stats
-from typing import Tuple, Optional
+from typing import Dict, List, Tuple, Optional
+from weighted_tables import TABLES, TableSet
 
 class MonsterType:
     def __init__(self, name: str, char: str, color: Tuple[int, int, int], 
@@ -15,6 +16,21 @@ class MonsterType:
         self.xp_value = xp_value
         self.ai_type = ai_type
 
+    def scaled(self, bonus: int) -> 'MonsterType':
+        """A copy with the floor bonus applied to physical stats, HP and AC."""
+        if bonus == 0:
+            return self
+        stats = Stats(
+            self.stats.strength + bonus,
+            self.stats.dexterity + bonus,
+            self.stats.constitution + bonus,
+            self.stats.intelligence,
+            self.stats.wisdom,
+            self.stats.charisma
+        )
+        return MonsterType(self.name, self.char, self.color, self.hp + bonus * 2, self.ac + bonus,
+                           stats, self.damage_dice, self.xp_value, self.ai_type)
+
 def get_kobold():
     return MonsterType(
         name="Kobold",
@@ -92,3 +108,43 @@ def get_orc():
         xp_value=100,
         ai_type="melee"
     )
+
+MONSTER_TYPES = {
+    "kobold": get_kobold,
+    "goblin": get_goblin,
+    "skeleton": get_skeleton,
+    "goblin_archer": get_goblin_archer,
+    "evil_acolyte": get_evil_acolyte,
+    "orc": get_orc,
+}
+
+def level_bonus(dungeon_level: int) -> int:
+    return (dungeon_level - 1) // 2
+
+class MonsterRegistry:
+    """Monster templates, scaled once per floor bonus and shared by every spawn.
+
+    Templates are never modified after they are built; spawned monsters get
+    their own Fighter but share the template's Stats. Spawn weights per
+    floor band come from the "monsters" table in spawn_tables.json.
+    """
+    def __init__(self, types=MONSTER_TYPES, tables: TableSet = TABLES):
+        self.base = {monster_id: factory() for monster_id, factory in types.items()}
+        self.tables = tables
+        self._scaled: Dict[Tuple[str, int], MonsterType] = {}
+
+    def template(self, monster_id: str, dungeon_level: int) -> MonsterType:
+        key = (monster_id, level_bonus(dungeon_level))
+        template = self._scaled.get(key)
+        if template is None:
+            template = self._scaled[key] = self.base[monster_id].scaled(key[1])
+        return template
+
+    def choose(self, dungeon_level: int) -> MonsterType:
+        return self.template(self.tables.for_floor("monsters", dungeon_level).draw(), dungeon_level)
+
+    def choose_many(self, dungeon_level: int, count: int) -> List[MonsterType]:
+        monster_ids = self.tables.for_floor("monsters", dungeon_level).draw_many(count)
+        return [self.template(monster_id, dungeon_level) for monster_id in monster_ids]
+
+MONSTERS = MonsterRegistry()
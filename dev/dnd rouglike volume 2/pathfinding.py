@@ -0,0 +1,72 @@
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
+from map_tiles import GameMap
+from connectivity import walkable_grid
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+Point = Tuple[int, int]
+
+def find_path(game_map: GameMap, start: Point, is_goal: Callable[[int, int], bool],
+              blocked: Iterable[Point] = ()) -> Optional[List[Point]]:
+    """Shortest 4-way path to the nearest tile where `is_goal(x, y)` holds.
+
+    The path excludes `start` and ends on the goal; None if no goal can be
+    reached. `blocked` tiles are walked around.
+    """
+    stride = game_map.height + 2
+    grid = walkable_grid(game_map)
+    for x, y in blocked:
+        grid[(x + 1) * stride + y + 1] = 0
+    origin = (start[0] + 1) * stride + start[1] + 1
+    came_from: Dict[int, int] = {origin: origin}
+    queue = deque([origin])
+    while queue:
+        i = queue.popleft()
+        for n in (i - 1, i + 1, i - stride, i + stride):
+            if not grid[n] or n in came_from:
+                continue
+            came_from[n] = i
+            if is_goal(n // stride - 1, n % stride - 1):
+                path = []
+                while n != origin:
+                    path.append((n // stride - 1, n % stride - 1))
+                    n = came_from[n]
+                path.reverse()
+                return path
+            queue.append(n)
+    return None
+
+def travel_obstacles(engine: 'Engine') -> Set[Point]:
+    """Tiles travel routes around: anything solid and known traps.
+
+    Barrels are not in the way; walking into one smashes it, and the next
+    step goes through.
+    """
+    return {(e.x, e.y) for e in engine.entities
+            if e is not engine.player and (e.blocks_movement or (e.hazard and e.hazard.is_revealed))}
+
+def first_step(engine: 'Engine', path: Optional[List[Point]]) -> Optional[Point]:
+    if not path:
+        return None
+    x, y = path[0]
+    return x - engine.player.x, y - engine.player.y
+
+def explore_step(engine: 'Engine') -> Optional[Point]:
+    """Direction towards the nearest unexplored floor tile, or None when there is none."""
+    game_map = engine.game_map
+    explored, height = game_map.explored, game_map.height
+    path = find_path(game_map, (engine.player.x, engine.player.y),
+                     lambda x, y: not explored[x * height + y], travel_obstacles(engine))
+    return first_step(engine, path)
+
+def travel_step(engine: 'Engine', goal: Point) -> Optional[Point]:
+    """Direction of the next step towards `goal`, or None if it's reached or unreachable."""
+    if (engine.player.x, engine.player.y) == goal:
+        return None
+    blocked = travel_obstacles(engine)
+    blocked.discard(goal)
+    path = find_path(engine.game_map, (engine.player.x, engine.player.y),
+                     lambda x, y: (x, y) == goal, blocked)
+    return first_step(engine, path)
@@ -0,0 +1,199 @@
+"""Input recording and deterministic replay.
+
+Every new run is recorded to REPLAY_FILE: a header with the run seed and
+class, then one line per input command (key press or mouse click) with the
+frame it arrived on and the state hash it led to. Replaying feeds the
+commands back through the same `EventHandler`, so the run plays out exactly
+as it did, and the hashes show the first command where it didn't.
+
+Usage:
+    python replay.py [last_run.replay] [--realtime]
+
+By default the replay runs headless at maximum speed and prints where the
+run ended up; `--realtime` opens the window and plays it back at the
+recorded pace.
+"""
+import os
+import sys
+import gzip
+import json
+import zlib
+from collections import deque
+from typing import List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+REPLAY_FILE = "last_run.replay"
+REPLAY_VERSION = 2
+# Commands store the low bits of the state hash they led to
+CHECK_MASK = 0xFFFFFFFF
+
+class Command:
+    """One input-level command: a key press or a mouse click."""
+    KEY = "k"
+    CLICK = "m"
+
+    def __init__(self, frame: int, kind: str, key: int = 0, unicode: str = "",
+                 pos: Tuple[int, int] = (0, 0), button: int = 0, check: Optional[int] = None):
+        self.frame = frame
+        self.check = check # Low bits of the state hash after the command
+        self.kind = kind
+        self.key = key
+        self.unicode = unicode
+        self.pos = pos
+        self.button = button
+
+    @classmethod
+    def from_event(cls, event, frame: int) -> Optional['Command']:
+        """The command for a pygame event, or None if it isn't player input."""
+        import pygame
+        if event.type == pygame.KEYDOWN:
+            return cls(frame, cls.KEY, key=event.key, unicode=event.unicode)
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            return cls(frame, cls.CLICK, pos=tuple(event.pos), button=event.button)
+        return None
+
+    def to_event(self):
+        import pygame
+        if self.kind == self.KEY:
+            return pygame.event.Event(pygame.KEYDOWN, key=self.key, unicode=self.unicode, mod=0)
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=self.pos, button=self.button)
+
+    def to_record(self) -> list:
+        if self.kind == self.KEY:
+            return [self.frame, self.kind, self.key, self.unicode, self.check]
+        return [self.frame, self.kind, self.pos[0], self.pos[1], self.button, self.check]
+
+    @classmethod
+    def from_record(cls, record: list) -> 'Command':
+        # Version 1 recordings have no check
+        if record[1] == cls.KEY:
+            check = record[4] if len(record) > 4 else None
+            return cls(record[0], cls.KEY, key=record[2], unicode=record[3], check=check)
+        check = record[5] if len(record) > 5 else None
+        return cls(record[0], cls.CLICK, pos=(record[2], record[3]), button=record[4], check=check)
+
+class ReplayRecorder:
+    """Writes one run's commands to a gzipped JSON-lines file as they happen.
+
+    Every command is flushed straight away, so the file survives a crash;
+    reproducing the crash is the point.
+    """
+    def __init__(self, path: str, seed: int, class_name: str, start_frame: int):
+        self.path = path
+        self.start_frame = start_frame
+        self.count = 0
+        self._file = gzip.open(path, "wb")
+        self._write({"version": REPLAY_VERSION, "seed": seed, "class": class_name})
+
+    def record(self, command: Command, state_hash: int):
+        command.check = state_hash & CHECK_MASK
+        record = command.to_record()
+        record[0] -= self.start_frame # Frames count from the start of the run
+        self._write(record)
+        self.count += 1
+
+    def _write(self, data):
+        self._file.write(json.dumps(data, separators=(",", ":")).encode("utf-8") + b"\n")
+        self._file.flush(zlib.Z_SYNC_FLUSH)
+
+    def close(self):
+        self._file.close()
+
+def load_replay(path: str) -> Tuple[dict, List[Command]]:
+    """The header and commands of a replay file.
+
+    A file cut short by a crash still loads up to its last complete command.
+    """
+    header, commands = None, []
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        try:
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                data = json.loads(line)
+                if header is None:
+                    header = data
+                else:
+                    commands.append(Command.from_record(data))
+        except EOFError:
+            pass
+    if header is None or header.get("version") not in (1, REPLAY_VERSION):
+        raise ValueError(f"{path} is not a replay file")
+    return header, commands
+
+def start_replay(engine: 'Engine', header: dict):
+    """Starts the recorded run: same class, same seed."""
+    selected = next((c for c in engine.available_classes if c.name == header["class"]), None)
+    if selected is None:
+        raise ValueError(f"Unknown class {header['class']!r} in replay")
+    engine.start_game(selected, seed=header["seed"])
+
+def play_fast(engine: 'Engine', commands: List[Command]) -> Tuple[int, Optional[int]]:
+    """Feeds every command straight through the input handler.
+
+    Returns how many commands ran and the index of the first one whose
+    state hash didn't match the recording (None if they all did); playback
+    stops there.
+    """
+    handler = engine.event_handler
+    for index, command in enumerate(commands):
+        handler.handle_event(command.to_event())
+        if command.check is not None and engine.state_hash.value & CHECK_MASK != command.check:
+            return index + 1, index
+        if not engine.running:
+            return index + 1, None
+    return len(commands), None
+
+def play_realtime(engine: 'Engine', commands: List[Command]):
+    """Hands the commands to the running game loop, which applies each on its recorded frame."""
+    engine.event_handler.playback = deque(commands)
+    engine.event_handler.playback_start = engine.frame
+    engine.run()
+
+def main(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="Replay a recorded run.")
+    parser.add_argument("path", nargs="?", default=REPLAY_FILE)
+    parser.add_argument("--realtime", action="store_true", help="render the replay at the recorded pace")
+    args = parser.parse_args(argv)
+
+    header, commands = load_replay(args.path)
+    if not args.realtime:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    import engine as engine_module
+    from engine import Engine
+    from save_manager import SaveManager
+    from floor_cache import FloorCache
+    # A replay must never overwrite the player's save, floors or recording
+    SaveManager.SAVE_FILE = "replay_savegame.sav"
+    FloorCache.ROOT = "replay_floor_cache"
+    engine_module.LOGGING_ENABLED = False
+
+    engine = Engine(headless=not args.realtime, record_replays=False)
+    start_replay(engine, header)
+    print(f"Replaying {len(commands)} commands (seed {header['seed']}, {header['class']})...")
+    if args.realtime:
+        play_realtime(engine, commands)
+        return 0
+
+    import time
+    start = time.perf_counter()
+    played, desync = play_fast(engine, commands)
+    elapsed = time.perf_counter() - start
+    player = engine.player
+    print(f"{played} commands in {elapsed:.2f} s; state {engine.state.name}, floor {engine.dungeon_level}, "
+          f"turn {engine.turn}, HP {player.fighter.hp}/{player.fighter.max_hp}, "
+          f"position ({player.x}, {player.y}), state hash {engine.state_hash.value:016x}")
+    if desync is not None:
+        print(f"DESYNC at command {desync}: state hash {engine.state_hash.value & CHECK_MASK:08x}, "
+              f"recorded {commands[desync].check:08x}")
+    SaveManager.delete_save()
+    engine.floor_cache.discard()
+    return 1 if desync is not None else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
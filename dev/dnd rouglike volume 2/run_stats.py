@@ -0,0 +1,96 @@
+from collections import Counter
+from events import (EventBus, AttackEvent, DamageEvent, DeathEvent, XPGainedEvent,
+                    LevelUpEvent, HealEvent, ItemConsumedEvent, TrapTriggeredEvent)
+
+class RunStatistics:
+    """Per-run combat and loot counters, fed entirely by the event bus."""
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.attacks = 0
+        self.hits = 0
+        self.misses = 0
+        self.critical_hits = 0
+        self.damage_dealt = 0
+        self.damage_taken = 0
+        self.healing = 0
+        self.xp_gained = 0
+        self.gold_looted = 0
+        self.levels_gained = 0
+        self.items_consumed = 0
+        self.traps_triggered = 0
+        self.kills = Counter() # Monster name -> count
+
+    def subscribe(self, bus: EventBus, player_getter):
+        """`player_getter` returns the current player, which changes between runs."""
+        self._player = player_getter
+        bus.subscribe(AttackEvent, self.on_attack)
+        bus.subscribe(DamageEvent, self.on_damage)
+        bus.subscribe(DeathEvent, self.on_death)
+        bus.subscribe(XPGainedEvent, self.on_xp)
+        bus.subscribe(LevelUpEvent, self.on_level_up)
+        bus.subscribe(HealEvent, self.on_heal)
+        bus.subscribe(ItemConsumedEvent, self.on_item_consumed)
+        bus.subscribe(TrapTriggeredEvent, self.on_trap)
+
+    def on_attack(self, event: AttackEvent):
+        self.attacks += 1
+        if event.hit:
+            self.hits += 1
+            if event.critical:
+                self.critical_hits += 1
+        else:
+            self.misses += 1
+
+    def on_damage(self, event: DamageEvent):
+        if event.target is self._player():
+            self.damage_taken += event.amount
+        else:
+            self.damage_dealt += event.amount
+
+    def on_death(self, event: DeathEvent):
+        if event.entity is not self._player():
+            self.kills[event.entity.name] += 1
+
+    def on_xp(self, event: XPGainedEvent):
+        self.xp_gained += event.xp
+        self.gold_looted += event.gold
+
+    def on_level_up(self, event: LevelUpEvent):
+        self.levels_gained += 1
+
+    def on_heal(self, event: HealEvent):
+        self.healing += event.amount
+
+    def on_item_consumed(self, event: ItemConsumedEvent):
+        self.items_consumed += 1
+
+    def on_trap(self, event: TrapTriggeredEvent):
+        self.traps_triggered += 1
+
+    def summary(self) -> dict:
+        return {
+            "attacks": self.attacks,
+            "hits": self.hits,
+            "misses": self.misses,
+            "critical_hits": self.critical_hits,
+            "damage_dealt": self.damage_dealt,
+            "damage_taken": self.damage_taken,
+            "healing": self.healing,
+            "xp_gained": self.xp_gained,
+            "gold_looted": self.gold_looted,
+            "levels_gained": self.levels_gained,
+            "items_consumed": self.items_consumed,
+            "traps_triggered": self.traps_triggered,
+            "kills": dict(self.kills),
+        }
+
+    def restore(self, summary: dict):
+        """Loads counters saved with `summary()`."""
+        self.reset()
+        for name, value in summary.items():
+            if name == "kills":
+                self.kills = Counter(value)
+            elif hasattr(self, name):
+                setattr(self, name, value)
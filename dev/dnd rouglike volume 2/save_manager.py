@@ -9,13 +9,20 @@ class SaveManager:
     def save_game(cls, engine) -> bool:
         """Serializes the current game state to a file."""
         try:
+            # Other floors live in the run's floor cache; make sure it's all on disk
+            engine.floor_cache.flush()
             save_data = {
                 "player": engine.player,
                 "entities": engine.entities,
                 "game_map": engine.game_map,
                 "message_log": engine.message_log,
                 "dungeon_level": engine.dungeon_level,
-                "player_class": engine.player_class
+                "player_class": engine.player_class,
+                "statistics": engine.statistics.summary(),
+                "floor_cache": engine.floor_cache,
+                "turn": engine.turn,
+                # Checked on load to catch saves that don't restore the same state
+                "state_hash": engine.state_hash.value
             }
             with open(cls.SAVE_FILE, "wb") as f:
                 pickle.dump(save_data, f)
@@ -0,0 +1,169 @@
+import random
+from typing import List, Optional, Tuple, TYPE_CHECKING
+from map_tiles import GameMap, Tile
+from constants import GameState
+from procgen import (Room, create_h_tunnel, create_v_tunnel, choose_monster, create_monster,
+                     create_item, create_gold, create_trap, create_barrel)
+
+if TYPE_CHECKING:
+    from engine import Engine
+
+# Densities are per walkable tile. Normal floors land around these values.
+DEFAULT_MONSTER_DENSITY = 0.02
+DEFAULT_ITEM_DENSITY = 0.01
+DEFAULT_TRAP_DENSITY = 0.005
+DEFAULT_BARREL_DENSITY = 0.005
+DEFAULT_GOLD_DENSITY = 0.005
+
+GRID_CELL = 12 # Room layout: one room per GRID_CELL x GRID_CELL block
+# "bsp" and "caves" carve the map with the real floor generators
+SCENARIO_LAYOUTS = ("rooms", "open", "bsp", "caves")
+
+class StressScenario:
+    """Recipe for an arbitrarily large floor, for scaling tests.
+
+    `new_floor` never goes past 45x35; this builds floors of any size with
+    configurable entity densities and loads them straight into an Engine.
+    Exact `*_count` values override the matching density.
+    """
+    def __init__(self, width: int, height: int, layout: str = "rooms",
+                 monster_density: float = DEFAULT_MONSTER_DENSITY,
+                 item_density: float = DEFAULT_ITEM_DENSITY,
+                 trap_density: float = DEFAULT_TRAP_DENSITY,
+                 barrel_density: float = DEFAULT_BARREL_DENSITY,
+                 gold_density: float = DEFAULT_GOLD_DENSITY,
+                 monster_count: Optional[int] = None,
+                 item_count: Optional[int] = None,
+                 dungeon_level: int = 1,
+                 seed: Optional[int] = None):
+        if layout not in SCENARIO_LAYOUTS:
+            raise ValueError(f"Unknown scenario layout: {layout}")
+        self.width = width
+        self.height = height
+        self.layout = layout
+        self.monster_density = monster_density
+        self.item_density = item_density
+        self.trap_density = trap_density
+        self.barrel_density = barrel_density
+        self.gold_density = gold_density
+        self.monster_count = monster_count
+        self.item_count = item_count
+        self.dungeon_level = dungeon_level
+        self.seed = seed
+
+    def build(self, engine: 'Engine') -> GameMap:
+        """Generates the floor and loads it into `engine` (player must already exist)."""
+        rng_state = None
+        if self.seed is not None:
+            rng_state = random.getstate()
+            random.seed(self.seed)
+        try:
+            if self.layout == "open":
+                game_map = build_open_map(self.width, self.height)
+            elif self.layout in ("bsp", "caves"):
+                from generators import GENERATORS
+                game_map, _ = GENERATORS[self.layout]().carve(self.width, self.height)
+            else:
+                game_map = build_room_grid_map(self.width, self.height)
+
+            floor_cells = walkable_cells(game_map)
+            random.shuffle(floor_cells)
+            px, py = nearest_walkable(floor_cells, self.width // 2, self.height // 2)
+
+            engine.dungeon_level = self.dungeon_level
+            engine.game_map = game_map
+            engine.player.x, engine.player.y = px, py
+            engine.entities = [engine.player]
+            engine.state = GameState.PLAYING
+
+            # Shuffled floor cells are handed out in order so nothing stacks
+            free = (cell for cell in floor_cells if cell != (px, py))
+            total = len(floor_cells)
+            for count, factory in (
+                (self._count(self.monster_count, self.monster_density, total), self._monster),
+                (self._count(self.item_count, self.item_density, total), self._item),
+                (self._count(None, self.trap_density, total), create_trap),
+                (self._count(None, self.barrel_density, total), create_barrel),
+                (self._count(None, self.gold_density, total), self._gold),
+            ):
+                for _ in range(count):
+                    cell = next(free, None)
+                    if cell is None:
+                        break
+                    engine.entities.append(factory(*cell))
+
+            stairs_x, stairs_y = next(free, (px, py))
+            from entity import Entity
+            engine.entities.append(Entity(stairs_x, stairs_y, ">", (255, 255, 255), "Stairs", stairs=True))
+            # Monster line of sight reads engine.visible, and the old floor's effects are gone
+            engine.effects.reset(engine.turn)
+            engine.effects.track(engine.entities)
+            engine.recompute_fov()
+            return game_map
+        finally:
+            if rng_state is not None:
+                random.setstate(rng_state)
+
+    @staticmethod
+    def _count(exact: Optional[int], density: float, total: int) -> int:
+        return exact if exact is not None else int(total * density)
+
+    def _monster(self, x: int, y: int):
+        return create_monster(choose_monster(self.dungeon_level), x, y)
+
+    def _item(self, x: int, y: int):
+        return create_item(x, y)
+
+    def _gold(self, x: int, y: int):
+        return create_gold(x, y, random.randint(5, 15) * self.dungeon_level)
+
+def build_open_map(width: int, height: int) -> GameMap:
+    """One big room: everything but the outer wall is floor."""
+    game_map = GameMap(width, height)
+    floor = Tile(".", (50, 50, 50), walkable=True, transparent=True)
+    for x in range(1, width - 1):
+        column = game_map.tiles[x]
+        for y in range(1, height - 1):
+            column[y] = floor
+    return game_map
+
+def build_room_grid_map(width: int, height: int) -> GameMap:
+    """A room in every GRID_CELL block, joined to its right and lower neighbours.
+
+    Unlike the rooms generator there is no rejection sampling, so building
+    cost stays linear in the map area.
+    """
+    game_map = GameMap(width, height)
+    floor = Tile(".", (50, 50, 50), walkable=True, transparent=True)
+    cols = max(1, (width - 1) // GRID_CELL)
+    rows = max(1, (height - 1) // GRID_CELL)
+    cell_w = (width - 1) // cols
+    cell_h = (height - 1) // rows
+    centers = {}
+    for cx in range(cols):
+        for cy in range(rows):
+            w = random.randint(max(3, cell_w // 2), max(3, cell_w - 1))
+            h = random.randint(max(3, cell_h // 2), max(3, cell_h - 1))
+            x = cx * cell_w + random.randint(0, max(0, cell_w - w - 1))
+            y = cy * cell_h + random.randint(0, max(0, cell_h - h - 1))
+            room = Room(x, y, min(w, width - x - 1), min(h, height - y - 1))
+            for rx in range(room.x1 + 1, room.x2):
+                column = game_map.tiles[rx]
+                for ry in range(room.y1 + 1, room.y2):
+                    column[ry] = floor
+            centers[(cx, cy)] = room.center
+
+    for (cx, cy), (x, y) in centers.items():
+        for neighbour in ((cx + 1, cy), (cx, cy + 1)):
+            if neighbour in centers:
+                nx, ny = centers[neighbour]
+                create_h_tunnel(game_map, x, nx, y)
+                create_v_tunnel(game_map, y, ny, nx)
+    return game_map
+
+def walkable_cells(game_map: GameMap) -> List[Tuple[int, int]]:
+    return [(x, y) for x in range(game_map.width) for y in range(game_map.height)
+            if game_map.tiles[x][y].walkable]
+
+def nearest_walkable(cells: List[Tuple[int, int]], x: int, y: int) -> Tuple[int, int]:
+    return min(cells, key=lambda c: abs(c[0] - x) + abs(c[1] - y))
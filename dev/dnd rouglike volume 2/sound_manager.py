@@ -1,10 +1,52 @@
 import pygame
 import os
-from typing import Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+SOUND_DIR = "assets/sounds"
+# Name -> (file, priority); a busy channel is taken over only by a louder-priority sound
+SOUNDS: Dict[str, Tuple[str, int]] = {
+    "death": ("death.wav", 9),
+    "level_up": ("level_up.wav", 8),
+    "stairs": ("stairs.wav", 7),
+    "trap": ("trap.wav", 6),
+    "spell": ("spell.wav", 5),
+    "hit": ("hit.wav", 4),
+    "pickup": ("pickup.wav", 3),
+    "interact": ("interact.wav", 3),
+    "miss": ("miss.wav", 2),
+}
+# Mixer channels reserved for sound effects
+CHANNEL_COUNT = 8
+
+class SoundCounters:
+    def __init__(self):
+        self.played = 0
+        self.merged = 0 # Repeats of a sound already requested this frame
+        self.dropped = 0 # Not loaded yet, missing, or no channel free for its priority
+        self.preempted = 0 # Lower-priority sounds cut off to make room
+
+    def summary(self) -> dict:
+        return dict(self.__dict__)
 
 class SoundManager:
+    """Sound effects and music.
+
+    Effects are decoded on a background thread the first time they're
+    needed (or when `preload` asks), so startup doesn't wait on the disk.
+    `play_sound` only queues a request; `flush`, once per frame, plays each
+    queued sound once however many times it was asked for, on a fixed pool
+    of channels where higher-priority sounds can cut off lower ones.
+    """
     _instance = None
     _sounds: Dict[str, pygame.mixer.Sound] = {}
+    _loading: Dict[str, Future] = {}
+    _paths: Dict[str, str] = {}
+    _loader: Optional[ThreadPoolExecutor] = None
+    _pending: Dict[str, int] = {} # Requested this frame: name -> priority
+    _channels: List[Tuple[pygame.mixer.Channel, int]] = []
+    counters = SoundCounters()
+    _music_file: Optional[str] = None # What pygame.mixer.music has loaded
     _music_volume = 0.5
     _sfx_volume = 0.7
 
@@ -19,27 +61,125 @@ class SoundManager:
 
     @classmethod
     def load_sound(cls, name: str, filename: str):
-        """Loads a sound effect if the file exists."""
+        """Registers a sound effect; it is decoded in the background on first use."""
         if os.path.exists(filename):
-            try:
-                sound = pygame.mixer.Sound(filename)
-                sound.set_volume(cls._sfx_volume)
-                cls._sounds[name] = sound
-            except Exception as e:
-                print(f"Could not load sound {filename}: {e}")
+            cls._paths[name] = filename
+
+    @classmethod
+    def _decode(cls, name: str, filename: str) -> Optional[pygame.mixer.Sound]:
+        try:
+            sound = pygame.mixer.Sound(filename)
+            sound.set_volume(cls._sfx_volume)
+            cls._sounds[name] = sound
+            return sound
+        except Exception as e:
+            print(f"Could not load sound {filename}: {e}")
+            return None
+
+    @classmethod
+    def request_load(cls, name: str) -> Optional[Future]:
+        """Starts decoding `name` if it isn't loaded or loading; the future gives the Sound."""
+        if name not in cls._paths:
+            return None
+        if name not in cls._loading:
+            if cls._loader is None:
+                cls._loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sound-loader")
+            cls._loading[name] = cls._loader.submit(cls._decode, name, cls._paths[name])
+        return cls._loading[name]
+
+    @classmethod
+    def preload(cls, names=None) -> List[Future]:
+        """Starts decoding `names` (default: every registered sound); returns their futures."""
+        loading = [cls.request_load(name) for name in (names if names is not None else list(cls._paths))]
+        return [future for future in loading if future]
 
     @classmethod
-    def play_sound(cls, name: str):
-        """Plays a loaded sound effect."""
-        if name in cls._sounds:
-            cls._sounds[name].play()
+    def play_sound(cls, name: str, priority: Optional[int] = None):
+        """Queues a sound effect for this frame (see `flush`)."""
+        if name not in cls._paths:
+            return
+        if name in cls._pending:
+            cls.counters.merged += 1
+            return
+        cls._pending[name] = priority if priority is not None else SOUNDS.get(name, ("", 0))[1]
+        cls.request_load(name)
+
+    @classmethod
+    def flush(cls):
+        """Plays the sounds queued since the last frame, highest priority first."""
+        if not cls._pending:
+            return
+        pending = sorted(cls._pending.items(), key=lambda request: -request[1])
+        cls._pending.clear()
+        for name, priority in pending:
+            sound = cls._sounds.get(name)
+            channel = cls._channel_for(priority) if sound else None
+            if channel is None:
+                cls.counters.dropped += 1
+                continue
+            channel.play(sound)
+            cls.counters.played += 1
+
+    @classmethod
+    def _channel_for(cls, priority: int) -> Optional[pygame.mixer.Channel]:
+        if not cls._channels:
+            if not pygame.mixer.get_init():
+                return None
+            pygame.mixer.set_num_channels(max(pygame.mixer.get_num_channels(), CHANNEL_COUNT))
+            cls._channels = [(pygame.mixer.Channel(i), 0) for i in range(CHANNEL_COUNT)]
+        lowest = None
+        for i, (channel, playing) in enumerate(cls._channels):
+            if not channel.get_busy():
+                cls._channels[i] = (channel, priority)
+                return channel
+            if playing < priority and (lowest is None or playing < cls._channels[lowest][1]):
+                lowest = i
+        if lowest is None:
+            return None
+        channel = cls._channels[lowest][0]
+        channel.stop()
+        cls.counters.preempted += 1
+        cls._channels[lowest] = (channel, priority)
+        return channel
+
+    @classmethod
+    def shutdown(cls):
+        """Stops the loader thread, abandoning sounds that haven't started decoding."""
+        if cls._loader is not None:
+            cls._loader.shutdown(wait=False, cancel_futures=True)
+            cls._loader = None
+            cls._loading = {name: future for name, future in cls._loading.items() if future.done()}
+
+    @classmethod
+    def subscribe(cls, bus):
+        """Plays the matching sound effect for game events published on `bus`."""
+        from events import AttackEvent, LevelUpEvent, HealEvent, TrapTriggeredEvent, ItemUsedEvent
+        bus.subscribe(AttackEvent, lambda e: cls.play_sound("hit" if e.hit else "miss"))
+        bus.subscribe(LevelUpEvent, lambda e: cls.play_sound("level_up"))
+        bus.subscribe(HealEvent, lambda e: cls.play_sound("pickup"))
+        bus.subscribe(TrapTriggeredEvent, lambda e: cls.play_sound("trap"))
+        bus.subscribe(ItemUsedEvent, lambda e: cls.play_sound("spell"))
+
+    @classmethod
+    def load_music(cls, filename: str) -> bool:
+        """Opens a music file ahead of `play_music`, which then starts at once."""
+        if cls._music_file == filename:
+            return True
+        if not os.path.exists(filename) or not pygame.mixer.get_init():
+            return False
+        try:
+            pygame.mixer.music.load(filename)
+        except Exception as e:
+            print(f"Could not load music {filename}: {e}")
+            return False
+        cls._music_file = filename
+        return True
 
     @classmethod
     def play_music(cls, filename: str, loops: int = -1):
         """Plays background music if the file exists."""
-        if os.path.exists(filename):
+        if cls.load_music(filename):
             try:
-                pygame.mixer.music.load(filename)
                 pygame.mixer.music.set_volume(cls._music_volume)
                 pygame.mixer.music.play(loops)
             except Exception as e:
@@ -52,7 +192,7 @@ class SoundManager:
     @classmethod
     def set_sfx_volume(cls, volume: float):
         cls._sfx_volume = volume
-        for sound in cls._sounds.values():
+        for sound in list(cls._sounds.values()):
             sound.set_volume(volume)
 
     @classmethod
@@ -63,20 +203,12 @@ class SoundManager:
 
     @classmethod
     def init_sounds(cls):
-        """Pre-loads default game sounds if they exist."""
+        """Finds the default game sounds; nothing is decoded until it's needed."""
         # Folder structure for sounds
-        sound_dir = "assets/sounds"
+        sound_dir = SOUND_DIR
         if not os.path.exists(sound_dir):
             os.makedirs(sound_dir, exist_ok=True)
             return # Exit if we just created the dir (it's empty)
 
-        # Examples of sounds we might look for
-        cls.load_sound("hit", os.path.join(sound_dir, "hit.wav"))
-        cls.load_sound("miss", os.path.join(sound_dir, "miss.wav"))
-        cls.load_sound("pickup", os.path.join(sound_dir, "pickup.wav"))
-        cls.load_sound("level_up", os.path.join(sound_dir, "level_up.wav"))
-        cls.load_sound("death", os.path.join(sound_dir, "death.wav"))
-        cls.load_sound("spell", os.path.join(sound_dir, "spell.wav"))
-        cls.load_sound("stairs", os.path.join(sound_dir, "stairs.wav"))
-        cls.load_sound("trap", os.path.join(sound_dir, "trap.wav"))
-        cls.load_sound("interact", os.path.join(sound_dir, "interact.wav"))
+        for name, (filename, _) in SOUNDS.items():
+            cls.load_sound(name, os.path.join(sound_dir, filename))
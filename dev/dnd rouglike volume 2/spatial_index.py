@@ -0,0 +1,87 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from entity import Entity
+
+Point = Tuple[int, int]
+
+class SpatialIndex:
+    """The current floor's entities bucketed by tile.
+
+    It follows the engine's entity list the same way the StateHash does:
+    entities join and leave through TrackedEntities, and moves arrive
+    through `mark`. Like the hash it is lazy; entities that were added or
+    moved are (re)filed the next time the index is queried, so floors that
+    are generated and never played cost nothing.
+    """
+    def __init__(self):
+        self._cells: Dict[Point, List['Entity']] = {}
+        self._position: Dict['Entity', Optional[Point]] = {}
+        self._moved: Set['Entity'] = set()
+        self._version = 0 # Bumped whenever an entity is filed, moved or removed
+
+    @property
+    def version(self) -> int:
+        """Changes whenever any entity's tile does; results keyed on it stay valid until then."""
+        self._flush()
+        return self._version
+
+    def reset(self, entities: Iterable['Entity']):
+        self._cells.clear()
+        self._position.clear()
+        self._moved.clear()
+        self._version += 1
+        for entity in entities:
+            self.add(entity)
+
+    def add(self, entity: 'Entity'):
+        if entity not in self._position:
+            self._position[entity] = None # Filed on the next query
+            self._moved.add(entity)
+
+    def remove(self, entity: 'Entity'):
+        if entity not in self._position:
+            return
+        cell = self._position.pop(entity)
+        self._moved.discard(entity)
+        self._version += 1
+        if cell is not None:
+            self._unfile(entity, cell)
+
+    def mark(self, entity: 'Entity'):
+        if entity in self._position:
+            self._moved.add(entity)
+
+    def _unfile(self, entity: 'Entity', cell: Point):
+        bucket = self._cells[cell]
+        bucket.remove(entity) # Buckets hold a handful of entities at most
+        if not bucket:
+            del self._cells[cell]
+
+    def _flush(self):
+        for entity in self._moved:
+            old = self._position[entity]
+            new = (entity.x, entity.y)
+            if old == new:
+                continue
+            if old is not None:
+                self._unfile(entity, old)
+            self._cells.setdefault(new, []).append(entity)
+            self._position[entity] = new
+            self._version += 1
+        self._moved.clear()
+
+    def at(self, x: int, y: int) -> List['Entity']:
+        """Entities on one tile."""
+        self._flush()
+        return list(self._cells.get((x, y), ()))
+
+    def in_cells(self, cells: Iterable[Point]) -> List['Entity']:
+        """Entities on any of `cells`, in the order the cells are given."""
+        self._flush()
+        found = []
+        for cell in cells:
+            bucket = self._cells.get(cell)
+            if bucket:
+                found.extend(bucket)
+        return found
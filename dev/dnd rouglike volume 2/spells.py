@@ -1,18 +1,21 @@
 from typing import List, TYPE_CHECKING
 from dnd_rules import roll_dice
+from events import SpellDamageEvent, StatusAppliedEvent
+from area_effects import entities_in_area
 
 if TYPE_CHECKING:
     from entity import Entity
     from engine import Engine
 
 class Spell:
-    def __init__(self, name: str, damage_dice: str, range: int, area: int = 0):
+    def __init__(self, name: str, damage_dice: str, range: int, area: int = 0, shape: str = "radius"):
         self.name = name
         self.damage_dice = damage_dice
         self.range = range
         self.area = area
+        self.shape = shape # See area_effects.SHAPES; only used when area > 0
 
-    def cast(self, engine: 'Engine', caster: 'Entity', target: 'Entity') -> str:
+    def cast(self, engine: 'Engine', caster: 'Entity', target: 'Entity') -> SpellDamageEvent:
         # Parse dice strings like "3d6" or "1d4+1"
         dice_part = self.damage_dice.split('+')[0].split('-')[0]
         bonus = 0
@@ -24,40 +27,15 @@ class Spell:
         damage = roll_dice(num, sides) + bonus
         
         if self.area > 0:
-            # Area effect
-            hit_entities = []
-            for entity in engine.entities[:]: # Copy list for safe removal
-                if entity != caster and entity.fighter:
-                    dist = abs(entity.x - target.x) + abs(entity.y - target.y)
-                    if dist <= self.area:
-                        entity.fighter.take_damage(damage, engine)
-                        hit_entities.append(entity.name)
-                        if entity.fighter.hp <= 0:
-                            xp_gain = getattr(entity.fighter, 'xp_value', 50)
-                            caster.fighter.xp += xp_gain
-                            engine.entities.remove(entity)
-            
-            from leveling import check_level_up
-            if check_level_up(caster):
-                engine.add_message(f"You leveled up to Level {caster.fighter.level}!")
-                
-            return f"The {self.name} explodes! Hit: {', '.join(hit_entities)} for {damage} damage!"
+            hit_entities = entities_in_area(engine, caster, target, self.shape, self.area)
         else:
-            # Single target
-            target.fighter.take_damage(damage, engine)
-            msg = f"{caster.name} casts {self.name} on {target.name} for {damage} damage!"
-            
-            if target.fighter.hp <= 0:
-                xp_gain = getattr(target.fighter, 'xp_value', 50)
-                caster.fighter.xp += xp_gain
-                msg += f" {target.name} dies! You gain {xp_gain} XP."
-                engine.entities.remove(target)
-                
-                from leveling import check_level_up
-                if check_level_up(caster):
-                    engine.add_message(f"You leveled up to Level {caster.fighter.level}!")
-            
-            return msg
+            hit_entities = [target]
+        # Damage lands on everyone before anyone is removed, then the dead go together
+        for entity in hit_entities:
+            entity.fighter.take_damage(damage, engine)
+        event = engine.add_message(SpellDamageEvent(caster, self.name, hit_entities, damage, area=self.area > 0))
+        engine.handle_kills(caster, [e for e in hit_entities if e.fighter.hp <= 0])
+        return event
 
 class StatusSpell(Spell):
     def __init__(self, name: str, status_name: str, duration: int, range: int):
@@ -65,9 +43,9 @@ class StatusSpell(Spell):
         self.status_name = status_name
         self.duration = duration
 
-    def cast(self, engine: 'Engine', caster: 'Entity', target: 'Entity') -> str:
-        target.fighter.status_effects[self.status_name] = self.duration
-        return f"{caster.name} casts {self.name} on {target.name}! {target.name} is now {self.status_name} for {self.duration} turns."
+    def cast(self, engine: 'Engine', caster: 'Entity', target: 'Entity') -> StatusAppliedEvent:
+        engine.effects.apply(target.fighter, self.status_name, self.duration)
+        return engine.add_message(StatusAppliedEvent(caster, target, self.status_name, self.duration, source=self.name))
 
 def BlindSpell():
     return StatusSpell("Blind", "Blind", 5, 6)
@@ -83,3 +61,9 @@ def FireballSpell():
 
 def MagicMissileSpell():
     return Spell("Magic Missile", "1d4+1", range=5)
+
+def LightningBoltSpell():
+    return Spell("Lightning Bolt", "3d6", range=6, area=8, shape="line")
+
+def ConeOfColdSpell():
+    return Spell("Cone of Cold", "2d8", range=4, area=4, shape="cone")
@@ -0,0 +1,177 @@
+from hashlib import blake2b
+from typing import Dict, Iterable, Optional, Set, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from entity import Entity
+    from map_tiles import GameMap, Tile
+    from spatial_index import SpatialIndex
+
+MASK = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15
+
+def feature_key(features: tuple) -> int:
+    """A 64-bit key for a tuple of plain values, the same in every process.
+
+    Python's own hash() is salted per process for strings, so it can't be
+    compared between a game and its replay (or a client and a server).
+    """
+    return int.from_bytes(blake2b(repr(features).encode(), digest_size=8).digest(), "little")
+
+def mix(z: int) -> int:
+    """SplitMix64 finaliser: spreads a 64-bit integer over all bits."""
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK
+    return z ^ (z >> 31)
+
+_tile_keys: Dict[tuple, int] = {}
+
+def tile_key(tile: 'Tile') -> int:
+    kind = (tile.char, tile.walkable, tile.transparent)
+    key = _tile_keys.get(kind)
+    if key is None:
+        key = _tile_keys[kind] = feature_key(kind)
+    return key
+
+def tile_part(game_map: 'GameMap', x: int, y: int, tile: 'Tile') -> int:
+    return mix((tile_key(tile) + (x * game_map.height + y) * GOLDEN) & MASK)
+
+def map_hash(game_map: 'GameMap') -> int:
+    """Sum of every tile's part; O(area), so GameMap caches it (see GameMap.set_tile)."""
+    total = 0
+    for x, column in enumerate(game_map.tiles):
+        for y, tile in enumerate(column):
+            total += tile_part(game_map, x, y, tile)
+    return total & MASK
+
+class StateHash:
+    """Zobrist-style 64-bit hash of the game state, maintained incrementally.
+
+    Every tracked entity contributes a key built from its hashed features
+    (see `Entity.hash_features`) and the map contributes one key per tile.
+    Parts are added, not XORed, so the hash doesn't depend on entity order
+    and two identical items on one tile don't cancel out.
+
+    Entities report their own changes with `mark`; the changed ones are
+    rehashed the next time `value` is read, so the cost per turn is
+    proportional to what changed that turn.
+    """
+    def __init__(self):
+        self.game_map: Optional['GameMap'] = None
+        self._parts: Dict['Entity', int] = {}
+        self._entity_sum = 0
+        self._dirty: Set['Entity'] = set()
+        # Kept in step with the tracked entities; entities already report
+        # their moves here, so the index hears about them from the hash
+        self.index: Optional['SpatialIndex'] = None
+
+    def reset(self, entities: Iterable['Entity']):
+        """Starts tracking exactly `entities` (a new or restored floor)."""
+        for entity in self._parts:
+            entity._tracker = None
+        self._parts.clear()
+        self._dirty.clear()
+        self._entity_sum = 0
+        if self.index:
+            self.index.reset(())
+        for entity in entities:
+            self.add(entity)
+
+    def add(self, entity: 'Entity'):
+        if entity in self._parts:
+            return
+        # Hashed on the next read, like any other change; floors that are
+        # generated and never played (batch runs) never pay for it
+        entity._tracker = self
+        self._parts[entity] = 0
+        self._dirty.add(entity)
+        if self.index:
+            self.index.add(entity)
+
+    def remove(self, entity: 'Entity'):
+        part = self._parts.pop(entity, None)
+        if part is not None:
+            self._entity_sum -= part
+            self._dirty.discard(entity)
+            entity._tracker = None
+            if self.index:
+                self.index.remove(entity)
+
+    def mark(self, entity: 'Entity'):
+        self._dirty.add(entity)
+        if self.index:
+            self.index.mark(entity)
+
+    def _flush(self):
+        for entity in self._dirty:
+            part = feature_key(entity.hash_features())
+            self._entity_sum += part - self._parts[entity]
+            self._parts[entity] = part
+        self._dirty.clear()
+
+    @property
+    def value(self) -> int:
+        self._flush()
+        tiles = self.game_map.tile_hash() if self.game_map else 0
+        return (self._entity_sum + tiles) & MASK
+
+    def recompute(self) -> int:
+        """The same hash computed from scratch, for checking the incremental one."""
+        total = sum(feature_key(entity.hash_features()) for entity in self._parts)
+        tiles = map_hash(self.game_map) if self.game_map else 0
+        return (total + tiles) & MASK
+
+class TrackedEntities(list):
+    """The engine's entity list: entities added or removed join or leave the StateHash."""
+    def __init__(self, tracker: StateHash, entities: Iterable['Entity'] = ()):
+        super().__init__(entities)
+        self.tracker = tracker
+        tracker.reset(self)
+
+    def __reduce__(self):
+        return (list, (list(self),)) # Saved as a plain list
+
+    def append(self, entity: 'Entity'):
+        super().append(entity)
+        self.tracker.add(entity)
+
+    def insert(self, index: int, entity: 'Entity'):
+        super().insert(index, entity)
+        self.tracker.add(entity)
+
+    def extend(self, entities: Iterable['Entity']):
+        for entity in entities:
+            self.append(entity)
+
+    def __iadd__(self, entities: Iterable['Entity']):
+        self.extend(entities)
+        return self
+
+    def remove(self, entity: 'Entity'):
+        super().remove(entity)
+        self.tracker.remove(entity)
+
+    def remove_all(self, entities: Iterable['Entity']):
+        """Removes several entities in one pass over the list (a spell's victims)."""
+        doomed = set(entities)
+        if not doomed:
+            return
+        super().__setitem__(slice(None), [entity for entity in self if entity not in doomed])
+        for entity in doomed:
+            self.tracker.remove(entity)
+
+    def pop(self, index: int = -1) -> 'Entity':
+        entity = super().pop(index)
+        self.tracker.remove(entity)
+        return entity
+
+    def clear(self):
+        super().clear()
+        self.tracker.reset(())
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self.tracker.reset(self)
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self.tracker.reset(self)
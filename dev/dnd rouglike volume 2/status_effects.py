@@ -0,0 +1,99 @@
+from typing import Dict, Iterable, List, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from entity import Entity, Fighter
+
+class EffectType:
+    """What one kind of status effect does while it lasts."""
+    def __init__(self, name: str, ac: int = 0, to_hit: int = 0, damage: int = 0,
+                 damage_multiplier: int = 1, stumble_chance: float = 0.0,
+                 extra_turn_chance: float = 0.0, consumed_by_attack: bool = False):
+        self.name = name
+        self.ac = ac
+        self.to_hit = to_hit
+        self.damage = damage
+        self.damage_multiplier = damage_multiplier
+        self.stumble_chance = stumble_chance # Chance to lose a turn
+        self.extra_turn_chance = extra_turn_chance # Chance the enemy loses theirs
+        self.consumed_by_attack = consumed_by_attack # Ends on the next attack, hit or miss
+
+EFFECT_TYPES: Dict[str, EffectType] = {effect.name: effect for effect in (
+    EffectType("Rage", ac=-2, to_hit=2, damage=2),
+    EffectType("Blind", to_hit=-5),
+    EffectType("SneakAttack", damage_multiplier=2, consumed_by_attack=True),
+    EffectType("Haste", extra_turn_chance=0.5),
+    EffectType("Slow", stumble_chance=0.5),
+)}
+
+class EffectModifiers:
+    """Everything on one fighter added up; Fighter caches it until its effects change."""
+    def __init__(self, names: Iterable[str] = ()):
+        self.ac = 0
+        self.to_hit = 0
+        self.damage = 0
+        self.damage_multiplier = 1
+        self.stumble_chance = 0.0
+        self.extra_turn_chance = 0.0
+        self.consumed_by_attack: List[str] = []
+        for name in names:
+            effect = EFFECT_TYPES.get(name)
+            if effect is None:
+                continue
+            self.ac += effect.ac
+            self.to_hit += effect.to_hit
+            self.damage += effect.damage
+            self.damage_multiplier *= effect.damage_multiplier
+            # Chances don't stack: two sources of Slow still stumble half the time
+            self.stumble_chance = max(self.stumble_chance, effect.stumble_chance)
+            self.extra_turn_chance = max(self.extra_turn_chance, effect.extra_turn_chance)
+            if effect.consumed_by_attack:
+                self.consumed_by_attack.append(name)
+
+class EffectWheel:
+    """When every status effect runs out, bucketed by turn.
+
+    Fighters' `status_effects` map names to the turn they expire on, so
+    nothing changes on the turns in between; advancing a turn only visits
+    that turn's bucket. Re-applying an effect files a new expiry and the
+    stale entry is skipped when its turn comes.
+
+    Floors that become current again (restored from the floor cache or a
+    save) are filed with `track`, since their fighters may be copies of the
+    ones the wheel last saw.
+    """
+    def __init__(self):
+        self.turn = 0
+        self._buckets: Dict[int, List[Tuple['Fighter', str]]] = {}
+
+    def reset(self, turn: int = 0):
+        self.turn = turn
+        self._buckets.clear()
+
+    def apply(self, fighter: 'Fighter', name: str, duration: int):
+        expiry = self.turn + duration
+        fighter.status_effects[name] = expiry
+        self._buckets.setdefault(expiry, []).append((fighter, name))
+
+    def advance(self, turn: int):
+        """Moves on to `turn`, removing the effects that ran out on the way."""
+        while self.turn < turn:
+            self.turn += 1
+            for fighter, name in self._buckets.pop(self.turn, ()):
+                if fighter.status_effects.get(name) == self.turn:
+                    del fighter.status_effects[name]
+
+    def track(self, entities: Iterable['Entity']):
+        for entity in entities:
+            if not entity.fighter:
+                continue
+            fighter = entity.fighter
+            effects = fighter.status_effects
+            for name, expiry in list(effects.items()):
+                if expiry <= self.turn:
+                    del effects[name] # Ran out while the floor was away
+                else:
+                    self._buckets.setdefault(expiry, []).append((fighter, name))
+            # Saves from before the wheel counted remaining turns instead
+            for name, duration in effects.pending_durations.items():
+                self.apply(fighter, name, duration)
+            effects.pending_durations.clear()
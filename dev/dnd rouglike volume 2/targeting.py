@@ -0,0 +1,109 @@
+from collections import deque
+from typing import Dict, List, Set, Tuple, TYPE_CHECKING
+from constants import FOV_RADIUS
+from fov import compute_fov
+
+if TYPE_CHECKING:
+    from entity import Entity
+    from engine import Engine
+
+Point = Tuple[int, int]
+
+class Targeting:
+    """Nearest-target queries for spells, wands, the cast key and AI.
+
+    Targets are found by searching outward from the user through the
+    engine's SpatialIndex, so a query costs as much as the area within
+    range. Two distance measures are offered:
+
+    - "los": Manhattan distance (what spell ranges mean), counting only
+      targets the user can see.
+    - "path": steps on foot around walls.
+
+    Results are cached until the turn ends or anything on the floor moves,
+    appears or dies, so asking again (a second spell, a target-cycling UI)
+    is free.
+    """
+    def __init__(self, engine: 'Engine'):
+        self.engine = engine
+        self._stamp = None
+        self._cache: Dict[tuple, List[Tuple[int, 'Entity']]] = {}
+
+    def is_valid(self, user: 'Entity', entity: 'Entity') -> bool:
+        """Living fighters on the other side: monsters for the player, the player for monsters."""
+        if entity is user or not entity.fighter or entity.fighter.hp <= 0:
+            return False
+        if user is self.engine.player:
+            return entity.ai is not None
+        return entity is self.engine.player
+
+    def nearest(self, user: 'Entity', max_distance: int, k: int = 1, metric: str = "los") -> List['Entity']:
+        """Up to `k` valid targets within `max_distance`, nearest first."""
+        return [entity for _, entity in self.ranked(user, max_distance, metric)[:k]]
+
+    def ranked(self, user: 'Entity', max_distance: int, metric: str = "los") -> List[Tuple[int, 'Entity']]:
+        """Every valid target within `max_distance` as (distance, entity), nearest first."""
+        engine = self.engine
+        stamp = (engine.turn, id(engine.game_map), engine.spatial_index.version)
+        if stamp != self._stamp:
+            self._stamp = stamp
+            self._cache.clear()
+        key = (user, user.x, user.y, max_distance, metric)
+        if key not in self._cache:
+            if metric == "los":
+                found = self._by_sight(user, max_distance)
+            elif metric == "path":
+                found = self._by_path(user, max_distance)
+            else:
+                raise ValueError(f"Unknown targeting metric {metric!r}")
+            self._cache[key] = found
+        # Damage doesn't invalidate the cache; the dying drop out here until they're removed
+        return [(distance, entity) for distance, entity in self._cache[key] if entity.fighter.hp > 0]
+
+    def visible_from(self, user: 'Entity', radius: int) -> Set[Point]:
+        if user is self.engine.player and radius <= FOV_RADIUS:
+            return self.engine.visible
+        return compute_fov(self.engine.game_map, user.x, user.y, radius)
+
+    def _by_sight(self, user: 'Entity', max_distance: int) -> List[Tuple[int, 'Entity']]:
+        player = self.engine.player
+        if user is not player:
+            # A monster's only target is the player, and sight is symmetric
+            distance = abs(player.x - user.x) + abs(player.y - user.y)
+            if distance <= max_distance and (user.x, user.y) in self.engine.visible and self.is_valid(user, player):
+                return [(distance, player)]
+            return []
+        visible = self.visible_from(user, max_distance)
+        at = self.engine.spatial_index.at
+        found = []
+        # Rings of equal Manhattan distance, nearest first
+        for distance in range(1, max_distance + 1):
+            for dx in range(-distance, distance + 1):
+                dy = distance - abs(dx)
+                cells = [(user.x + dx, user.y + dy)]
+                if dy:
+                    cells.append((user.x + dx, user.y - dy))
+                for cell in cells:
+                    if cell in visible:
+                        found.extend((distance, entity) for entity in at(*cell)
+                                     if self.is_valid(user, entity))
+        return found
+
+    def _by_path(self, user: 'Entity', max_distance: int) -> List[Tuple[int, 'Entity']]:
+        game_map = self.engine.game_map
+        at = self.engine.spatial_index.at
+        found = []
+        start = (user.x, user.y)
+        seen = {start}
+        frontier = deque([(start, 0)])
+        while frontier:
+            (x, y), distance = frontier.popleft()
+            if distance:
+                found.extend((distance, entity) for entity in at(x, y) if self.is_valid(user, entity))
+            if distance == max_distance:
+                continue
+            for cell in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if cell not in seen and game_map.is_walkable(*cell):
+                    seen.add(cell)
+                    frontier.append((cell, distance + 1))
+        return found
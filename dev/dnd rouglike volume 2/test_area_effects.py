@@ -0,0 +1,36 @@
+from area_effects import cone_cells, line_cells
+from items import ITEMS
+from map_tiles import WALL
+from scenarios import build_open_map
+
+def test_cone_covers_45_degrees_either_side_of_the_aim():
+    game_map = build_open_map(20, 20)
+    cells = cone_cells(game_map, (5, 10), (8, 10), 3)
+    expected = {(5 + dx, 10 + dy) for dx in range(1, 4) for dy in range(-dx, dx + 1) if dx * dx + dy * dy <= 9}
+    assert set(cells) == expected
+    assert (6, 11) in cells and (6, 12) not in cells # On the 45 degree edge, then just past it
+
+def test_diagonal_cone_fills_its_quadrant():
+    game_map = build_open_map(20, 20)
+    cells = cone_cells(game_map, (5, 5), (6, 6), 2)
+    assert set(cells) == {(5 + dx, 5 + dy) for dx in range(3) for dy in range(3)
+                          if 0 < dx * dx + dy * dy <= 4}
+
+def test_cone_needs_a_direction():
+    assert cone_cells(build_open_map(10, 10), (5, 5), (5, 5), 3) == []
+
+def test_line_runs_through_the_target_for_its_length():
+    game_map = build_open_map(20, 20)
+    assert line_cells(game_map, (2, 2), (4, 4), 3) == [(3, 3), (4, 4), (5, 5)]
+    assert line_cells(game_map, (2, 5), (4, 5), 8) == [(x, 5) for x in range(3, 11)]
+
+def test_line_stops_at_walls():
+    game_map = build_open_map(20, 20)
+    game_map.set_tile(6, 5, WALL)
+    assert line_cells(game_map, (2, 5), (4, 5), 8) == [(3, 5), (4, 5), (5, 5)]
+    assert line_cells(game_map, (15, 5), (17, 5), 8) == [(16, 5), (17, 5), (18, 5)] # Outer wall at x=19
+
+def test_shaped_spells_come_from_scrolls():
+    shapes = {ITEMS.get(item_id).function_kwargs["spell"].shape
+              for item_id in ("scroll_of_lightning_bolt", "scroll_of_cone_of_cold")}
+    assert shapes == {"line", "cone"}
@@ -0,0 +1,38 @@
+from inventory import Inventory, STACK_LIMIT
+from items import ITEMS
+
+class Owner:
+    """Stands in for the player entity the inventory reports changes to."""
+    fighter = None
+
+    def mark_changed(self):
+        pass
+
+def make_inventory(capacity: int = 26) -> Inventory:
+    inventory = Inventory(capacity)
+    inventory.owner = Owner()
+    return inventory
+
+def counts(inventory: Inventory):
+    return [stack.count for stack in inventory.stacks]
+
+def test_partial_stacks_merge_after_a_split():
+    inventory = make_inventory()
+    potions = [ITEMS.create("healing_potion") for _ in range(STACK_LIMIT + 1)]
+    for potion in potions:
+        assert inventory.add_item(potion)
+    assert counts(inventory) == [STACK_LIMIT, 1]
+    inventory.remove_item(potions[0])
+    inventory.remove_item(potions[-1])
+    assert counts(inventory) == [STACK_LIMIT - 1]
+    assert inventory.add_item(ITEMS.create("healing_potion"))
+    assert counts(inventory) == [STACK_LIMIT]
+
+def test_full_inventory_still_tops_up_a_partial_stack():
+    inventory = make_inventory(capacity=2)
+    potions = [ITEMS.create("healing_potion") for _ in range(STACK_LIMIT + 1)]
+    for potion in potions:
+        inventory.add_item(potion)
+    inventory.remove_item(potions[0])
+    assert inventory.add_item(ITEMS.create("healing_potion"))
+    assert counts(inventory) == [STACK_LIMIT, 1]
@@ -0,0 +1,44 @@
+import pickle
+from items import Item, ITEMS, heal, use_scroll
+from spells import FireballSpell
+
+def legacy_item(**fields) -> Item:
+    """An item as pickled by saves from before item prototypes."""
+    item = Item.__new__(Item)
+    item.__setstate__(dict({"charges": None, "is_identified": True, "owner": None}, **fields))
+    return item
+
+def round_trip(item: Item, times: int = 2) -> Item:
+    for _ in range(times):
+        item = pickle.loads(pickle.dumps(item))
+    return item
+
+def test_legacy_item_resolves_to_its_prototype():
+    potion = round_trip(legacy_item(name="Healing Potion", char="!", color=(0, 255, 0),
+                                    use_function=heal, function_kwargs={"amount": 15}))
+    assert potion.prototype is ITEMS.get("greater_healing_potion")
+
+def test_legacy_scroll_resolves_by_spell():
+    scroll = round_trip(legacy_item(name="Scroll of Fireball", char="?", color=(200, 200, 0),
+                                    use_function=use_scroll, function_kwargs={"spell": FireballSpell()},
+                                    is_identified=False))
+    assert scroll.prototype is ITEMS.get("scroll_of_fireball")
+    assert not scroll.is_identified
+
+def test_unknown_legacy_item_survives_repeated_saves():
+    relic = round_trip(legacy_item(name="Old Relic", char="*", color=(1, 2, 3),
+                                   use_function=None, function_kwargs={}), times=3)
+    assert relic.prototype.id is None
+    assert (relic.name, relic.char, relic.color) == ("Old Relic", "*", (1, 2, 3))
+
+def test_registry_item_round_trip():
+    wand = ITEMS.create("wand_of_magic_missile")
+    copy = round_trip(wand)
+    assert copy.prototype is wand.prototype and copy.charges == wand.charges
+
+def test_unidentified_scrolls_look_alike_on_the_floor():
+    scroll_ids = [item_id for item_id, prototype in ITEMS.prototypes.items() if prototype.slot == "scroll"
+                  and prototype.charges is None]
+    assert len({ITEMS.spawn(item_id, 0, 0).color for item_id in scroll_ids}) == 1
+    fireball = ITEMS.get("scroll_of_fireball")
+    assert ITEMS.spawn("scroll_of_fireball", 0, 0, color=fireball.shop_color).color == (255, 100, 0)
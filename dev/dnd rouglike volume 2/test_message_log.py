@@ -0,0 +1,28 @@
+import pickle
+from events import GameEvent, MessageEvent
+from message_log import MessageLog
+
+def test_plain_text_and_events_coalesce():
+    log = MessageLog()
+    log.add("Welcome to the Dungeon!")
+    log.add(MessageEvent("Welcome to the Dungeon!"))
+    assert log.lines() == ["Welcome to the Dungeon! x2"]
+
+def test_repeats_coalesce_after_loading():
+    log = MessageLog.from_lines(["You feel better."])
+    log = pickle.loads(pickle.dumps(log))
+    log.add(MessageEvent("You feel better."))
+    assert log.lines() == ["You feel better. x2"]
+    log = pickle.loads(pickle.dumps(log))
+    log.add("You feel better.")
+    assert log.lines() == ["You feel better. x3"]
+
+class Miss(GameEvent):
+    def format(self) -> str:
+        return "Goblin misses Player."
+
+def test_loaded_line_coalesces_with_a_structured_event():
+    log = pickle.loads(pickle.dumps(MessageLog.from_lines(["Goblin misses Player."])))
+    log.add(Miss())
+    log.add(Miss())
+    assert log.lines() == ["Goblin misses Player. x3"]
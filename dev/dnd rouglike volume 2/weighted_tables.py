@@ -0,0 +1,94 @@
+import json
+import os
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+TABLE_DATA_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "spawn_tables.json")
+
+class WeightedTable:
+    """Weighted random choice in O(1) per draw, using Vose's alias method.
+
+    Building the table is O(n); every draw afterwards costs one random
+    number and two list lookups, however many entries there are.
+    """
+    def __init__(self, entries: Union[Dict[Any, float], Iterable[Tuple[Any, float]]]):
+        if isinstance(entries, dict):
+            entries = entries.items()
+        entries = [(value, weight) for value, weight in entries if weight > 0]
+        if not entries:
+            raise ValueError("A weighted table needs at least one positive weight")
+        self.values = [value for value, _ in entries]
+        total = sum(weight for _, weight in entries)
+        n = len(entries)
+        scaled = [weight * n / total for _, weight in entries]
+        self._prob = [1.0] * n
+        self._alias = list(range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self._prob[s] = scaled[s]
+            self._alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Anything left over is 1.0 up to rounding error
+
+    def draw(self, rng=random) -> Any:
+        # One uniform number picks the column and the coin flip inside it
+        u = rng.random() * len(self.values)
+        column = int(u)
+        if u - column < self._prob[column]:
+            return self.values[column]
+        return self.values[self._alias[column]]
+
+    def draw_many(self, count: int, rng=random) -> List[Any]:
+        values, prob, alias, n = self.values, self._prob, self._alias, len(self.values)
+        result = []
+        for _ in range(count):
+            u = rng.random() * n
+            column = int(u)
+            result.append(values[column] if u - column < prob[column] else values[alias[column]])
+        return result
+
+class TableSet:
+    """Named weighted tables from a data file, built on first use and cached.
+
+    A table is either a flat {value: weight} mapping, a mapping of such
+    tables keyed by theme, or keyed by the first floor of a floor band.
+    """
+    def __init__(self, path: str = TABLE_DATA_FILE):
+        self.path = path
+        self._data: Optional[dict] = None
+        self._tables: Dict[Tuple[str, Optional[str]], WeightedTable] = {}
+        self._floor_tables: Dict[Tuple[str, int], WeightedTable] = {}
+
+    @property
+    def data(self) -> dict:
+        if self._data is None:
+            with open(self.path) as f:
+                self._data = json.load(f)
+        return self._data
+
+    def get(self, name: str, key: Optional[str] = None) -> WeightedTable:
+        table = self._tables.get((name, key))
+        if table is None:
+            entries = self.data[name] if key is None else self.data[name][key]
+            table = self._tables[(name, key)] = WeightedTable(entries)
+        return table
+
+    def for_floor(self, name: str, dungeon_level: int) -> WeightedTable:
+        """The table for the deepest floor band that has started by `dungeon_level`."""
+        table = self._floor_tables.get((name, dungeon_level))
+        if table is None:
+            bands = sorted(int(first_floor) for first_floor in self.data[name])
+            band = bands[0]
+            for first_floor in bands:
+                if dungeon_level >= first_floor:
+                    band = first_floor
+            table = self._floor_tables[(name, dungeon_level)] = self.get(name, str(band))
+        return table
+
+    def draw(self, name: str, key: Optional[str] = None) -> Any:
+        return self.get(name, key).draw()
+
+TABLES = TableSet()
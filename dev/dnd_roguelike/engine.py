@@ -5,10 +5,14 @@ from map_gen import Map
 from entity import Player, Monster
 from item import Item, Armor, HealingPotion, Weapon
 from fov import compute_fov
+from glyph_atlas import GlyphAtlas
 
 class Engine:
     def __init__(self, screen):
         self.screen = screen
+        # Glyphs are rendered once and cached on disk (see glyph_atlas.py)
+        self.map_font = GlyphAtlas.open("courier", TILE_SIZE)
+        self.ui_font = GlyphAtlas.open("arial", 16)
         self.map = Map(MAP_WIDTH, MAP_HEIGHT)
         player_x, player_y = self.map.make_map(30, 6, 10, MAP_WIDTH, MAP_HEIGHT)
         self.player = Player(player_x, player_y)
@@ -197,7 +201,7 @@ class Engine:
 
     def render(self):
         self.screen.fill(COLOR_BLACK)
-        font = pygame.font.SysFont("courier", TILE_SIZE)
+        font = self.map_font
         
         # Draw Map
         for x in range(self.map.width):
@@ -235,7 +239,7 @@ class Engine:
         pygame.display.flip()
 
     def render_ui(self):
-        font = pygame.font.SysFont("arial", 16)
+        font = self.ui_font
         # Message Log
         y_offset = SCREEN_HEIGHT - 100
         for msg, color in self.message_log:
@@ -1,10 +1,20 @@
 import http.server
-import socketserver
 import socket
 import os
 import sys
+import errno
+import time
+import gzip
+import hashlib
+import io
+import threading
+import email.utils
+import mimetypes
 
 PORT = 8000
+# Browsers re-check files this often (seconds); pages are always re-checked
+MAX_AGE = 60
+COMPRESSIBLE = {".html", ".js", ".css", ".json", ".svg", ".txt", ".py", ".md"}
 
 def get_ip():
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
@@ -23,22 +33,149 @@ script_dir = os.path.dirname(os.path.abspath(__file__))
 root_dir = os.path.dirname(script_dir)
 os.chdir(root_dir)
 
-Handler = http.server.SimpleHTTPRequestHandler
+class StaticFile:
+    """One file held in memory, with its gzipped copy and validators."""
+    def __init__(self, path, stat):
+        with open(path, "rb") as f:
+            self.body = f.read()
+        self.version = (stat.st_mtime_ns, stat.st_size)
+        self.content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:16] + '"'
+        self.mtime = int(stat.st_mtime)
+        self.last_modified = email.utils.formatdate(stat.st_mtime, usegmt=True)
+        self.gzipped = None
+        if os.path.splitext(path)[1].lower() in COMPRESSIBLE and len(self.body) > 512:
+            self.gzipped = gzip.compress(self.body, 6, mtime=0)
+
+class StaticCache:
+    """Files by path, re-read only when their size or modification time changes."""
+    def __init__(self):
+        self.files = {}
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        stat = os.stat(path)
+        entry = self.files.get(path)
+        if entry is None or entry.version != (stat.st_mtime_ns, stat.st_size):
+            entry = StaticFile(path, stat)
+            with self.lock:
+                self.files[path] = entry
+        return entry
+
+    def preload(self, directory):
+        """Reads and compresses everything under `directory` before the first visitor."""
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [d for d in dirs if not d.startswith(".") and d != "__pycache__"]
+            for name in files:
+                path = os.path.join(root, name)
+                self.get(path)
+
+CACHE = StaticCache()
+
+class LanServer(http.server.ThreadingHTTPServer):
+    """One thread per connection, so a slow player doesn't hold up the rest."""
+    def handle_error(self, request, client_address):
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return # Closed tab or dropped Wi-Fi
+        super().handle_error(request, client_address)
+
+class Handler(http.server.SimpleHTTPRequestHandler):
+    """Serves files from CACHE, gzipped when the browser accepts it.
+
+    Connections are kept alive (HTTP/1.1), responses carry an ETag and
+    Last-Modified so repeat visits get a 304, and every request is logged
+    with how long it took.
+    """
+    protocol_version = "HTTP/1.1"
+    timeout = 30 # Close idle kept-alive connections so they don't hold a thread
+    disable_nagle_algorithm = True
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, "index.html")
+            if not self.path.split("?", 1)[0].endswith("/") or not os.path.isfile(index):
+                return super().send_head() # Redirect or directory listing
+            path = index
+        try:
+            entry = CACHE.get(path)
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+
+        if self.not_modified(entry):
+            self.send_response(304)
+            self.send_validators(entry)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+
+        body = entry.body
+        self.encoding = ""
+        self.send_response(200)
+        self.send_header("Content-Type", entry.content_type)
+        if entry.gzipped is not None:
+            self.send_header("Vary", "Accept-Encoding")
+            if "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = entry.gzipped
+                self.encoding = " gzip"
+                self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_validators(entry)
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def not_modified(self, entry):
+        if "If-None-Match" in self.headers:
+            return entry.etag in [tag.strip() for tag in self.headers["If-None-Match"].split(",")] \
+                or self.headers["If-None-Match"].strip() == "*"
+        since = self.headers.get("If-Modified-Since")
+        if since:
+            try:
+                return entry.mtime <= email.utils.parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def send_validators(self, entry):
+        self.send_header("ETag", entry.etag)
+        self.send_header("Last-Modified", entry.last_modified)
+        if entry.content_type.startswith("text/html"):
+            self.send_header("Cache-Control", "no-cache")
+        else:
+            self.send_header("Cache-Control", f"public, max-age={MAX_AGE}")
+
+    def parse_request(self):
+        # Timed from the request line, not from waiting on a kept-alive connection
+        self.started = time.perf_counter()
+        return super().parse_request()
+
+    def handle_one_request(self):
+        self.status = None
+        self.encoding = ""
+        super().handle_one_request()
+        if self.status is not None:
+            elapsed = (time.perf_counter() - self.started) * 1000
+            sys.stderr.write(f"{self.address_string()} {self.command} {self.path} {self.status}{self.encoding} {elapsed:.1f} ms\n")
+
+    def log_request(self, code="-", size="-"):
+        # Logged by handle_one_request once the response has been sent
+        self.status = int(code) if code != "-" else code
 
 try:
-    with socketserver.TCPServer(("", PORT), Handler) as httpd:
+    CACHE.preload(script_dir) # The game; anything else is read on first request
+    with LanServer(("", PORT), Handler) as httpd:
         local_ip = get_ip()
         print("=" * 60)
         print("!!! D&D ROGUELIKE LAN SERVER !!!")
         print("=" * 60)
-        print(f"Status:    RUNNING")
+        print(f"Status:    RUNNING ({len(CACHE.files)} files cached)")
         print(f"Port:      {PORT}")
         print(f"Local URL: http://localhost:{PORT}/website/")
         print(f"LAN URL:   http://{local_ip}:{PORT}/website/")
         print("-" * 60)
         print("INSTRUCTIONS:")
         print(f"1. Tell your friends to go to: http://{local_ip}:{PORT}/website/")
-        print("2. Source files are available at: http://{local_ip}:{PORT}/")
 
         print("2. Ensure they are on the SAME Wi-Fi/Network as you.")
         print("-" * 60)
@@ -54,7 +191,7 @@ except KeyboardInterrupt:
     print("\nStopping server... Done.")
     sys.exit(0)
 except OSError as e:
-    if e.errno == 10048:
+    if e.errno in (10048, errno.EADDRINUSE):
         print(f"\nERROR: Port {PORT} is already in use.")
         print("Please close any other servers or wait 60 seconds and try again.")
     else: